@@ -0,0 +1,333 @@
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import update
+
+from app import db
+from models import HazardAlert
+from spatial import GridIndex
+
+SEVERITY_RANK = {'low': 0, 'medium': 1, 'high': 2, 'critical': 3}
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class ReadingBatch:
+    """Column arrays for one ingested batch, shared by every rule"""
+
+    def __init__(self, rows, anomalies):
+        self.rows = rows
+        self.sensor_ids = [row['sensor_id'] for row in rows]
+        self.sensor_types = np.array([row['sensor_type'] for row in rows], dtype=object)
+        self.values = np.array([row['value'] for row in rows], dtype=np.float64)
+        self.latitudes = [row['latitude'] for row in rows]
+        self.longitudes = [row['longitude'] for row in rows]
+        # Reading time as epoch seconds; windows follow data time, not wall time
+        self.times = (np.array([row['timestamp'] for row in rows], dtype='datetime64[us]')
+                      - np.datetime64(EPOCH, 'us')) / np.timedelta64(1, 's')
+        self.anomalies = np.asarray(anomalies, dtype=bool)
+
+    def of_type(self, sensor_type):
+        if sensor_type is None:
+            return np.arange(len(self.rows))
+        return np.flatnonzero(self.sensor_types == sensor_type)
+
+    def trigger(self, rule, i, severity, description):
+        return {
+            'rule': rule.name,
+            'hazard_type': rule.hazard_type,
+            'severity': severity,
+            'sensor_id': self.sensor_ids[i],
+            'latitude': self.latitudes[i],
+            'longitude': self.longitudes[i],
+            'description': description,
+        }
+
+
+class ThresholdRule:
+    """Fires on any reading past a level; ``levels`` are (limit, severity), mildest first"""
+
+    def __init__(self, name, hazard_type, sensor_type, levels, below=False, description=''):
+        self.name = name
+        self.hazard_type = hazard_type
+        self.sensor_type = sensor_type
+        self.levels = levels
+        self.below = below
+        self.description = description
+
+    def evaluate(self, batch):
+        indices = batch.of_type(self.sensor_type)
+        values = batch.values[indices]
+        # Index of the most severe level each reading passes, -1 for none
+        levels = np.full(len(indices), -1)
+        for level, (limit, _) in enumerate(self.levels):
+            levels[(values < limit) if self.below else (values > limit)] = level
+        for i, level in zip(indices.tolist(), levels.tolist()):
+            if level >= 0:
+                yield batch.trigger(self, i, self.levels[level][1], self.description.format(
+                    sensor_id=batch.sensor_ids[i], value=batch.values[i]))
+
+
+class RateOfChangeRule:
+    """Fires when a sensor moves by more than ``max_change`` within ``seconds``"""
+
+    def __init__(self, name, hazard_type, sensor_type, max_change, seconds, severity, description=''):
+        self.name = name
+        self.hazard_type = hazard_type
+        self.sensor_type = sensor_type
+        self.max_change = max_change
+        self.seconds = seconds
+        self.severity = severity
+        self.description = description
+        # sensor_id -> deque of (time, value) inside the window
+        self.windows = {}
+
+    def evaluate(self, batch):
+        for i in batch.of_type(self.sensor_type).tolist():
+            t, value = batch.times[i], batch.values[i]
+            window = self.windows.get(batch.sensor_ids[i])
+            if window is None:
+                window = self.windows[batch.sensor_ids[i]] = deque()
+            while window and window[0][0] < t - self.seconds:
+                window.popleft()
+            change = value - window[0][1] if window else 0.0
+            window.append((t, value))
+            if abs(change) > self.max_change:
+                yield batch.trigger(self, i, self.severity, self.description.format(
+                    sensor_id=batch.sensor_ids[i], value=value, change=change))
+
+
+class SustainedRule:
+    """Fires when every reading from a sensor stays past ``limit`` for ``seconds``"""
+
+    def __init__(self, name, hazard_type, sensor_type, limit, seconds, severity, below=False, description=''):
+        self.name = name
+        self.hazard_type = hazard_type
+        self.sensor_type = sensor_type
+        self.limit = limit
+        self.seconds = seconds
+        self.severity = severity
+        self.below = below
+        self.description = description
+        # sensor_id -> time the current unbroken breach started
+        self.breach_since = {}
+
+    def evaluate(self, batch):
+        indices = batch.of_type(self.sensor_type)
+        values = batch.values[indices]
+        breached = (values < self.limit) if self.below else (values > self.limit)
+        for i, is_breach in zip(indices.tolist(), breached.tolist()):
+            sensor_id = batch.sensor_ids[i]
+            if not is_breach:
+                self.breach_since.pop(sensor_id, None)
+                continue
+            since = self.breach_since.setdefault(sensor_id, batch.times[i])
+            if batch.times[i] - since >= self.seconds:
+                yield batch.trigger(self, i, self.severity, self.description.format(
+                    sensor_id=sensor_id, value=batch.values[i], minutes=(batch.times[i] - since) / 60))
+
+
+class CorrelationRule:
+    """Fires when ``min_sensors`` sensors within ``radius_km`` are anomalous within ``seconds``"""
+
+    def __init__(self, name, hazard_type, sensor_type, min_sensors, radius_km, seconds, severity,
+                 description=''):
+        self.name = name
+        self.hazard_type = hazard_type
+        self.sensor_type = sensor_type
+        self.min_sensors = min_sensors
+        self.radius_km = radius_km
+        self.seconds = seconds
+        self.severity = severity
+        self.description = description
+        # Sensors with a recent anomaly, keyed by sensor_id, payload = anomaly time
+        self.recent = GridIndex(cell_degrees=max(radius_km / 111.32, 0.01))
+
+    def evaluate(self, batch):
+        indices = batch.of_type(self.sensor_type)
+        indices = indices[batch.anomalies[indices]]
+        if not len(indices) and not len(self.recent):
+            return
+        newest = batch.times.max() if len(batch.times) else 0.0
+        self.recent.remove_where(lambda anomaly_time: anomaly_time < newest - self.seconds)
+        for i in indices.tolist():
+            self.recent.insert(batch.sensor_ids[i], batch.latitudes[i], batch.longitudes[i], batch.times[i])
+            nearby = self.recent.within_radius(batch.latitudes[i], batch.longitudes[i], self.radius_km)
+            if len(nearby) >= self.min_sensors:
+                yield batch.trigger(self, i, self.severity, self.description.format(
+                    sensor_id=batch.sensor_ids[i], count=len(nearby), radius_km=self.radius_km))
+
+
+def default_rules():
+    """Rules for the simulated network
+
+    Thresholds sit outside normal operating ranges (see data_simulator), so
+    alerts follow actual excursions. Rules hold rolling state, so each engine
+    gets fresh instances.
+    """
+    return [
+        ThresholdRule('wind_threshold', 'storm', 'weather_station', [(50, 'high'), (80, 'critical')],
+                      description="Wind speed {value:.1f} km/h at {sensor_id}"),
+        SustainedRule('wind_sustained', 'storm', 'weather_station', 25, 300, 'medium',
+                      description="Wind above 25 km/h for {minutes:.0f} minutes at {sensor_id}"),
+        ThresholdRule('tide_threshold', 'erosion', 'tide_gauge', [(2.5, 'medium'), (3.0, 'high')],
+                      description="Tide level {value:.2f} m at {sensor_id} - inundation and erosion risk"),
+        RateOfChangeRule('tide_surge', 'erosion', 'tide_gauge', 0.6, 600, 'high',
+                         description="Tide changed {change:+.2f} m in 10 minutes at {sensor_id} - possible surge"),
+        ThresholdRule('water_quality_threshold', 'pollution', 'water_quality', [(40, 'medium'), (30, 'high')],
+                      below=True, description="Water quality index {value:.0f} at {sensor_id} - possible contamination"),
+        CorrelationRule('water_quality_cluster', 'pollution', 'water_quality', 2, 25.0, 1800, 'critical',
+                        description="{count} water quality sensors within {radius_km:.0f} km flagged anomalous"),
+    ]
+
+
+class AlertEngine:
+    """Evaluates alert rules over each ingested batch and owns the open alerts
+
+    Rules keep only per-sensor rolling state, so each batch costs time in
+    proportion to its size. A trigger near an open alert of the same hazard
+    (within ``coalesce_km``) bumps that alert instead of opening another;
+    alerts with no trigger for ``resolve_after`` seconds are resolved. Open
+    alerts live in memory (and in the spatial ``index``), so reading them
+    never scans the table.
+
+    Only the process that runs ``load`` at startup holds the open set and
+    sets ``tracking``; elsewhere ``evaluate`` does nothing, since triggers
+    could not coalesce into alerts it doesn't know about, and reads go to
+    the table.
+    """
+
+    def __init__(self, rules, index, serialize, coalesce_km=5.0, resolve_after=900.0):
+        self.rules = list(rules)
+        self.index = index
+        self.serialize = serialize
+        self.coalesce_km = coalesce_km
+        self.resolve_after = timedelta(seconds=resolve_after)
+        self.tracking = False
+        self.active = {}
+        self._last_triggered = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.active)
+
+    def load(self):
+        """Pick up alerts left open by a previous run and start tracking; called once at startup"""
+        alerts = HazardAlert.query.filter(HazardAlert.is_active == True).all()
+        with self._lock:
+            for alert in alerts:
+                self._track(alert.id, self.serialize(alert), alert.last_triggered or alert.timestamp)
+            self.tracking = True
+
+    def active_alerts(self, bbox=None, severity=None, hazard_type=None, sensor_id=None):
+        """Open alerts, newest first (by timestamp, then id, as the table query orders them)"""
+        with self._lock:
+            if bbox is None:
+                alerts = list(self.active.values())
+            else:
+                min_lon, min_lat, max_lon, max_lat = bbox
+                alerts = [alert for _, alert in self.index.bbox(min_lat, min_lon, max_lat, max_lon)]
+        alerts = [alert for alert in alerts
+                  if (severity is None or alert['severity'] == severity)
+                  and (hazard_type is None or alert['hazard_type'] == hazard_type)
+                  and (sensor_id is None or alert['sensor_id'] == sensor_id)]
+        alerts.sort(key=lambda alert: (alert['timestamp'], alert['id']), reverse=True)
+        return alerts
+
+    def evaluate(self, rows, anomalies, now=None):
+        """Run every rule over a batch; returns ``[(action, alert)]`` changes"""
+        if not self.tracking:
+            return []
+        now = now or datetime.utcnow()
+        triggers = []
+        if rows:
+            batch = ReadingBatch(rows, anomalies)
+            for rule in self.rules:
+                triggers.extend(rule.evaluate(batch))
+        changes = self._apply(triggers, now) if triggers else []
+        return changes + self.sweep(now)
+
+    def sweep(self, now=None):
+        """Resolve alerts that have gone quiet"""
+        now = now or datetime.utcnow()
+        with self._lock:
+            stale = [alert_id for alert_id, last in self._last_triggered.items() if last < now - self.resolve_after]
+            if not stale:
+                return []
+            db.session.execute(update(HazardAlert), [
+                {'id': alert_id, 'is_active': False, 'resolved_at': now} for alert_id in stale
+            ])
+            db.session.commit()
+            resolved = []
+            for alert_id in stale:
+                alert = self.active.pop(alert_id)
+                del self._last_triggered[alert_id]
+                self.index.remove(alert_id)
+                resolved.append(('resolved', dict(alert, resolved_at=now.isoformat())))
+        return resolved
+
+    def _apply(self, triggers, now):
+        opened, escalated, touched = [], set(), set()
+        with self._lock:
+            for trigger in triggers:
+                alert = self._find_open(trigger)
+                if alert is None:
+                    opened.append(self._open(trigger, now))
+                    continue
+                alert['trigger_count'] += 1
+                alert['last_triggered'] = now.isoformat()
+                self._last_triggered[alert['id']] = now
+                touched.add(alert['id'])
+                if SEVERITY_RANK[trigger['severity']] > SEVERITY_RANK[alert['severity']]:
+                    alert['severity'] = trigger['severity']
+                    alert['description'] = trigger['description']
+                    escalated.add(alert['id'])
+
+            # Repeats only move counters, so they are written in one statement
+            if touched:
+                db.session.execute(update(HazardAlert), [{
+                    'id': alert_id,
+                    'severity': self.active[alert_id]['severity'],
+                    'description': self.active[alert_id]['description'],
+                    'trigger_count': self.active[alert_id]['trigger_count'],
+                    'last_triggered': now,
+                } for alert_id in touched])
+            db.session.commit()
+
+            opened_ids = {alert['id'] for alert in opened}
+            changes = [('opened', dict(alert)) for alert in opened]
+            changes.extend(('updated', dict(self.active[alert_id]))
+                           for alert_id in escalated if alert_id not in opened_ids)
+        return changes
+
+    def _find_open(self, trigger):
+        for _, alert, _ in self.index.within_radius(trigger['latitude'], trigger['longitude'], self.coalesce_km):
+            if alert['hazard_type'] == trigger['hazard_type']:
+                return alert
+        return None
+
+    def _open(self, trigger, now):
+        alert = HazardAlert(
+            hazard_type=trigger['hazard_type'],
+            severity=trigger['severity'],
+            latitude=trigger['latitude'],
+            longitude=trigger['longitude'],
+            description=trigger['description'],
+            rule=trigger['rule'],
+            sensor_id=trigger['sensor_id'],
+            trigger_count=1,
+            timestamp=now,
+            last_triggered=now,
+        )
+        db.session.add(alert)
+        # Flush for the id, so later triggers in the same batch coalesce into it
+        db.session.flush()
+        return self._track(alert.id, self.serialize(alert), now)
+
+    def _track(self, alert_id, alert, last_triggered):
+        self.active[alert_id] = alert
+        self._last_triggered[alert_id] = last_triggered
+        self.index.insert(alert_id, alert['latitude'], alert['longitude'], alert)
+        return alert
@@ -1,46 +1,57 @@
 import numpy as np
-from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import StandardScaler
-import random
+import threading
+
+# Normal operating range per sensor type, plus the centre and scale used to
+# turn distance from normal into a 0-1 score
+THRESHOLDS = {
+    'tide_gauge': {'min': -1.0, 'max': 3.0, 'center': 1.2, 'scale': 2.0},
+    'weather_station': {'min': 0, 'max': 80, 'center': 15.0, 'scale': 30.0},
+    'water_quality': {'min': 0, 'max': 100, 'center': 75.0, 'scale': 25.0}
+}
+
+# Streaming detection: readings further than this many standard deviations
+# from their sensor's exponentially weighted mean are flagged once enough
+# history exists. STREAM_ALPHA is the weight of the newest reading, so older
+# readings fade with a half-life of about 14 readings and the baseline
+# follows a sensor's drift instead of averaging its whole life
+ZSCORE_THRESHOLD = 4.0
+MIN_STREAM_SAMPLES = 30
+STREAM_ALPHA = 0.05
+
+# Isolation forest inference is run in chunks of this many readings
+MODEL_BATCH_SIZE = 4096
+# A reading is flagged when its isolation forest score is above this quantile
+# of the training history's scores; sklearn's 'auto' offset flags far more
+CALIBRATION_QUANTILE = 0.999
 
 class AnomalyDetector:
     def __init__(self):
-        # Initialize with simple threshold-based detection only
+        # Threshold-based detection until trained models are installed;
+        # maps sensor_type -> (scaler, isolation forest, score threshold)
         self.models = {}
-        self.scalers = {}
-        self.historical_data = {
-            'tide_gauge': [],
-            'weather_station': [],
-            'water_quality': []
-        }
+        self.model_version = None
+        # Per-sensor weighted mean/variance for incremental scoring
+        self.streams = SensorStreams()
+        self._stream_lock = threading.Lock()
 
-    def _initialize_baseline_data(self):
-        """Initialize with baseline historical data for training"""
-        # Generate baseline data for each sensor type
-        for sensor_type in self.historical_data.keys():
-            if sensor_type == 'tide_gauge':
-                # Tidal data typically ranges from -0.5 to 2.5 meters
-                baseline = np.random.normal(1.2, 0.4, 100)
-                baseline = np.clip(baseline, -0.5, 2.5)
-            elif sensor_type == 'weather_station':
-                # Wind speed typically ranges from 0 to 50 km/h
-                baseline = np.random.normal(15, 8, 100)
-                baseline = np.clip(baseline, 0, 50)
-            elif sensor_type == 'water_quality':
-                # Water quality index ranges from 0 to 100
-                baseline = np.random.normal(75, 10, 100)
-                baseline = np.clip(baseline, 0, 100)
-            else:
-                baseline = np.random.normal(50, 10, 100)
-            
-            self.historical_data[sensor_type] = baseline.tolist()
-
-    def _train_models(self):
-        """Train isolation forest models for each sensor type"""
-        for sensor_type, data in self.historical_data.items():
+    def fit_models(self, historical_data, n_jobs=None):
+        """Fit a scaler + isolation forest per sensor type
+
+        Returns a new ``{sensor_type: (scaler, model, threshold)}`` dict
+        without touching the models currently serving, so a refit can run in
+        the background. ``threshold`` is the CALIBRATION_QUANTILE of the
+        model's scores over its own training data.
+        """
+        # scikit-learn takes over a second to import, so workers only pay for
+        # it when they actually train (loading saved models imports it too)
+        from sklearn.ensemble import IsolationForest
+        from sklearn.preprocessing import StandardScaler
+
+        models = {}
+        for sensor_type, data in historical_data.items():
             if len(data) > 10:  # Need minimum data points
                 # Prepare data
-                X = np.array(data).reshape(-1, 1)
+                X = np.asarray(data, dtype=np.float64).reshape(-1, 1)
                 
                 # Scale data
                 scaler = StandardScaler()
@@ -48,51 +59,272 @@ class AnomalyDetector:
                 
                 # Train isolation forest
                 try:
-                    model = IsolationForest(contamination=0.1, random_state=42)
+                    model = IsolationForest(contamination='auto', random_state=42, n_jobs=n_jobs)
                     model.fit(X_scaled)
                 except Exception as e:
                     print(f"Error training model for {sensor_type}: {e}")
                     # Use simple threshold detection instead
-                    model = None
-                
-                self.models[sensor_type] = model
-                self.scalers[sensor_type] = scaler
+                    continue
+
+                threshold = float(np.quantile(self._model_scores(scaler, model, X.ravel()), CALIBRATION_QUANTILE))
+                models[sensor_type] = (scaler, model, threshold)
+        return models
+
+    def install_models(self, models, version=None):
+        """Swap in a new set of models in one assignment"""
+        # Readers take a single reference to self.models per call, so they
+        # see either the old set or the new one, never a mix. Model sets
+        # saved before calibration have no threshold and are left out
+        self.models = {sensor_type: model for sensor_type, model in models.items() if len(model) == 3}
+        self.model_version = version
 
     def detect_anomaly(self, value, sensor_type):
         """Detect if a sensor reading is anomalous"""
-        # Always use simple threshold-based detection to avoid ML training issues
+        if sensor_type in self.models:
+            result = self.detect_batch([value], [sensor_type])
+            return {'score': float(result['score'][0]), 'is_anomaly': bool(result['is_anomaly'][0])}
         return self._simple_anomaly_detection(value, sensor_type)
 
+    def detect_batch(self, values, sensor_types):
+        """Score whole arrays of readings at once
+
+        Applies the threshold rules, plus the isolation forest models for
+        sensor types that have one. Returns a dict of NumPy arrays
+        (``score``, ``is_anomaly``) aligned with the input; unknown sensor
+        types score 0 and are never anomalous.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        models = self.models
+        masks = _type_masks(sensor_types, list(THRESHOLDS) + [t for t in models if t not in THRESHOLDS])
+        scores = np.zeros(values.shape, dtype=np.float64)
+        is_anomaly = np.zeros(values.shape, dtype=bool)
+
+        for sensor_type, threshold in THRESHOLDS.items():
+            mask = masks[sensor_type]
+            if not mask.any():
+                continue
+            selected = values[mask]
+            is_anomaly[mask] = (selected < threshold['min']) | (selected > threshold['max'])
+            scores[mask] = np.minimum(1.0, np.abs(selected - threshold['center']) / threshold['scale'])
+
+        # Isolation forest models, where trained, can flag readings that are
+        # inside the hard limits but unusual for the sensor type
+        for sensor_type, (scaler, model, threshold) in models.items():
+            mask = masks[sensor_type]
+            if not mask.any():
+                continue
+            raw = self._model_scores(scaler, model, values[mask])
+            is_anomaly[mask] |= raw > threshold
+            # Isolation forest scores sit around 0.5 for normal points
+            scores[mask] = np.maximum(scores[mask], np.clip((raw - 0.5) * 2, 0.0, 1.0))
+
+        return {'score': np.round(scores, 3), 'is_anomaly': is_anomaly}
+
+    def _model_scores(self, scaler, model, values):
+        """Isolation forest anomaly scores (higher is more anomalous), in micro-batches"""
+        raw = np.empty(values.shape, dtype=np.float64)
+        for start in range(0, len(values), MODEL_BATCH_SIZE):
+            chunk = values[start:start + MODEL_BATCH_SIZE].reshape(-1, 1)
+            raw[start:start + MODEL_BATCH_SIZE] = -model.score_samples(scaler.transform(chunk))
+        return raw
+
+    def detect_stream(self, sensor_ids, values, sensor_types):
+        """Score newly arrived readings against per-sensor rolling statistics
+
+        Each reading is compared with the exponentially weighted mean and
+        variance of the readings from the same sensor that arrived before
+        it, then folded into that state, so a reading is scored exactly
+        once. The result combines ``detect_batch`` with a z-score test.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        result = self.detect_batch(values, sensor_types)
+        zscores = np.zeros(values.shape, dtype=np.float64)
+
+        if values.size:
+            with self._stream_lock:
+                zscores = self.streams.update(self.streams.codes(sensor_ids), values)
+
+        z_anomaly = np.abs(zscores) > ZSCORE_THRESHOLD
+        result['zscore'] = np.round(zscores, 3)
+        result['is_anomaly'] = result['is_anomaly'] | z_anomaly
+        result['score'] = np.maximum(result['score'], np.round(np.minimum(1.0, np.abs(zscores) / (2 * ZSCORE_THRESHOLD)), 3))
+        return result
+
     def _simple_anomaly_detection(self, value, sensor_type):
         """Fallback simple threshold-based anomaly detection"""
-        thresholds = {
-            'tide_gauge': {'min': -1.0, 'max': 3.0},
-            'weather_station': {'min': 0, 'max': 80},
-            'water_quality': {'min': 0, 'max': 100}
+        threshold = THRESHOLDS.get(sensor_type)
+        if threshold is None:
+            return {'score': 0.0, 'is_anomaly': False}
+
+        is_anomaly = value < threshold['min'] or value > threshold['max']
+        # Calculate simple score based on distance from normal range
+        score = min(1.0, abs(value - threshold['center']) / threshold['scale'])
+        return {
+            'score': round(score, 3),
+            'is_anomaly': is_anomaly
         }
-        
-        if sensor_type in thresholds:
-            threshold = thresholds[sensor_type]
-            is_anomaly = value < threshold['min'] or value > threshold['max']
-            
-            # Calculate simple score based on distance from normal range
-            score = 0.0
-            if sensor_type == 'tide_gauge':
-                normal_center = 1.2
-                distance = abs(value - normal_center)
-                score = min(1.0, distance / 2.0)
-            elif sensor_type == 'weather_station':
-                normal_center = 15.0
-                distance = abs(value - normal_center)
-                score = min(1.0, distance / 30.0)
-            elif sensor_type == 'water_quality':
-                normal_center = 75.0
-                distance = abs(value - normal_center)
-                score = min(1.0, distance / 25.0)
-            
-            return {
-                'score': round(score, 3),
-                'is_anomaly': is_anomaly
-            }
-        
-        return {'score': 0.0, 'is_anomaly': False}
+
+
+class _TypeCodes(dict):
+    def __missing__(self, key):
+        return -1
+
+
+def _type_masks(sensor_types, names):
+    """``{name: boolean mask}`` of the readings of each sensor type in ``names``"""
+    if isinstance(sensor_types, np.ndarray):
+        return {name: sensor_types == name for name in names}
+    # Looking each type up beats building a NumPy string array from a list
+    codes = _TypeCodes((name, code) for code, name in enumerate(names))
+    codes = np.fromiter(map(codes.__getitem__, sensor_types), dtype=np.int16, count=len(sensor_types))
+    return {name: codes == code for code, name in enumerate(names)}
+
+
+class SensorStreams:
+    """Exponentially weighted mean/variance for every sensor, in parallel arrays
+
+    ``index`` maps each sensor id to its row, so a batch is turned into
+    integer codes with dict lookups rather than by sorting its ids.
+    """
+
+    def __init__(self):
+        self.index = {}
+        self.count = np.zeros(0, dtype=np.int64)
+        self.mean = np.zeros(0, dtype=np.float64)
+        self.var = np.zeros(0, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.index)
+
+    def clear(self):
+        self.__init__()
+
+    def codes(self, sensor_ids):
+        """Row of each sensor id, adding rows for sensors not seen before"""
+        if isinstance(sensor_ids, np.ndarray):
+            sensor_ids = sensor_ids.tolist()
+        index = self.index
+        try:
+            return np.fromiter(map(index.__getitem__, sensor_ids), dtype=np.intp, count=len(sensor_ids))
+        except KeyError:
+            pass
+        for sensor_id in set(sensor_ids).difference(index):
+            index[sensor_id] = len(index)
+        if len(index) > len(self.count):
+            size = max(len(index), 2 * len(self.count))
+            self.count = np.concatenate((self.count, np.zeros(size - len(self.count), dtype=np.int64)))
+            self.mean = np.concatenate((self.mean, np.zeros(size - len(self.mean))))
+            self.var = np.concatenate((self.var, np.zeros(size - len(self.var))))
+        return np.fromiter(map(index.__getitem__, sensor_ids), dtype=np.intp, count=len(sensor_ids))
+
+    def items(self):
+        """``(sensor_id, (count, mean, var))`` for every sensor"""
+        for sensor_id, row in self.index.items():
+            yield sensor_id, (int(self.count[row]), float(self.mean[row]), float(self.var[row]))
+
+    def restore(self, states):
+        """Load ``{sensor_id: (count, mean, var)}``, as saved from ``items``"""
+        rows = self.codes(list(states))
+        for row, (count, mean, var) in zip(rows.tolist(), states.values()):
+            self.count[row], self.mean[row], self.var[row] = count, mean, var
+
+    def update(self, codes, values):
+        """Fold readings (in arrival order) into their sensors' state
+
+        ``codes[i]`` is the row of the sensor that produced ``values[i]``.
+        Returns each value's z-score against its sensor's weighted mean and
+        variance before it. Per reading this is the incremental update
+        ``diff = x - mean; mean += alpha * diff; var = (1 - alpha) * (var + alpha * diff**2)``;
+        both are first-order recurrences, which run for the whole batch at
+        once on readings sorted (stably) by sensor.
+        """
+        n = len(values)
+        if not n:
+            return np.zeros(0, dtype=np.float64)
+        decay = 1 - STREAM_ALPHA
+        batch = _Segments(codes, len(self.count), decay)
+        ordered = values[batch.order]
+        rows = batch.rows
+
+        count = self.count[rows]
+        # A new sensor's mean starts at its first reading
+        mean = np.where(count > 0, self.mean[rows], ordered[batch.starts])
+        means, new_mean = batch.recurrence(STREAM_ALPHA * ordered, mean)
+        diff = ordered - batch.previous(means, mean)
+        variances, new_var = batch.recurrence(decay * STREAM_ALPHA * diff * diff, self.var[rows])
+        std = np.sqrt(batch.previous(variances, self.var[rows]))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ordered_z = np.where((count[batch.segments] + batch.positions >= MIN_STREAM_SAMPLES) & (std > 0),
+                                 diff / std, 0.0)
+
+        self.count[rows] = count + batch.sizes
+        self.mean[rows] = new_mean
+        self.var[rows] = new_var
+        zscores = np.empty(n, dtype=np.float64)
+        zscores[batch.order] = ordered_z
+        return zscores
+
+
+class _Segments:
+    """A batch of readings grouped by sensor, for per-sensor recurrences
+
+    Readings are sorted stably by sensor into contiguous segments; each
+    segment is cut into blocks short enough that ``decay ** -block`` stays
+    small, so a recurrence is a scaled prefix sum within each block and
+    only the carry between blocks is stepped in Python, once per block of
+    the longest segment (once per batch in the usual case).
+    """
+
+    def __init__(self, codes, size, decay):
+        n = len(codes)
+        counts = np.bincount(codes, minlength=size)
+        self.rows = np.flatnonzero(counts)
+        self.sizes = counts[self.rows]
+        # Renumber the sensors present 0..k-1; up to 65536 of them that
+        # allows numpy's radix sort, far faster than sorting wide integers
+        local = np.zeros(size, dtype=np.uint16 if len(self.rows) <= 65536 else np.intp)
+        local[self.rows] = np.arange(len(self.rows))
+        self.order = np.argsort(local[codes], kind='stable')
+        self.starts = np.concatenate(([0], np.cumsum(self.sizes)[:-1]))
+        self.segments = np.repeat(np.arange(len(self.rows)), self.sizes)
+        self.positions = np.arange(n) - self.starts[self.segments]
+
+        self.decay = decay
+        self.block = block = max(1, int(np.log(1e3) / -np.log(decay)))
+        self.offsets = self.positions % block
+        powers = decay ** np.arange(block + 1, dtype=np.float64)
+        self.shrink = powers[self.offsets]
+        self.grow = 1 / self.shrink
+        self.carry_decay = powers[self.offsets + 1]
+        self.firsts = np.arange(n) - self.offsets
+        self.blocks = -(-self.sizes // block)
+        self.block_base = np.concatenate(([0], np.cumsum(self.blocks)[:-1]))
+        self.block_of = self.block_base[self.segments] + self.positions // block
+
+    def recurrence(self, inputs, initial):
+        """``level = decay * level + input`` along each segment from ``initial``
+
+        Returns the level after every reading and each segment's final level.
+        """
+        scaled = inputs * self.grow
+        sums = np.cumsum(scaled)
+        local = (sums - (sums - scaled)[self.firsts]) * self.shrink
+
+        carries = np.empty(int(self.blocks.sum()))
+        level = np.array(initial, dtype=np.float64)
+        for rank in range(int(self.blocks.max())):
+            active = np.flatnonzero(self.blocks > rank) if rank else slice(None)
+            carries[self.block_base[active] + rank] = level[active]
+            first = self.starts[active] + rank * self.block
+            last = np.minimum(first + self.block, self.starts[active] + self.sizes[active]) - 1
+            level[active] = self.decay ** (last - first + 1) * level[active] + local[last]
+
+        return self.carry_decay * carries[self.block_of] + local, level
+
+    def previous(self, levels, initial):
+        """Each reading's level before it: the one before in its segment, or ``initial``"""
+        previous = np.empty_like(levels)
+        previous[1:] = levels[:-1]
+        previous[self.starts] = initial
+        return previous
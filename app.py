@@ -5,36 +5,58 @@ from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
 
-# Set up logging
-logging.basicConfig(level=logging.DEBUG)
-
 class Base(DeclarativeBase):
     pass
 
 db = SQLAlchemy(model_class=Base)
 
-# Create the app
-app = Flask(__name__)
-app.secret_key = os.environ.get("SESSION_SECRET", "coastal-hazards-monitoring-secret-key")
-app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
-
-# Configure the database
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///coastal_hazards.db")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
+# Settings per APP_ENV; LOG_LEVEL and DB_AUTO_CREATE override them.
+# Production creates the schema once before workers start (gunicorn.conf.py
+# or `flask --app main init-db`) rather than on every app load
+PROFILES = {
+    'development': {'log_level': 'DEBUG', 'auto_create': True},
+    'production': {'log_level': 'INFO', 'auto_create': False},
 }
 
-# Initialize the app with the extension
-db.init_app(app)
+def create_app(profile=None):
+    """Build the Flask app; background services are started separately"""
+    profile = profile or os.environ.get("APP_ENV", "development")
+    settings = PROFILES[profile]
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", settings['log_level']))
+
+    app = Flask(__name__)
+    app.secret_key = os.environ.get("SESSION_SECRET", "coastal-hazards-monitoring-secret-key")
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+    app.config["APP_ENV"] = profile
+
+    # Configure the database
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///coastal_hazards.db")
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        "pool_recycle": 300,
+        "pool_pre_ping": True,
+    }
+
+    # Initialize the app with the extension
+    db.init_app(app)
 
-with app.app_context():
-    # Import models and routes
-    import models
     import routes
-    
-    # Create all tables
-    db.create_all()
+    routes.init_app(app)
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create missing tables, columns and indexes"""
+        init_db()
+        print("Database ready")
+
+    if os.environ.get("DB_AUTO_CREATE", "1" if settings['auto_create'] else "0") == "1":
+        with app.app_context():
+            init_db()
+    return app
 
-if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+def init_db():
+    """Create tables, add columns and indexes declared since they were created, register known sensors"""
+    import models
+    db.create_all()
+    models.ensure_columns()
+    models.ensure_indexes()
+    models.ensure_sensors()
@@ -0,0 +1,273 @@
+import asyncio
+import logging
+import os
+import re
+from datetime import datetime, timedelta
+from urllib.parse import parse_qsl
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+from models import AnomalyDetection, HazardAlert, Sensor, SensorData
+from pagination import InvalidQuery, apply_filters, is_paginated, keyset_query, latest_id, split_page
+from payloads import CHART_TYPES, READING_FIELDS, chart_payload, chart_window, serialize_alert
+from rollups import reduce_series, series_query, series_start_query
+from serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+ASYNC_DRIVERS = {'postgresql': 'postgresql+asyncpg', 'sqlite': 'sqlite+aiosqlite'}
+# Where Flask-SQLAlchemy resolves relative SQLite paths
+INSTANCE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance')
+
+
+def async_database_url(url):
+    """The app's database URL with its async driver: asyncpg or aiosqlite"""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise NotImplementedError(f"The async read API is not supported on {backend}")
+    if backend == 'sqlite' and url.database and url.database != ':memory:' and not os.path.isabs(url.database):
+        url = url.set(database=os.path.join(INSTANCE_PATH, url.database))
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+class ResponseCoalescer:
+    """One in-flight computation per key, its result reused for ``ttl`` seconds
+
+    With many dashboards polling the same few URLs, concurrent identical
+    requests wait on a single set of queries, and each URL is computed at
+    most once per ``ttl``. Failures are not kept.
+    """
+
+    def __init__(self, ttl=2.0):
+        self.ttl = ttl
+        self._tasks = {}
+
+    def __len__(self):
+        return len(self._tasks)
+
+    async def get(self, key, compute):
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(compute())
+            task.add_done_callback(lambda done: self._expire(key, done))
+        # A client that disconnects must not cancel the others' result
+        return await asyncio.shield(task)
+
+    def _expire(self, key, task):
+        if task.cancelled() or task.exception() is not None or not self.ttl:
+            self._forget(key, task)
+        else:
+            asyncio.get_running_loop().call_later(self.ttl, self._forget, key, task)
+
+    def _forget(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+
+
+class AsyncReadAPI:
+    """The dashboard's read endpoints as an ASGI app over an async engine
+
+    Serves the same bodies as the Flask routes for /api/dashboard-stats,
+    /api/chart-data/<type>, /api/sensor-data, /api/anomaly-detection and
+    /api/hazard-alerts, plus /api/dashboard (stats and every chart in one
+    response), built from the same models and query builders. A request
+    waiting on the database holds a pooled connection but no thread, so one
+    worker keeps thousands of clients open; independent queries of one
+    response run concurrently on separate connections, and identical
+    requests share one response for ``cache_ttl`` seconds.
+
+    Everything is read from the database: the open alerts and latest
+    readings kept in memory by the process running ingest, writes and
+    ``stream=1`` stay with the Flask app.
+    """
+
+    def __init__(self, engine, cache_ttl=2.0):
+        self.engine = engine
+        self.responses = ResponseCoalescer(cache_ttl)
+        self.routes = [
+            (re.compile(r'/api/dashboard'), self.dashboard),
+            (re.compile(r'/api/dashboard-stats'), self.dashboard_stats),
+            (re.compile(r'/api/chart-data/(?P<chart_type>[^/]+)'), self.chart_data),
+            (re.compile(r'/api/sensor-data'), self.sensor_data),
+            (re.compile(r'/api/anomaly-detection'), self.anomaly_detection),
+            (re.compile(r'/api/hazard-alerts'), self.hazard_alerts),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] != 'http':
+            return
+        status, body = await self._respond(scope)
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _respond(self, scope):
+        if scope['method'] != 'GET':
+            return 405, dumps({'error': 'Method not allowed'})
+        for pattern, handler in self.routes:
+            match = pattern.fullmatch(scope['path'])
+            if match is not None:
+                break
+        else:
+            return 404, dumps({'error': 'Not found'})
+
+        # First value of each parameter, as Flask's request.args.get returns
+        args = {}
+        for name, value in parse_qsl(scope['query_string'].decode('latin-1')):
+            args.setdefault(name, value)
+        try:
+            return await self.responses.get(
+                (scope['path'], scope['query_string']), lambda: self._render(handler, args, match.groupdict())
+            )
+        except ValueError as e:
+            # InvalidQuery, or a malformed number
+            return 400, dumps({'error': str(e)})
+        except PoolTimeout:
+            return 503, dumps({'error': 'Database busy'})
+        except Exception:
+            logger.exception("Async read of %s failed", scope['path'])
+            return 500, dumps({'error': 'Internal server error'})
+
+    async def _render(self, handler, args, params):
+        return 200, dumps(await handler(args, **params))
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _all(self, query):
+        async with self.engine.connect() as connection:
+            return (await connection.execute(query)).all()
+
+    async def _scalar(self, query):
+        async with self.engine.connect() as connection:
+            return await connection.scalar(query)
+
+    async def _rows(self, query, args):
+        """List of objects, or one array per field with ``layout=columns``"""
+        layout = args.get('layout', 'rows')
+        if layout not in ('rows', 'columns'):
+            raise InvalidQuery("layout must be rows or columns")
+        if args.get('stream') == '1':
+            raise InvalidQuery("stream=1 is not supported by the async API")
+        async with self.engine.connect() as connection:
+            result = await connection.execute(query)
+            fields = list(result.keys())
+            rows = result.all()
+        if layout == 'columns':
+            return dict(zip(fields, list(zip(*rows)) or [()] * len(fields)))
+        return [dict(zip(fields, row)) for row in rows]
+
+    async def _page(self, query, model, args, serialize):
+        query, limit = keyset_query(query, model, args)
+        rows, next_cursor = split_page(await self._all(query), limit)
+        return {
+            'items': [serialize(row) for row in rows],
+            'next_cursor': next_cursor,
+            'latest_id': latest_id(rows, args),
+        }
+
+    async def dashboard_stats(self, args):
+        total_sensors, active_alerts, recent_anomalies = await asyncio.gather(
+            self._scalar(select(func.count()).select_from(Sensor)),
+            self._scalar(select(func.count()).select_from(HazardAlert).where(HazardAlert.is_active == True)),
+            self._scalar(select(func.count()).select_from(AnomalyDetection).where(
+                AnomalyDetection.is_anomaly == True,
+                AnomalyDetection.timestamp >= datetime.utcnow() - timedelta(hours=1)
+            )),
+        )
+        return {
+            'total_sensors': total_sensors,
+            'active_alerts': active_alerts,
+            'recent_anomalies': recent_anomalies,
+            'system_status': 'operational'
+        }
+
+    async def chart_data(self, args, chart_type):
+        chart = CHART_TYPES.get(chart_type)
+        if chart is None:
+            return {'error': 'Invalid chart type'}
+        hours, points = chart_window(args)
+        end = datetime.utcnow()
+        start = end - timedelta(hours=hours)
+        first = await self._scalar(series_start_query(chart['sensor_type'], start))
+        resolution, query = series_query(chart['sensor_type'], start, end, points, first, args.get('sensor_id'))
+        rows = await self._all(query)
+        # LTTB over raw readings can take a while; keep the loop serving
+        series = await asyncio.to_thread(reduce_series, rows, points)
+        return chart_payload(chart, hours, resolution, series)
+
+    async def dashboard(self, args):
+        stats, *charts = await asyncio.gather(
+            self.dashboard_stats(args), *(self.chart_data(args, chart_type) for chart_type in CHART_TYPES)
+        )
+        return {'stats': stats, 'charts': dict(zip(CHART_TYPES, charts))}
+
+    async def sensor_data(self, args):
+        query = apply_filters(select(*READING_FIELDS).where(
+            SensorData.timestamp >= datetime.utcnow() - timedelta(hours=1)
+        ), SensorData, args)
+        if is_paginated(args):
+            return await self._page(query, SensorData, args, lambda row: row._asdict())
+        return await self._rows(query.order_by(SensorData.timestamp.desc()), args)
+
+    async def anomaly_detection(self, args):
+        query = apply_filters(select(
+            SensorData.sensor_id,
+            SensorData.sensor_type,
+            SensorData.value,
+            SensorData.timestamp,
+            AnomalyDetection.anomaly_score,
+            AnomalyDetection.is_anomaly
+        ).join(
+            AnomalyDetection, AnomalyDetection.sensor_data_id == SensorData.id
+        ).where(
+            SensorData.timestamp >= datetime.utcnow() - timedelta(hours=1)
+        ), SensorData, args)
+        return await self._rows(query.order_by(SensorData.timestamp.desc()), args)
+
+    async def hazard_alerts(self, args):
+        query = apply_filters(
+            select(HazardAlert.__table__).where(HazardAlert.is_active == True), HazardAlert, args
+        )
+        if is_paginated(args):
+            return await self._page(query, HazardAlert, args, serialize_alert)
+        return [serialize_alert(row) for row in await self._all(
+            query.order_by(HazardAlert.timestamp.desc(), HazardAlert.id.desc())
+        )]
+
+
+def create_app(database_url=None):
+    """ASGI app for ``uvicorn --factory async_api:create_app``
+
+    Needs SQLAlchemy's asyncio extra (greenlet) and asyncpg or aiosqlite.
+    Pool settings come from the environment; the pool bounds how many
+    queries run at once, and requests that wait longer than the pool
+    timeout for a connection get 503.
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"))
+    engine = create_async_engine(
+        async_database_url(database_url or os.environ.get("DATABASE_URL", "sqlite:///coastal_hazards.db")),
+        pool_size=int(os.environ.get("ASYNC_DB_POOL_SIZE", "20")),
+        max_overflow=int(os.environ.get("ASYNC_DB_MAX_OVERFLOW", "10")),
+        pool_timeout=float(os.environ.get("ASYNC_DB_POOL_TIMEOUT", "10")),
+        pool_recycle=300,
+        pool_pre_ping=True,
+    )
+    return AsyncReadAPI(engine, cache_ttl=float(os.environ.get("ASYNC_CACHE_TTL", "2")))
@@ -0,0 +1,211 @@
+"""API latency and throughput under concurrent load
+
+Seeds a scratch database with ``--hours`` of history for ``--sensors``
+simulated sensors (seeded DataSimulator, written through the ingest
+pipeline so anomaly results, rollups and alerts exist as in production),
+serves the app from a threaded server in this process and drives each
+read endpoint with ``--concurrency`` clients.
+
+    python benchmarks/api_latency.py --sensors 500 --hours 6 --concurrency 1 8 32
+
+    # Against a local PostgreSQL scratch database (its tables are dropped)
+    python benchmarks/api_latency.py --database-url postgresql://localhost/coastal_bench
+
+    # The async read API (async_api.py) under uvicorn instead of Flask
+    python benchmarks/api_latency.py --server async --concurrency 8 64 256
+
+Results are printed as JSON: p50/p95/p99 latency and requests/s per
+endpoint and concurrency level. The response cache is off unless
+``--cache`` is given, so the handlers themselves are measured.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ENDPOINTS = (
+    '/api/sensor-data',
+    '/api/sensor-data?limit=100',
+    '/api/hazard-alerts',
+    '/api/anomaly-detection',
+    '/api/dashboard-stats',
+    '/api/chart-data/tide_levels',
+    '/api/chart-data/water_quality',
+    '/api/chart-data/weather',
+)
+
+
+def percentile(samples, q):
+    return round(float(np.percentile(samples, q)), 3) if samples else None
+
+
+def seed(pipeline, sensors, hours, step, seed_value):
+    """Write ``hours`` of readings ending now through the ingest pipeline"""
+    from data_simulator import DataSimulator
+
+    simulator = DataSimulator(seed=seed_value)
+    fleet = simulator.generate_fleet(sensors)
+    end = datetime.utcnow()
+    written = 0
+    for timestamp, batch in simulator.replay(fleet, end - timedelta(hours=hours), end, step):
+        columns = {name: batch[name].tolist() for name in ('sensor_id', 'sensor_type', 'latitude', 'longitude', 'value', 'unit')}
+        rows = [dict(zip(columns, values), timestamp=timestamp) for values in zip(*columns.values())]
+        if not pipeline.write(rows):
+            raise RuntimeError("Seeding failed; see the log")
+        written += len(rows)
+    return written
+
+
+def fetch(url):
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=120) as response:
+            size = len(response.read())
+            ok = response.status == 200
+    except urllib.error.URLError:
+        size, ok = 0, False
+    return (time.perf_counter() - started) * 1000, size, ok
+
+
+def load(url, requests, concurrency, warmup):
+    """Issue ``requests`` GETs from ``concurrency`` threads; return latency stats"""
+    for _ in range(warmup):
+        fetch(url)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(lambda _: fetch(url), range(requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = [ms for ms, _, ok in results if ok]
+    return {
+        'requests': requests,
+        'errors': sum(1 for _, _, ok in results if not ok),
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'mean_ms': round(statistics.fmean(latencies), 3) if latencies else None,
+        'max_ms': round(max(latencies), 3) if latencies else None,
+        'requests_per_second': round(requests / elapsed, 1),
+        'response_bytes': results[-1][1],
+    }
+
+
+def serve_async(database_url):
+    """Serve async_api from uvicorn in a thread; returns (base URL, shutdown)"""
+    import socket
+    import uvicorn
+    import async_api
+
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(
+        async_api.create_app(database_url), host='127.0.0.1', port=port, log_level='warning'
+    ))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    def shutdown():
+        server.should_exit = True
+        thread.join()
+    return f"http://127.0.0.1:{port}", shutdown
+
+
+def run(args):
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        workdir = tempfile.mkdtemp(prefix='coastal-bench-')
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    # A zero TTL makes every lookup miss, so the handlers run on each request
+    os.environ.setdefault('CACHE_TTL', '30' if args.cache else '0')
+    # The async API still shares in-flight identical requests at zero TTL
+    os.environ.setdefault('ASYNC_CACHE_TTL', '2' if args.cache else '0')
+    os.environ['LOG_LEVEL'] = 'WARNING'
+
+    from werkzeug.serving import make_server
+    from app import create_app, db, init_db
+    import routes
+
+    app = create_app('production')
+    with app.app_context():
+        db.drop_all()
+        init_db()
+        dialect = db.engine.dialect.name
+
+    started = time.perf_counter()
+    rows = seed(routes.ingest_pipeline, args.sensors, args.hours, args.step, args.seed)
+    report = {
+        'database': dialect,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'sensors': args.sensors,
+        'hours': args.hours,
+        'step_seconds': args.step,
+        'seed': args.seed,
+        'rows': rows,
+        'seed_seconds': round(time.perf_counter() - started, 1),
+        'cache': args.cache,
+        'endpoints': {},
+    }
+
+    if args.server == 'async':
+        base, shutdown = serve_async(os.environ['DATABASE_URL'])
+    else:
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base, shutdown = f"http://127.0.0.1:{server.server_port}", server.shutdown
+    report['server'] = args.server
+    try:
+        for endpoint in ENDPOINTS:
+            report['endpoints'][endpoint] = {
+                str(concurrency): load(base + endpoint, args.requests, concurrency, args.warmup)
+                for concurrency in args.concurrency
+            }
+    finally:
+        shutdown()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sensors', type=int, default=200)
+    parser.add_argument('--hours', type=float, default=3)
+    parser.add_argument('--step', type=float, default=60, help='seconds between readings of one sensor')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8])
+    parser.add_argument('--requests', type=int, default=100, help='requests per endpoint and concurrency level')
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--cache', action='store_true', help='leave the response cache on')
+    parser.add_argument('--server', choices=('flask', 'async'), default='flask',
+                        help='serve the Flask app or the async read API (needs uvicorn and an async driver)')
+    parser.add_argument('--database-url', help='scratch database to use instead of a temporary SQLite file')
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    args = parser.parse_args()
+
+    report = json.dumps(run(args), indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report + '\n')
+    print(report)
+
+
+if __name__ == '__main__':
+    main()
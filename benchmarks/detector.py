@@ -0,0 +1,119 @@
+"""AnomalyDetector microbenchmarks
+
+Times the detection entry points on seeded synthetic readings, with the
+threshold rules only and with fitted isolation forest models:
+``detect_anomaly`` (one reading per call), ``detect_batch`` and
+``detect_stream`` (whole batches), plus ``fit_models``.
+
+    python benchmarks/detector.py --sizes 1000 100000 1000000 --repeat 5
+
+Results are printed as JSON: median and best time per call and readings/s.
+No database is involved.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from anomaly_detector import AnomalyDetector
+
+SENSOR_TYPES = np.array(['tide_gauge', 'weather_station', 'water_quality'])
+CENTRES = np.array([1.2, 15.0, 75.0])
+SPREADS = np.array([0.4, 8.0, 10.0])
+
+
+def readings(n, sensors, rng):
+    codes = rng.integers(0, 3, n)
+    sensor_ids = np.char.add(SENSOR_TYPES[codes], (rng.integers(0, sensors, n)).astype(str))
+    values = rng.normal(CENTRES[codes], SPREADS[codes])
+    return sensor_ids, values, SENSOR_TYPES[codes]
+
+
+def timed(call, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def summarize(samples, n):
+    median = statistics.median(samples)
+    return {
+        'readings': n,
+        'median_ms': round(median * 1000, 3),
+        'best_ms': round(min(samples) * 1000, 3),
+        'readings_per_second': round(n / median, 1) if median else None,
+    }
+
+
+def bench(detector, sizes, sensors, repeat, rng, single_calls):
+    results = {}
+    for n in sizes:
+        sensor_ids, values, sensor_types = readings(n, sensors, rng)
+        results[str(n)] = {
+            'detect_batch': summarize(timed(lambda: detector.detect_batch(values, sensor_types), repeat), n),
+            # Fresh rolling state each run so every run does the same work
+            'detect_stream': summarize(timed(lambda: (detector.streams.clear(),
+                                                      detector.detect_stream(sensor_ids, values, sensor_types)),
+                                             repeat), n),
+        }
+        # The per-reading path is far slower; cap it so large sizes finish
+        single = min(n, single_calls)
+        value_list, type_list = values[:single].tolist(), sensor_types[:single].tolist()
+        results[str(n)]['detect_anomaly'] = summarize(timed(
+            lambda: [detector.detect_anomaly(v, t) for v, t in zip(value_list, type_list)], repeat), single)
+    return results
+
+
+def run(args):
+    rng = np.random.default_rng(args.seed)
+    detector = AnomalyDetector()
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'seed': args.seed,
+        'sensors': args.sensors,
+        'repeat': args.repeat,
+        'thresholds': bench(detector, args.sizes, args.sensors, args.repeat, rng, args.single_calls),
+    }
+
+    _, values, sensor_types = readings(args.train_size, args.sensors, rng)
+    history = {t: values[sensor_types == t].tolist() for t in SENSOR_TYPES.tolist()}
+    samples = timed(lambda: detector.fit_models(history), max(1, args.repeat // 2))
+    report['fit_models'] = summarize(samples, args.train_size)
+
+    detector.install_models(detector.fit_models(history))
+    report['isolation_forest'] = bench(detector, args.sizes, args.sensors, args.repeat, rng, args.single_calls)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000])
+    parser.add_argument('--sensors', type=int, default=1000, help='distinct sensor ids in the stream')
+    parser.add_argument('--train-size', type=int, default=30000, help='history readings for fit_models')
+    parser.add_argument('--single-calls', type=int, default=200, help='detect_anomaly calls per run')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    args = parser.parse_args()
+
+    report = json.dumps(run(args), indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report + '\n')
+    print(report)
+
+
+if __name__ == '__main__':
+    main()
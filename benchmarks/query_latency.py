@@ -0,0 +1,173 @@
+"""Query latency before/after indexes and retention pruning
+
+Seeds a throwaway SQLite database with N synthetic rows spread over the
+last ``--days`` days and times the queries the dashboard routes issue:
+with no indexes, with the composite indexes from models.py, and after
+pruning to the hot window.
+
+    python benchmarks/query_latency.py --rows 1000000 10000000 50000000
+
+Results are printed as JSON. Large sizes take a while to seed and need
+several GB of disk; the default is a quick smoke run.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed(db, models, rows, days, now, batch=200000):
+    rng = np.random.default_rng(42)
+    sensor_types = np.array(['tide_gauge', 'weather_station', 'water_quality'])
+    start = now - timedelta(days=days)
+    span = days * 86400
+
+    # Readings reference the sensor registry, so register the sensors first
+    db.session.execute(models.Sensor.__table__.insert(), [{
+        'sensor_id': f"S{i:04d}",
+        'sensor_type': sensor_types[i % 3],
+        'latitude': -33.8,
+        'longitude': 151.2,
+        'created_at': now,
+        'updated_at': now,
+    } for i in range(500)])
+
+    for offset in range(0, rows, batch):
+        n = min(batch, rows - offset)
+        seconds = np.sort(rng.uniform(0, span, n))
+        sensors = rng.integers(0, 500, n)
+        types = sensor_types[sensors % 3]
+        values = rng.normal(20, 10, n)
+        timestamps = [start + timedelta(seconds=float(s)) for s in seconds]
+
+        db.session.execute(models.SensorData.__table__.insert(), [{
+            'sensor_id': f"S{sensors[i]:04d}",
+            'sensor_type': types[i],
+            'latitude': -33.8,
+            'longitude': 151.2,
+            'value': float(values[i]),
+            'unit': 'm',
+            'timestamp': timestamps[i],
+        } for i in range(n)])
+        db.session.execute(models.AnomalyDetection.__table__.insert(), [{
+            'sensor_data_id': i + 1,
+            'sensor_id': f"S{sensors[i]:04d}",
+            'anomaly_score': 0.1,
+            'is_anomaly': bool(values[i] > 40),
+            'timestamp': timestamps[i],
+        } for i in range(n)])
+        db.session.execute(models.HazardAlert.__table__.insert(), [{
+            'hazard_type': 'storm',
+            'severity': 'high',
+            'latitude': -33.8,
+            'longitude': 151.2,
+            'description': 'benchmark',
+            'timestamp': timestamps[i],
+            'is_active': bool(i % 3 == 0),
+        } for i in range(0, n, 10)])
+        db.session.commit()
+
+
+def queries(models, now):
+    SensorData, HazardAlert, AnomalyDetection = models.SensorData, models.HazardAlert, models.AnomalyDetection
+    return {
+        'sensor_data_last_hour': lambda: SensorData.query.filter(
+            SensorData.timestamp >= now - timedelta(hours=1)
+        ).order_by(SensorData.timestamp.desc()).all(),
+        'chart_tide_24h': lambda: SensorData.query.filter(
+            SensorData.sensor_type == 'tide_gauge',
+            SensorData.timestamp >= now - timedelta(hours=24)
+        ).order_by(SensorData.timestamp).all(),
+        'active_alerts_count': lambda: HazardAlert.query.filter(
+            HazardAlert.is_active == True,
+            HazardAlert.timestamp >= now - timedelta(hours=24)
+        ).count(),
+        'anomaly_join_last_hour': lambda: models.db.session.query(
+            SensorData.sensor_id, SensorData.value, AnomalyDetection.anomaly_score, AnomalyDetection.is_anomaly
+        ).join(AnomalyDetection, AnomalyDetection.sensor_data_id == SensorData.id).filter(
+            SensorData.timestamp >= now - timedelta(hours=1)
+        ).all(),
+        'recent_anomalies_count': lambda: AnomalyDetection.query.filter(
+            AnomalyDetection.is_anomaly == True,
+            AnomalyDetection.timestamp >= now - timedelta(hours=1)
+        ).count(),
+    }
+
+
+def time_queries(db, models, now, repeat):
+    results = {}
+    for name, query in queries(models, now).items():
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            query()
+            samples.append((time.perf_counter() - started) * 1000)
+            db.session.expunge_all()
+        results[name] = {'median_ms': round(statistics.median(samples), 3), 'max_ms': round(max(samples), 3)}
+    return results
+
+
+def run(rows, days, repeat):
+    workdir = tempfile.mkdtemp(prefix='coastal-bench-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    from app import create_app, db
+    import models
+    from retention import RetentionManager
+
+    app = create_app('production')
+
+    now = datetime.utcnow()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.drop(db.engine, checkfirst=True)
+
+        started = time.perf_counter()
+        seed(db, models, rows, days, now)
+        report = {'rows': rows, 'days': days, 'seed_seconds': round(time.perf_counter() - started, 1)}
+
+        report['no_indexes'] = time_queries(db, models, now, repeat)
+        models.ensure_indexes()
+        db.session.execute(db.text('ANALYZE'))
+        report['indexed'] = time_queries(db, models, now, repeat)
+        report['pruned'] = RetentionManager(app).prune(now)
+        report['indexed_and_pruned'] = time_queries(db, models, now, repeat)
+        db.session.remove()
+        db.engine.dispose()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000])
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    # Each size runs in a fresh interpreter so the app binds to a new database
+    if len(args.rows) > 1:
+        import subprocess
+        reports = []
+        for rows in args.rows:
+            output = subprocess.check_output([sys.executable, __file__, '--rows', str(rows),
+                                              '--days', str(args.days), '--repeat', str(args.repeat)])
+            reports.extend(json.loads(output))
+        print(json.dumps(reports, indent=2))
+        return
+
+    print(json.dumps([run(args.rows[0], args.days, args.repeat)], indent=2))
+
+
+if __name__ == '__main__':
+    main()
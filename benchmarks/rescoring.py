@@ -0,0 +1,135 @@
+"""Parallel rescoring throughput by worker count
+
+Seeds a throwaway SQLite database (or ``--database-url``) with ``--rows``
+readings over ``--days`` days and rescores the whole range with
+:class:`rescoring.Rescorer` once per ``--workers`` value, optionally with
+isolation forest models fitted on the seeded data (``--models``):
+
+    python benchmarks/rescoring.py --rows 500000 --workers 1 2 4 8 --models
+
+Results are printed as JSON: readings/s per worker count and the speedup
+over the first count. Every run rescores from scratch (checkpoints are
+discarded) and must write the same results.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import create_engine, func, insert, select
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from anomaly_detector import AnomalyDetector
+from app import db
+from model_registry import ModelRegistry
+from models import AnomalyDetection, Sensor, SensorData
+from rescoring import Rescorer
+
+SENSOR_TYPES = np.array(['tide_gauge', 'weather_station', 'water_quality'])
+CENTRES = np.array([1.2, 15.0, 75.0])
+SPREADS = np.array([0.4, 8.0, 10.0])
+
+
+def seed(engine, rows, sensors, start, days, batch=100000):
+    rng = np.random.default_rng(42)
+    with engine.begin() as connection:
+        # Readings reference the sensor registry, so register the fleet first
+        connection.execute(insert(Sensor.__table__), [{
+            'sensor_id': f"S{s:05d}",
+            'sensor_type': SENSOR_TYPES[s % 3],
+            'latitude': 0.0,
+            'longitude': 0.0,
+            'created_at': start,
+            'updated_at': start,
+        } for s in range(sensors)])
+        for offset in range(0, rows, batch):
+            n = min(batch, rows - offset)
+            sensor = rng.integers(0, sensors, n)
+            codes = sensor % 3
+            values = rng.normal(CENTRES[codes], SPREADS[codes])
+            seconds = rng.uniform(0, days * 86400, n)
+            connection.execute(insert(SensorData.__table__), [{
+                'sensor_id': f"S{s:05d}",
+                'sensor_type': SENSOR_TYPES[c],
+                'latitude': 0.0,
+                'longitude': 0.0,
+                'value': float(v),
+                'unit': '',
+                'timestamp': start + timedelta(seconds=float(t)),
+            } for s, c, v, t in zip(sensor.tolist(), codes.tolist(), values.tolist(), seconds.tolist())])
+
+
+def fit(engine, registry_root):
+    with engine.connect() as connection:
+        rows = connection.execute(select(SensorData.sensor_type, SensorData.value).limit(50000)).all()
+    history = {}
+    for sensor_type, value in rows:
+        history.setdefault(sensor_type, []).append(value)
+    models = AnomalyDetector().fit_models(history)
+    return ModelRegistry(registry_root).save(models, {
+        'benchmark': True, 'thresholds': {sensor_type: model[2] for sensor_type, model in models.items()},
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--sensors', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--partitions', type=int, default=None, help='default: 2 per worker of the largest count')
+    parser.add_argument('--step-hours', type=float, default=24.0)
+    parser.add_argument('--models', action='store_true', help='score with fitted isolation forests too')
+    parser.add_argument('--database-url', help='existing empty database instead of a scratch SQLite file')
+    parser.add_argument('--output', help='also write the JSON report here')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='coastal-bench-')
+    database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    engine = create_engine(database_url)
+    db.metadata.create_all(engine)
+    start = datetime(2024, 1, 1)
+    end = start + timedelta(days=args.days)
+    seed(engine, args.rows, args.sensors, start, args.days)
+    model_version = fit(engine, os.path.join(workdir, 'models')) if args.models else None
+
+    report = {
+        'rows': args.rows,
+        'sensors': args.sensors,
+        'dialect': engine.dialect.name,
+        'models': model_version is not None,
+        'cpus': os.cpu_count(),
+        'python': platform.python_version(),
+        'runs': [],
+    }
+    partitions = args.partitions or 2 * max(args.workers)
+    expected = None
+    for workers in args.workers:
+        rescorer = Rescorer(database_url, os.path.join(workdir, 'checkpoints'),
+                            registry_root=os.path.join(workdir, 'models'), model_version=model_version,
+                            workers=workers, partitions=partitions, step_hours=args.step_hours)
+        result = rescorer.run(start, end, restart=True)
+        with engine.connect() as connection:
+            written = connection.execute(select(func.count(), func.sum(AnomalyDetection.anomaly_score))).one()
+        if expected is None:
+            expected = written
+        result['consistent'] = tuple(written) == tuple(expected)
+        result['speedup'] = round(result['readings_per_second'] / report['runs'][0]['readings_per_second'], 2) \
+            if report['runs'] else 1.0
+        report['runs'].append(result)
+    engine.dispose()
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""Read path serialization: ORM objects vs column rows, orjson, columnar, streaming
+
+Seeds a throwaway SQLite database with ``--rows`` readings and times
+building the /api/sensor-data body for all of them:
+
+- ``orm_stdlib``: hydrated SensorData objects, a dict per row with
+  ``isoformat()``, standard library JSON with sorted keys (the old path)
+- ``columns_stdlib`` / ``columns_orjson``: plain column rows, timestamps
+  left to the encoder
+- ``columnar_orjson``: one array per field
+- ``stream_orjson``: rows read and encoded in chunks as ``stream=1`` does
+
+    python benchmarks/serialization.py --rows 10000 100000 500000
+
+Results are printed as JSON: median time and peak traced memory per
+variant (memory is measured in a separate, slower pass).
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed(db, Sensor, SensorData, rows, now, batch=100000):
+    rng = np.random.default_rng(42)
+    # Readings reference the sensor registry, so register the sensors first
+    db.session.execute(Sensor.__table__.insert(), [{
+        'sensor_id': f"S{i:04d}",
+        'sensor_type': 'tide_gauge',
+        'latitude': -33.8,
+        'longitude': 151.2,
+        'created_at': now,
+        'updated_at': now,
+    } for i in range(min(rows, 500))])
+    for offset in range(0, rows, batch):
+        n = min(batch, rows - offset)
+        seconds = rng.uniform(0, 3000, n)
+        db.session.execute(SensorData.__table__.insert(), [{
+            'sensor_id': f"S{i % 500:04d}",
+            'sensor_type': 'tide_gauge',
+            'latitude': -33.8,
+            'longitude': 151.2,
+            'value': float(round(value, 2)),
+            'unit': 'm',
+            'timestamp': now - timedelta(seconds=float(s)),
+        } for i, (value, s) in enumerate(zip(rng.normal(1.2, 0.4, n), seconds))])
+    db.session.commit()
+
+
+def variants(db, routes, serialization, SensorData, since):
+    fields = [column.key for column in routes.READING_FIELDS]
+
+    def column_query():
+        return db.session.query(*routes.READING_FIELDS).filter(
+            SensorData.timestamp >= since).order_by(SensorData.timestamp.desc())
+
+    def orm_stdlib():
+        rows = SensorData.query.filter(SensorData.timestamp >= since).order_by(SensorData.timestamp.desc()).all()
+        body = [{
+            'id': data.id,
+            'sensor_id': data.sensor_id,
+            'sensor_type': data.sensor_type,
+            'latitude': data.latitude,
+            'longitude': data.longitude,
+            'value': data.value,
+            'unit': data.unit,
+            'timestamp': data.timestamp.isoformat()
+        } for data in rows]
+        return json.dumps(body, sort_keys=True, separators=(',', ':')).encode()
+
+    def columns(encoder):
+        def run():
+            rows = column_query().all()
+            return encoder([dict(zip(fields, row)) for row in rows])
+        return run
+
+    def stdlib(obj):
+        return json.dumps(obj, default=serialization.default, separators=(',', ':')).encode()
+
+    def columnar_orjson():
+        rows = column_query().all()
+        return serialization.dumps(dict(zip(fields, zip(*rows))))
+
+    def stream_orjson():
+        result = db.session.execute(column_query().statement.execution_options(yield_per=routes.STREAM_CHUNK_ROWS))
+        chunks = ([dict(zip(fields, row)) for row in partition] for partition in result.partitions())
+        # Count the bytes as they would be sent rather than holding the body
+        return sum(len(part) for part in serialization.stream_array(chunks))
+
+    return {
+        'orm_stdlib': orm_stdlib,
+        'columns_stdlib': columns(stdlib),
+        'columns_orjson': columns(serialization.dumps),
+        'columnar_orjson': columnar_orjson,
+        'stream_orjson': stream_orjson,
+    }
+
+
+def run(rows, repeat):
+    workdir = tempfile.mkdtemp(prefix='coastal-bench-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ['LOG_LEVEL'] = 'WARNING'
+
+    from app import create_app, db, init_db
+    from models import Sensor, SensorData
+    import routes
+    import serialization
+
+    app = create_app('production')
+    now = datetime.utcnow()
+    report = {'rows': rows, 'orjson': serialization.orjson is not None}
+    with app.app_context():
+        init_db()
+        seed(db, Sensor, SensorData, rows, now)
+
+        for name, build in variants(db, routes, serialization, SensorData, now - timedelta(hours=1)).items():
+            samples = []
+            for _ in range(repeat):
+                db.session.remove()
+                started = time.perf_counter()
+                body = build()
+                samples.append(time.perf_counter() - started)
+
+            db.session.remove()
+            tracemalloc.start()
+            build()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            report[name] = {
+                'median_ms': round(statistics.median(samples) * 1000, 1),
+                'peak_mb': round(peak / 2 ** 20, 1),
+                'bytes': body if isinstance(body, int) else len(body),
+            }
+        db.session.remove()
+        db.engine.dispose()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[50000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    # Each size runs in a fresh interpreter so the app binds to a new database
+    if len(args.rows) > 1:
+        import subprocess
+        reports = []
+        for rows in args.rows:
+            output = subprocess.check_output([sys.executable, __file__, '--rows', str(rows), '--repeat', str(args.repeat)])
+            reports.extend(json.loads(output))
+        print(json.dumps(reports, indent=2))
+        return
+
+    print(json.dumps([run(args.rows[0], args.repeat)], indent=2))
+
+
+if __name__ == '__main__':
+    main()
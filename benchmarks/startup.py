@@ -0,0 +1,89 @@
+"""Worker cold start time and idle memory
+
+Each sample boots the app in a fresh interpreter, the way a gunicorn worker
+without preload would: time to import and build the app, time to serve the
+first request, and resident memory once idle. ``eager_ml`` also imports
+scikit-learn up front, as the app did before ML imports were made lazy.
+
+    python benchmarks/startup.py --repeat 5
+
+Results are printed as JSON (medians across samples).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MODES = ('lazy', 'eager_ml')
+
+
+def rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def sample(mode):
+    """Boot once in this interpreter and return the measurements"""
+    started = time.perf_counter()
+    if mode == 'eager_ml':
+        import sklearn.ensemble  # noqa: F401
+    from app import create_app
+    app = create_app('production')
+    boot = time.perf_counter() - started
+
+    client = app.test_client()
+    started = time.perf_counter()
+    response = client.get('/api/dashboard-stats')
+    first_request = time.perf_counter() - started
+    assert response.status_code == 200, response.status_code
+
+    return {
+        'boot_ms': round(boot * 1000, 1),
+        'first_request_ms': round(first_request * 1000, 1),
+        'rss_mb': round(rss_mb(), 1),
+        'sklearn_loaded': 'sklearn' in sys.modules,
+    }
+
+
+def run(repeat):
+    workdir = tempfile.mkdtemp(prefix='coastal-startup-')
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}", LOG_LEVEL='WARNING')
+    subprocess.check_call([sys.executable, '-m', 'flask', '--app', 'main', 'init-db'], cwd=ROOT, env=env,
+                          stdout=subprocess.DEVNULL)
+
+    report = {}
+    for mode in MODES:
+        samples = [json.loads(subprocess.check_output([sys.executable, __file__, '--sample', mode], env=env))
+                   for _ in range(repeat)]
+        report[mode] = {
+            name: statistics.median(s[name] for s in samples)
+            for name in ('boot_ms', 'first_request_ms', 'rss_mb')
+        }
+        report[mode]['sklearn_loaded'] = samples[0]['sklearn_loaded']
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--sample', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.sample:
+        print(json.dumps(sample(args.sample)))
+        return
+    print(json.dumps(run(args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
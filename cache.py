@@ -0,0 +1,172 @@
+import functools
+import hashlib
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Response, make_response, request
+
+logger = logging.getLogger(__name__)
+
+
+class LocalCache:
+    """In-process LRU cache with per-entry TTL
+
+    Tag generation counters live outside the LRU so they are never evicted.
+    Implements the same small interface as RedisCache, so it doubles as the
+    stand-in when no Redis is configured.
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        # Expired entries count until a lookup or eviction drops them
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def counter(self, key):
+        return self._counters.get(key, 0)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+
+class RedisCache:
+    """Redis-backed cache shared by every worker process"""
+
+    def __init__(self, url, prefix='coastal:cache:'):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def __len__(self):
+        # Redis expires entries itself; skip the tag generation counters
+        counters = (self.prefix + 'gen:').encode()
+        return sum(1 for key in self.client.scan_iter(match=self.prefix + '*', count=1000)
+                   if not key.startswith(counters))
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return pickle.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=max(1, int(ttl)))
+
+    def counter(self, key):
+        return int(self.client.get(self.prefix + key) or 0)
+
+    def incr(self, key):
+        return self.client.incr(self.prefix + key)
+
+
+def make_cache_backend(redis_url=None, max_entries=512):
+    """Redis when a URL is configured and the client is installed, else in-process"""
+    if redis_url:
+        try:
+            return RedisCache(redis_url)
+        except ImportError:
+            logger.warning("CACHE_REDIS_URL is set but the redis package is not installed; using local cache")
+    return LocalCache(max_entries=max_entries)
+
+
+class ResponseCache:
+    """Caches rendered JSON responses and answers If-None-Match with 304
+
+    Entries are keyed on endpoint, view arguments, query string and the
+    current generation of each tag the view depends on. Write paths call
+    ``invalidate(tag)``, which bumps the generation so every dependent key
+    misses on its next request; stale entries simply age out.
+    """
+
+    def __init__(self, backend, default_ttl=30.0):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'not_modified': 0, 'bytes_saved': 0, 'invalidations': 0}
+
+    def invalidate(self, *tags):
+        for tag in tags:
+            self.backend.incr(f"gen:{tag}")
+        with self._lock:
+            self._stats['invalidations'] += len(tags)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['entries'] = len(self.backend)
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+    def cached(self, *tags, ttl=None):
+        """Decorate a view whose output depends only on ``tags`` and the request args"""
+        ttl = ttl or self.default_ttl
+
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                key = self._key(kwargs, tags)
+                entry = self.backend.get(key)
+                if entry is None:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200 or response.is_streamed:
+                        return response
+                    body = response.get_data()
+                    entry = (body, hashlib.blake2b(body, digest_size=16).hexdigest(), response.mimetype)
+                    self.backend.set(key, entry, ttl)
+                    self._count('misses')
+                else:
+                    response = Response(entry[0], mimetype=entry[2])
+                    self._count('hits')
+
+                body, etag, _ = entry
+                response.set_etag(etag)
+                # Clients may keep the body but must revalidate before reuse
+                response.headers['Cache-Control'] = 'no-cache'
+                response = response.make_conditional(request)
+                if response.status_code == 304:
+                    self._count('not_modified', bytes_saved=len(body))
+                return response
+            return wrapper
+        return decorator
+
+    def _key(self, view_args, tags):
+        generations = ','.join(f"{tag}={self.backend.counter(f'gen:{tag}')}" for tag in tags)
+        raw = '|'.join([
+            request.endpoint or '',
+            repr(sorted(view_args.items())),
+            repr(sorted(request.args.items(multi=True))),
+            generations,
+        ])
+        return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+    def _count(self, name, bytes_saved=0):
+        with self._lock:
+            self._stats[name] += 1
+            self._stats['bytes_saved'] += bytes_saved
@@ -1,9 +1,36 @@
-import random
 import math
 from datetime import datetime, timedelta
 
+import numpy as np
+
+SENSOR_TYPES = np.array(['tide_gauge', 'weather_station', 'water_quality'])
+SENSOR_UNITS = np.array(['m', 'km/h', 'index'])
+TYPE_PREFIXES = ('TG', 'WS', 'WQ')
+
+# Base values for realistic simulation, by SENSOR_TYPES index
+BASE_VALUES = np.array([
+    1.2,   # tide_gauge: meters
+    15.0,  # weather_station: km/h wind speed
+    75.0   # water_quality: quality index 0-100
+])
+
+# Approximate coastline polylines (lat, lon) used to place synthetic sensors
+COASTLINES = {
+    'qld': [(-10.70, 142.50), (-16.92, 145.78), (-19.26, 146.82), (-23.85, 151.26), (-26.65, 153.10), (-28.17, 153.55)],
+    'nsw': [(-28.17, 153.55), (-30.30, 153.14), (-32.92, 151.78), (-33.87, 151.21), (-34.93, 150.75), (-37.50, 149.98)],
+    'vic': [(-37.50, 149.98), (-38.10, 147.10), (-38.30, 144.90), (-38.35, 141.60)],
+    'tas': [(-41.10, 145.90), (-40.90, 148.30), (-43.10, 147.90), (-42.90, 145.20)],
+    'sa': [(-38.05, 140.97), (-35.60, 138.10), (-34.90, 138.50), (-32.50, 137.80), (-32.10, 133.70)],
+    'wa': [(-31.70, 128.90), (-33.90, 122.00), (-35.00, 117.90), (-34.30, 115.10), (-31.95, 115.86),
+           (-24.90, 113.65), (-20.30, 118.60), (-15.80, 128.70)],
+    'nt': [(-14.90, 129.50), (-12.46, 130.84), (-12.20, 136.80), (-15.00, 135.50)],
+}
+
 class DataSimulator:
-    def __init__(self):
+    def __init__(self, seed=None):
+        # A fixed seed makes readings reproducible run to run
+        self.rng = np.random.default_rng(seed)
+        
         # Define sensor locations across Australian coastal regions with detailed location info
         self.sensors = {
             'NSW_TG001': {
@@ -63,54 +90,21 @@ class DataSimulator:
         }
         
         # Base values for realistic simulation
-        self.base_values = {
-            'tide_gauge': 1.2,  # meters
-            'weather_station': 15.0,  # km/h wind speed
-            'water_quality': 75.0  # quality index 0-100
-        }
+        self.base_values = dict(zip(SENSOR_TYPES.tolist(), BASE_VALUES.tolist()))
         
         # Track time for cyclical patterns
         self.start_time = datetime.utcnow()
+        
+        self.fleet = SensorFleet.from_sensors(self.sensors)
 
     def generate_sensor_readings(self):
         """Generate realistic sensor readings with temporal patterns"""
-        readings = []
         current_time = datetime.utcnow()
+        batch = self.fleet.readings_at(current_time, self.start_time, self.rng)
         
-        for sensor_id, sensor_info in self.sensors.items():
-            # Calculate time-based variations
-            hours_since_start = (current_time - self.start_time).total_seconds() / 3600
-            
-            value = 0
-            unit = 'unknown'
-            
-            if sensor_info['type'] == 'tide_gauge':
-                # Simulate tidal patterns (12.42 hour cycle)
-                tidal_factor = math.sin(2 * math.pi * hours_since_start / 12.42)
-                base_value = self.base_values['tide_gauge']
-                value = base_value + (0.8 * tidal_factor) + random.uniform(-0.2, 0.2)
-                unit = 'm'
-                
-            elif sensor_info['type'] == 'weather_station':
-                # Simulate weather patterns with daily cycle
-                daily_factor = math.sin(2 * math.pi * hours_since_start / 24)
-                base_value = self.base_values['weather_station']
-                value = base_value + (5 * daily_factor) + random.uniform(-3, 8)
-                value = max(0, value)  # Wind speed can't be negative
-                unit = 'km/h'
-                
-            elif sensor_info['type'] == 'water_quality':
-                # Simulate water quality with some random variation
-                base_value = self.base_values['water_quality']
-                # Add pollution events randomly
-                pollution_event = random.random() < 0.05  # 5% chance
-                if pollution_event:
-                    value = base_value - random.uniform(20, 40)
-                else:
-                    value = base_value + random.uniform(-5, 5)
-                value = max(0, min(100, value))  # Clamp between 0-100
-                unit = 'index'
-            
+        readings = []
+        for sensor_id, value, unit in zip(batch['sensor_id'].tolist(), batch['value'].tolist(), batch['unit'].tolist()):
+            sensor_info = self.sensors[sensor_id]
             readings.append({
                 'sensor_id': sensor_id,
                 'sensor_type': sensor_info['type'],
@@ -120,49 +114,115 @@ class DataSimulator:
                 'country': sensor_info['country'],
                 'latitude': sensor_info['lat'],
                 'longitude': sensor_info['lon'],
-                'value': round(value, 2),
+                'value': value,
                 'unit': unit
             })
         
         return readings
 
-    def generate_hazard_alerts(self):
-        """Generate realistic hazard alerts based on conditions"""
-        alerts = []
-        
-        # Random chance for different types of hazards
-        hazard_types = [
-            {'type': 'storm', 'probability': 0.1, 'severities': ['medium', 'high', 'critical']},
-            {'type': 'pollution', 'probability': 0.15, 'severities': ['low', 'medium', 'high']},
-            {'type': 'erosion', 'probability': 0.08, 'severities': ['low', 'medium', 'high']},
-            {'type': 'illegal_activity', 'probability': 0.05, 'severities': ['medium', 'high']}
-        ]
-        
-        for hazard in hazard_types:
-            if random.random() < hazard['probability']:
-                # Generate alert location near one of our sensors
-                sensor_id = random.choice(list(self.sensors.keys()))
-                sensor = self.sensors[sensor_id]
-                
-                # Add some random offset to the location
-                lat_offset = random.uniform(-0.02, 0.02)
-                lon_offset = random.uniform(-0.02, 0.02)
-                
-                severity = random.choice(hazard['severities'])
-                
-                descriptions = {
-                    'storm': f"Severe weather system detected with high winds and dangerous surf conditions",
-                    'pollution': f"Water quality degradation detected - possible contamination event",
-                    'erosion': f"Accelerated coastal erosion observed - infrastructure at risk",
-                    'illegal_activity': f"Suspicious vessel activity detected in protected marine area"
-                }
-                
-                alerts.append({
-                    'hazard_type': hazard['type'],
-                    'severity': severity,
-                    'latitude': sensor['lat'] + lat_offset,
-                    'longitude': sensor['lon'] + lon_offset,
-                    'description': descriptions[hazard['type']]
-                })
-        
-        return alerts
+    def generate_fleet(self, count, coastlines=('nsw',)):
+        """Build ``count`` synthetic sensors spread evenly along the given coastlines"""
+        return SensorFleet.along_coastlines(count, coastlines, self.rng)
+
+    def replay(self, fleet, start, end, step_seconds):
+        """Yield ``(timestamp, batch)`` for every step from ``start`` to ``end``
+
+        Used for historical backfill: time advances as fast as the caller
+        consumes batches rather than in real time.
+        """
+        timestamp = start
+        step = timedelta(seconds=step_seconds)
+        while timestamp <= end:
+            yield timestamp, fleet.readings_at(timestamp, self.start_time, self.rng)
+            timestamp += step
+
+
+class SensorFleet:
+    """Columnar set of sensors whose readings are generated with NumPy
+
+    Arrays are indexed by sensor; ``type_codes`` indexes SENSOR_TYPES. One
+    call to ``readings_at`` produces a reading for every sensor at once.
+    """
+
+    def __init__(self, sensor_ids, type_codes, latitudes, longitudes, phases):
+        self.sensor_ids = np.asarray(sensor_ids)
+        self.type_codes = np.asarray(type_codes, dtype=np.int8)
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        self.phases = np.asarray(phases, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.sensor_ids)
+
+    @classmethod
+    def from_sensors(cls, sensors):
+        """Fleet for a ``DataSimulator.sensors``-style dict"""
+        codes = {sensor_type: i for i, sensor_type in enumerate(SENSOR_TYPES)}
+        return cls(
+            list(sensors),
+            [codes[info['type']] for info in sensors.values()],
+            [info['lat'] for info in sensors.values()],
+            [info['lon'] for info in sensors.values()],
+            np.zeros(len(sensors))
+        )
+
+    @classmethod
+    def along_coastlines(cls, count, coastlines, rng):
+        """Spread ``count`` sensors evenly (by distance) along the named coastlines"""
+        segments = []
+        for name in coastlines:
+            points = np.array(COASTLINES[name])
+            for start, end in zip(points[:-1], points[1:]):
+                segments.append((name, start, end))
+        lengths = np.array([np.hypot(*(end - start)) for _, start, end in segments])
+        offsets = np.concatenate(([0.0], np.cumsum(lengths)))
+
+        # Position of each sensor along the concatenated polyline, plus jitter
+        positions = (np.arange(count) + 0.5) / count * offsets[-1]
+        segment_index = np.minimum(np.searchsorted(offsets, positions, side='right') - 1, len(segments) - 1)
+        starts = np.array([segments[i][1] for i in range(len(segments))])[segment_index]
+        ends = np.array([segments[i][2] for i in range(len(segments))])[segment_index]
+        fraction = ((positions - offsets[segment_index]) / lengths[segment_index])[:, None]
+        coordinates = starts + (ends - starts) * fraction + rng.normal(0, 0.01, (count, 2))
+
+        type_codes = np.arange(count) % len(SENSOR_TYPES)
+        prefixes = np.array([segments[i][0].upper() for i in range(len(segments))])[segment_index]
+        sensor_ids = [f"{prefix}_{TYPE_PREFIXES[code]}{i:07d}" for i, (prefix, code) in enumerate(zip(prefixes, type_codes))]
+        # Tides arrive later further along the coast
+        phases = positions / offsets[-1] * 2 * math.pi
+        return cls(sensor_ids, type_codes, coordinates[:, 0], coordinates[:, 1], phases)
+
+    def readings_at(self, timestamp, start_time, rng):
+        """One reading per sensor at ``timestamp``, as a dict of arrays"""
+        n = len(self)
+        hours = (timestamp - start_time).total_seconds() / 3600
+        codes = self.type_codes
+        values = np.empty(n, dtype=np.float64)
+
+        # Simulate tidal patterns (12.42 hour cycle)
+        tide = codes == 0
+        values[tide] = (BASE_VALUES[0] + 0.8 * np.sin(2 * math.pi * hours / 12.42 + self.phases[tide])
+                        + rng.uniform(-0.2, 0.2, tide.sum()))
+
+        # Simulate weather patterns with daily cycle; wind speed can't be negative
+        weather = codes == 1
+        values[weather] = np.maximum(0, BASE_VALUES[1] + 5 * np.sin(2 * math.pi * hours / 24 + self.phases[weather])
+                                     + rng.uniform(-3, 8, weather.sum()))
+
+        # Water quality with random variation and 5% chance of pollution events
+        quality = codes == 2
+        count = quality.sum()
+        pollution = rng.random(count) < 0.05
+        quality_values = np.where(pollution, BASE_VALUES[2] - rng.uniform(20, 40, count),
+                                  BASE_VALUES[2] + rng.uniform(-5, 5, count))
+        values[quality] = np.clip(quality_values, 0, 100)
+
+        return {
+            'sensor_id': self.sensor_ids,
+            'sensor_type': SENSOR_TYPES[codes],
+            'latitude': self.latitudes,
+            'longitude': self.longitudes,
+            'value': np.round(values, 2),
+            'unit': SENSOR_UNITS[codes],
+            'timestamp': timestamp,
+        }
@@ -0,0 +1,52 @@
+"""Gunicorn settings: gunicorn -c gunicorn.conf.py main:app
+
+APP_ENV=production (the default here) preloads the app in the master so
+workers fork with it already imported, and creates the schema once before
+any worker starts. APP_ENV=development reloads on code changes instead.
+"""
+import os
+
+profile = os.environ.setdefault("APP_ENV", "production")
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+
+# Threaded workers: /api/stream holds a thread per connected dashboard, and
+# the stream history, open alerts and local cache live in the process that
+# runs the background services, so one process with many threads is the
+# default; extra workers only serve database-backed reads consistently
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+workers = int(os.environ.get("WEB_CONCURRENCY", "1"))
+# Thread budget per worker: each open stream keeps one thread for up to
+# STREAM_MAX_SECONDS, so streams are capped at STREAM_MAX_CLIENTS (three
+# quarters of these threads by default) and further dashboards get 503 and
+# poll instead. The remaining threads serve /api/ingest, /metrics and every
+# other request; raise both together to hold more dashboards
+threads = int(os.environ.get("GUNICORN_THREADS", "32"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "60"))
+keepalive = 5
+
+preload_app = profile == "production"
+reload = profile == "development"
+reuse_port = True
+
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG")
+loglevel = os.environ.get("LOG_LEVEL", "info").lower()
+
+
+def on_starting(server):
+    # Schema setup runs once here, outside the request path and before fork
+    if not server.cfg.preload_app:
+        return
+    from app import db, init_db
+    app = server.app.wsgi()
+    with app.app_context():
+        init_db()
+        # Don't hand pooled connections to forked workers
+        db.engine.dispose()
+
+
+def post_worker_init(worker):
+    # Threads don't survive fork, so background services start in a worker;
+    # a lock file keeps them to one worker
+    import routes
+    routes.start_services(worker.wsgi)
@@ -0,0 +1,263 @@
+import csv
+import io
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from operator import itemgetter
+
+from sqlalchemy import insert, text
+
+from app import db
+from models import SensorData
+
+logger = logging.getLogger(__name__)
+
+# Columns written for each reading; anything else on the reading dict
+# (name, location, state, ...) is display metadata and is not persisted
+READING_COLUMNS = ('sensor_id', 'sensor_type', 'latitude', 'longitude', 'value', 'unit', 'timestamp')
+
+
+class SimulatorSource:
+    """Ingest source that polls the DataSimulator on a fixed interval"""
+
+    def __init__(self, simulator, interval=10.0):
+        self.simulator = simulator
+        self.interval = interval
+        self._next_poll = 0.0
+
+    def read(self, stop_event):
+        """Block until the next poll is due, then return a batch of readings"""
+        delay = self._next_poll - time.monotonic()
+        if delay > 0 and stop_event.wait(delay):
+            return []
+        self._next_poll = time.monotonic() + self.interval
+        return self.simulator.generate_sensor_readings()
+
+
+class IngestPipeline:
+    """Background ingest stage: source -> bounded queue -> batched bulk insert
+
+    A reader thread pulls readings from a pluggable source (any object with a
+    ``read(stop_event)`` method returning a list of reading dicts) and a writer
+    thread drains the queue, flushing with a single executemany insert when
+    either ``batch_size`` readings are buffered or ``flush_interval`` seconds
+    have passed since the first buffered reading. ``write`` performs the same
+    flush synchronously for callers (the HTTP ingest API) that already hold a
+    validated batch and want to know it is stored before answering.
+
+    Each batch is put in timestamp order before it is written, so ids follow
+    reading time within a batch and listeners with per-sensor rolling state
+    (streaming anomaly scores, rate-of-change and sustained alert rules) see
+    every sensor's readings in time order whatever order they arrived in.
+    """
+
+    def __init__(self, app=None, source=None, max_queue=10000, batch_size=500, flush_interval=2.0):
+        self.app = app
+        self.source = source
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.write_hooks = []
+        self.listeners = []
+
+        self._stop = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+        # Flushes from the writer thread and from ``write`` never interleave,
+        # so listeners see each batch exactly once and in commit order
+        self._flush_lock = threading.Lock()
+        self._stats = {
+            'received': 0,
+            'dropped': 0,
+            'written': 0,
+            'flushes': 0,
+            'failed_flushes': 0,
+            'last_flush_size': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+            'total_flush_ms': 0.0,
+            'last_flush_at': None,
+        }
+
+    def init_app(self, app):
+        """Bind to the app whose context flushes and listeners run in"""
+        self.app = app
+
+    def add_write_hook(self, callback):
+        """Register ``callback(rows)`` to run in each flush's transaction, before the insert"""
+        self.write_hooks.append(callback)
+
+    def add_listener(self, callback):
+        """Register ``callback(rows)`` to run after each successful flush"""
+        self.listeners.append(callback)
+
+    def start(self):
+        """Start the reader and writer threads"""
+        if self._threads:
+            return
+        self._stop.clear()
+        if self.source is not None:
+            self._threads.append(threading.Thread(target=self._read_loop, name='ingest-reader', daemon=True))
+        self._threads.append(threading.Thread(target=self._write_loop, name='ingest-writer', daemon=True))
+        for thread in self._threads:
+            thread.start()
+        logger.info("Ingest pipeline started (batch_size=%d, flush_interval=%.1fs)",
+                    self.batch_size, self.flush_interval)
+
+    def stop(self, timeout=5.0):
+        """Stop the threads, flushing anything still buffered"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def submit(self, readings, block=False):
+        """Enqueue readings for writing; returns the number accepted"""
+        accepted = 0
+        now = datetime.utcnow()
+        for reading in readings:
+            row = {column: reading.get(column) for column in READING_COLUMNS}
+            if row['timestamp'] is None:
+                row['timestamp'] = now
+            try:
+                self.queue.put(row, block=block, timeout=1.0 if block else None)
+                accepted += 1
+            except queue.Full:
+                break
+
+        with self._lock:
+            self._stats['received'] += accepted
+            self._stats['dropped'] += len(readings) - accepted
+        return accepted
+
+    def write(self, rows):
+        """Insert already-validated rows now and run the listeners; returns success"""
+        with self._lock:
+            self._stats['received'] += len(rows)
+        return self._flush(rows)
+
+    def stats(self):
+        """Snapshot of queue depth and flush metrics"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['queue_depth'] = self.queue.qsize()
+        stats['queue_capacity'] = self.queue.maxsize
+        stats['avg_flush_ms'] = round(stats['total_flush_ms'] / stats['flushes'], 3) if stats['flushes'] else 0.0
+        stats['running'] = any(thread.is_alive() for thread in self._threads)
+        if stats['last_flush_at'] is not None:
+            stats['last_flush_at'] = stats['last_flush_at'].isoformat()
+        return stats
+
+    def _read_loop(self):
+        while not self._stop.is_set():
+            try:
+                readings = self.source.read(self._stop)
+            except Exception:
+                logger.exception("Ingest source failed")
+                self._stop.wait(1.0)
+                continue
+            if readings:
+                self.submit(readings, block=True)
+
+    def _write_loop(self):
+        buffer = []
+        deadline = None
+        while True:
+            timeout = self.flush_interval if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                buffer.append(self.queue.get(timeout=timeout))
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                # Drain whatever is already queued without waiting
+                while len(buffer) < self.batch_size:
+                    buffer.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            stopping = self._stop.is_set()
+            due = deadline is not None and time.monotonic() >= deadline
+            if buffer and (len(buffer) >= self.batch_size or due or stopping):
+                self._flush(buffer)
+                buffer = []
+                deadline = None
+            if stopping and self.queue.empty():
+                return
+
+    def _flush(self, rows):
+        # Stable, and close to free for the already ordered simulator batches
+        rows = sorted(rows, key=itemgetter('timestamp'))
+        with self._flush_lock:
+            return self._flush_locked(rows)
+
+    def _flush_locked(self, rows):
+        started = time.perf_counter()
+        try:
+            with self.app.app_context():
+                for callback in self.write_hooks:
+                    callback(rows)
+                if db.engine.dialect.driver == 'psycopg2':
+                    self._copy(rows)
+                else:
+                    result = db.session.execute(
+                        insert(SensorData.__table__).returning(SensorData.id, sort_by_parameter_order=True),
+                        rows
+                    )
+                    for row, inserted_id in zip(rows, result.scalars()):
+                        row['id'] = inserted_id
+                db.session.commit()
+        except Exception:
+            logger.exception("Ingest flush of %d readings failed", len(rows))
+            with self._lock:
+                self._stats['failed_flushes'] += 1
+            return False
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._stats['written'] += len(rows)
+            self._stats['flushes'] += 1
+            self._stats['last_flush_size'] = len(rows)
+            self._stats['last_flush_ms'] = round(elapsed_ms, 3)
+            self._stats['max_flush_ms'] = round(max(self._stats['max_flush_ms'], elapsed_ms), 3)
+            self._stats['total_flush_ms'] += elapsed_ms
+            self._stats['last_flush_at'] = datetime.utcnow()
+
+        # Listeners run in the writer thread with an app context so they can
+        # touch the database (anomaly scoring, rollups, alert rules, ...)
+        with self.app.app_context():
+            for callback in self.listeners:
+                try:
+                    callback(rows)
+                except Exception:
+                    logger.exception("Ingest listener %r failed", callback)
+                    db.session.rollback()
+        return True
+
+    def _copy(self, rows):
+        """PostgreSQL COPY, with ids drawn from the sequence up front
+
+        COPY can't return generated keys, and listeners need each row's id,
+        so the ids are reserved in one round trip and written explicitly.
+        """
+        table = SensorData.__tablename__
+        connection = db.session.connection()
+        ids = connection.execute(
+            text(f"SELECT nextval(pg_get_serial_sequence('{table}', 'id')) FROM generate_series(1, :n)"),
+            {'n': len(rows)}
+        ).scalars().all()
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row, row_id in zip(rows, ids):
+            row['id'] = row_id
+            writer.writerow([row_id] + [row[column] for column in READING_COLUMNS])
+        buffer.seek(0)
+
+        cursor = connection.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {table} (id, {', '.join(READING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+        finally:
+            cursor.close()
@@ -0,0 +1,215 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+import msgpack
+import numpy as np
+
+# Columns accepted from feeds; timestamp is optional and defaults to arrival time
+INGEST_COLUMNS = ('sensor_id', 'sensor_type', 'latitude', 'longitude', 'value', 'unit', 'timestamp')
+SENSOR_TYPES = ('tide_gauge', 'weather_station', 'water_quality')
+
+# Readings stamped further than this into the future are rejected
+MAX_CLOCK_SKEW = timedelta(minutes=10)
+
+CONTENT_TYPES = {
+    'application/x-ndjson': 'jsonl',
+    'application/jsonl': 'jsonl',
+    'application/json': 'jsonl',
+    'text/csv': 'csv',
+    'application/msgpack': 'msgpack',
+    'application/x-msgpack': 'msgpack',
+    'application/vnd.apache.arrow.stream': 'arrow',
+}
+
+
+class UnsupportedFormat(ValueError):
+    """The payload format is unknown or its optional decoder isn't installed"""
+
+
+def format_for(content_type, override=None):
+    if override:
+        if override not in set(CONTENT_TYPES.values()):
+            raise UnsupportedFormat(f"Unknown format {override!r}")
+        return override
+    mimetype = (content_type or '').split(';')[0].strip().lower()
+    if mimetype not in CONTENT_TYPES:
+        raise UnsupportedFormat(f"Unsupported content type {mimetype or '(none)'!r}")
+    return CONTENT_TYPES[mimetype]
+
+
+def parse_columns(body, payload_format):
+    """Decode a request body into ``{column: list}``"""
+    if payload_format == 'jsonl':
+        return _parse_jsonl(body)
+    if payload_format == 'csv':
+        return _parse_csv(body)
+    if payload_format == 'msgpack':
+        return _parse_msgpack(body)
+    if payload_format == 'arrow':
+        return _parse_arrow(body)
+    raise UnsupportedFormat(f"Unknown format {payload_format!r}")
+
+
+def _parse_jsonl(body):
+    text = body.decode('utf-8').strip()
+    # A plain JSON array of objects is accepted as well as one object per line
+    if text.startswith('['):
+        records = json.loads(text)
+    else:
+        records = [json.loads(line) for line in text.splitlines() if line.strip()]
+    return {column: [record.get(column) if isinstance(record, dict) else None for record in records]
+            for column in INGEST_COLUMNS}
+
+
+def _parse_csv(body):
+    reader = csv.reader(io.StringIO(body.decode('utf-8')))
+    try:
+        header = next(reader, None)
+        rows = list(reader)
+    except csv.Error as e:
+        raise ValueError(str(e))
+    if header is None:
+        return {column: [] for column in INGEST_COLUMNS}
+    positions = {name.strip(): i for i, name in enumerate(header)}
+    columns = {}
+    for column in INGEST_COLUMNS:
+        position = positions.get(column)
+        columns[column] = [row[position] if position is not None and position < len(row) else None
+                           for row in rows]
+    return columns
+
+
+def _parse_msgpack(body):
+    """Columnar msgpack: a map of column name -> array"""
+    data = msgpack.unpackb(body, raw=False)
+    if not isinstance(data, dict) or not all(isinstance(values, (list, tuple)) for values in data.values()):
+        raise ValueError("msgpack payload must be a map of column arrays")
+    length = max((len(values) for values in data.values()), default=0)
+    return {column: data.get(column, [None] * length) for column in INGEST_COLUMNS}
+
+
+def _parse_arrow(body):
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise UnsupportedFormat("Arrow payloads need the arrow extra (pyarrow) installed")
+    table = pa.ipc.open_stream(body).read_all()
+    columns = {}
+    for column in INGEST_COLUMNS:
+        if column in table.column_names:
+            values = table.column(column)
+            if column == 'timestamp' and pa.types.is_timestamp(values.type):
+                values = values.cast(pa.timestamp('us'))
+            columns[column] = values.to_pylist()
+        else:
+            columns[column] = [None] * table.num_rows
+    return columns
+
+
+def _to_float(values):
+    """Float array with NaN wherever a value is missing or not numeric"""
+    try:
+        return np.array([np.nan if value in (None, '') else value for value in values], dtype=np.float64)
+    except (TypeError, ValueError):
+        result = np.full(len(values), np.nan)
+        for i, value in enumerate(values):
+            try:
+                result[i] = float(value)
+            except (TypeError, ValueError):
+                pass
+        return result
+
+
+def _to_timestamps(values, now):
+    """datetime64[us] array (NaT where invalid); missing timestamps become ``now``"""
+    result = np.full(len(values), np.datetime64(now, 'us'))
+    present = np.flatnonzero([value not in (None, '') for value in values])
+    if not len(present):
+        return result
+
+    # Fast path: naive ISO strings (what the simulator and load generator send)
+    # parse in one NumPy call; anything else falls back to per-value parsing
+    subset = [values[i] for i in present]
+    try:
+        if all(isinstance(value, str) and value[-1:].isdigit() and '+' not in value and value.count('-') == 2
+               for value in subset):
+            result[present] = np.array(subset, dtype='datetime64[us]')
+            return result
+    except ValueError:
+        pass
+    for i, value in zip(present, subset):
+        result[i] = _parse_timestamp(value)
+    return result
+
+
+def _parse_timestamp(value):
+    try:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            # Epoch seconds
+            return np.datetime64(int(value * 1_000_000), 'us')
+        if isinstance(value, str):
+            try:
+                return np.datetime64(int(float(value) * 1_000_000), 'us')
+            except ValueError:
+                value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        if isinstance(value, datetime):
+            # Stored timestamps are naive UTC
+            if value.tzinfo is not None:
+                value = value.astimezone(timezone.utc).replace(tzinfo=None)
+            return np.datetime64(value, 'us')
+    except (TypeError, ValueError, OverflowError):
+        pass
+    return np.datetime64('NaT')
+
+
+def validate(columns, now=None):
+    """Validate decoded columns in bulk
+
+    Returns ``(rows, rejected)`` where ``rows`` are reading dicts ready for
+    the ingest pipeline and ``rejected`` counts rejections by reason (a row
+    is counted once, under its first failing check).
+    """
+    now = now or datetime.utcnow()
+    n = len(columns['sensor_id'])
+    if any(len(columns[column]) != n for column in INGEST_COLUMNS):
+        raise ValueError("All columns must have the same length")
+
+    sensor_ids = np.array([value if isinstance(value, str) else '' for value in columns['sensor_id']], dtype=object)
+    sensor_types = np.array([value if isinstance(value, str) else '' for value in columns['sensor_type']], dtype=object)
+    units = np.array([value if isinstance(value, str) else '' for value in columns['unit']], dtype=object)
+    latitudes = _to_float(columns['latitude'])
+    longitudes = _to_float(columns['longitude'])
+    values = _to_float(columns['value'])
+    timestamps = _to_timestamps(columns['timestamp'], now)
+
+    checks = [
+        ('missing_sensor_id', (sensor_ids == '') | (np.array([len(s) for s in sensor_ids]) > 50)),
+        ('invalid_sensor_type', ~np.isin(sensor_types, SENSOR_TYPES)),
+        ('invalid_location', ~(np.abs(latitudes) <= 90) | ~(np.abs(longitudes) <= 180)),
+        ('invalid_value', ~np.isfinite(values)),
+        ('missing_unit', (units == '') | (np.array([len(u) for u in units]) > 20)),
+        ('invalid_timestamp', np.isnat(timestamps) | (timestamps > np.datetime64(now + MAX_CLOCK_SKEW, 'us'))),
+    ]
+
+    rejected = {}
+    bad = np.zeros(n, dtype=bool)
+    for reason, failed in checks:
+        newly = failed & ~bad
+        if newly.any():
+            rejected[reason] = int(newly.sum())
+            bad |= newly
+
+    keep = np.flatnonzero(~bad)
+    timestamp_objects = timestamps[keep].astype(object)
+    rows = [{
+        'sensor_id': sensor_ids[i],
+        'sensor_type': sensor_types[i],
+        'latitude': float(latitudes[i]),
+        'longitude': float(longitudes[i]),
+        'value': float(values[i]),
+        'unit': units[i],
+        'timestamp': timestamp,
+    } for i, timestamp in zip(keep.tolist(), timestamp_objects)]
+    return rows, rejected
@@ -0,0 +1,181 @@
+"""High-volume synthetic load for capacity testing
+
+Generates readings for a fleet of synthetic sensors spread along one or
+more coastlines and either writes them through the app's ingest pipeline
+in this process or POSTs them to the HTTP ingest endpoint, then reports
+achieved throughput as JSON. Either way readings are registered, scored
+and rolled up as live ingest would, so a replayed backfill shows up in the
+charts and /api/anomaly-detection; alert rules and stream publishing only
+run in the server process that runs the background services.
+
+    # 10k sensors, live, paced to 5000 readings/s, for one minute
+    python load_generator.py --sensors 10000 --coastline nsw qld --rate 5000 --duration 60
+
+    # Backfill 24h of history at one reading per sensor per minute
+    python load_generator.py --sensors 2000 --replay-hours 24 --step 60
+
+    # Drive a running server instead of the database
+    python load_generator.py --sensors 5000 --target http --url http://localhost:5000
+"""
+import argparse
+import io
+import json
+import sys
+import time
+import urllib.request
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from data_simulator import COASTLINES, DataSimulator
+
+CSV_COLUMNS = ('sensor_id', 'sensor_type', 'latitude', 'longitude', 'value', 'unit', 'timestamp')
+
+
+def batch_to_csv(batch):
+    """Columnar batch -> CSV body with a header row"""
+    n = len(batch['sensor_id'])
+    timestamp = np.full(n, batch['timestamp'].isoformat())
+    columns = [batch['sensor_id'], batch['sensor_type'], batch['latitude'].round(6).astype(str),
+               batch['longitude'].round(6).astype(str), batch['value'].astype(str), batch['unit'], timestamp]
+    body = io.StringIO()
+    body.write(','.join(CSV_COLUMNS) + '\n')
+    for row in zip(*(column.tolist() for column in columns)):
+        body.write(','.join(row))
+        body.write('\n')
+    return body.getvalue().encode()
+
+
+class DatabaseTarget:
+    """Writes batches as ``POST /api/ingest`` does, minus the live-only listeners
+
+    Readings are registered, scored and rolled up, but alert rules and the
+    stream publisher (dashboard stats for clients of this process, of which
+    there are none) are left out.
+    """
+
+    def __init__(self, chunk_size):
+        # Import lazily so the HTTP target never opens the database; the
+        # app's background services are never started here
+        from app import create_app
+        from ingest import IngestPipeline
+        from rollups import apply_rollups
+        from routes import score_ingested_readings, sensor_registry
+
+        self.app = create_app()
+        self.pipeline = IngestPipeline(self.app)
+        self.pipeline.add_write_hook(sensor_registry.register)
+        for listener in (score_ingested_readings, apply_rollups, sensor_registry.record):
+            self.pipeline.add_listener(listener)
+        self.chunk_size = chunk_size
+
+    def send(self, batch):
+        n = len(batch['sensor_id'])
+        columns = {name: batch[name].tolist() for name in CSV_COLUMNS if name != 'timestamp'}
+        rows = [
+            {'sensor_id': columns['sensor_id'][i], 'sensor_type': columns['sensor_type'][i],
+             'latitude': columns['latitude'][i], 'longitude': columns['longitude'][i],
+             'value': columns['value'][i], 'unit': columns['unit'][i], 'timestamp': batch['timestamp']}
+            for i in range(n)
+        ]
+        written = 0
+        for start in range(0, n, self.chunk_size):
+            chunk = rows[start:start + self.chunk_size]
+            if self.pipeline.write(chunk):
+                written += len(chunk)
+        return written
+
+
+class HttpTarget:
+    """POSTs batches as CSV to a running server's ingest endpoint"""
+
+    def __init__(self, url, chunk_size):
+        self.url = url.rstrip('/') + '/api/ingest'
+        self.chunk_size = chunk_size
+
+    def send(self, batch):
+        n = len(batch['sensor_id'])
+        accepted = 0
+        for start in range(0, n, self.chunk_size):
+            chunk = {name: (value[start:start + self.chunk_size] if isinstance(value, np.ndarray) else value)
+                     for name, value in batch.items()}
+            request = urllib.request.Request(self.url, data=batch_to_csv(chunk), method='POST',
+                                             headers={'Content-Type': 'text/csv'})
+            with urllib.request.urlopen(request, timeout=60) as response:
+                accepted += json.load(response).get('accepted', 0)
+        return accepted
+
+
+def run(args):
+    simulator = DataSimulator(seed=args.seed)
+    fleet = simulator.generate_fleet(args.sensors, args.coastline)
+    target = HttpTarget(args.url, args.chunk_size) if args.target == 'http' else DatabaseTarget(args.chunk_size)
+
+    generated = 0
+    written = 0
+    generate_seconds = 0.0
+    started = time.perf_counter()
+
+    if args.replay_hours:
+        end = datetime.utcnow()
+        steps = simulator.replay(fleet, end - timedelta(hours=args.replay_hours), end, args.step)
+    else:
+        steps = None
+
+    while True:
+        tick = time.perf_counter()
+        if steps is not None:
+            item = next(steps, None)
+            if item is None:
+                break
+            batch = item[1]
+        else:
+            if tick - started >= args.duration:
+                break
+            batch = fleet.readings_at(datetime.utcnow(), simulator.start_time, simulator.rng)
+        generate_seconds += time.perf_counter() - tick
+
+        written += target.send(batch)
+        generated += len(fleet)
+
+        # Pace live mode so the overall rate tracks --rate
+        if steps is None and args.rate:
+            ahead = generated / args.rate - (time.perf_counter() - started)
+            if ahead > 0:
+                time.sleep(min(ahead, max(0.0, args.duration - (time.perf_counter() - started))))
+
+    elapsed = time.perf_counter() - started
+    return {
+        'sensors': len(fleet),
+        'coastlines': list(args.coastline),
+        'target': args.target,
+        'mode': 'replay' if args.replay_hours else 'live',
+        'seed': args.seed,
+        'readings_generated': generated,
+        'readings_written': written,
+        'elapsed_seconds': round(elapsed, 3),
+        'generate_seconds': round(generate_seconds, 3),
+        'readings_per_second': round(written / elapsed, 1) if elapsed else 0.0,
+        'target_rate': args.rate or None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sensors', type=int, default=1000)
+    parser.add_argument('--coastline', nargs='+', default=['nsw'], choices=sorted(COASTLINES))
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--target', choices=('db', 'http'), default='db')
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--rate', type=float, default=0, help='target readings/s in live mode (0 = unthrottled)')
+    parser.add_argument('--duration', type=float, default=10, help='live mode run time in seconds')
+    parser.add_argument('--replay-hours', type=float, default=0, help='backfill this many hours of history')
+    parser.add_argument('--step', type=float, default=60, help='replay step between sweeps, in seconds')
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    print(json.dumps(run(args), indent=2))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
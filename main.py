@@ -1,4 +1,9 @@
-from app import app
+from app import create_app
+
+# WSGI entry point (gunicorn -c gunicorn.conf.py main:app)
+app = create_app()
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    import routes
+    routes.start_services(app)
+    app.run(host='0.0.0.0', port=5000, debug=True, use_reloader=False)
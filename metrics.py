@@ -0,0 +1,238 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from flask.json.provider import JSONProvider
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Seconds; covers a cache hit through a slow bulk query
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+SQL_OPERATIONS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE')
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in values)
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(names, escaped)) + '}'
+
+
+class Counter:
+    """Monotonic counter, one value per label combination
+
+    Exposed as ``<name>_total`` on the HELP, TYPE and sample lines alike.
+    """
+
+    type = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = f"{name}_total"
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.labels, key)} {value}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram with ``_sum`` and ``_count``"""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        names = self.labels + ('le',)
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels(names, key + (bound,))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, key)} {total}"
+            yield f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}"
+
+
+class Registry:
+    """Metrics of this process, rendered in the Prometheus text format
+
+    Besides the counters and histograms created here, collectors registered
+    with ``add_collector`` report values other components already keep
+    (ingest and cache stats) at scrape time. Each worker process has its own
+    registry, so scrape every worker or run one.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, documentation, labels=()):
+        metric = Counter(name, documentation, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, documentation, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collect):
+        """``collect()`` yields ``(name, type, documentation, value)`` at each scrape"""
+        self._collectors.append(collect)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        for collect in self._collectors:
+            for name, metric_type, documentation, value in collect():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                lines.append(f"{name} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+def current_route():
+    """Route pattern of the current request, or the name of the background thread"""
+    if has_request_context():
+        return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    return threading.current_thread().name
+
+
+class TimedJSONProvider(JSONProvider):
+    """Wraps the app's JSON provider to time ``jsonify`` responses and count their rows
+
+    A list body, or the ``items`` of a paginated envelope, counts as rows.
+    """
+
+    def __init__(self, app, provider, request_metrics):
+        super().__init__(app)
+        self.provider = provider
+        self.request_metrics = request_metrics
+
+    def dumps(self, obj, **kwargs):
+        return self.provider.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        return self.provider.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        started = time.perf_counter()
+        response = self.provider.response(*args, **kwargs)
+        if has_request_context():
+            obj = args[0] if len(args) == 1 else None
+            self.request_metrics.record_serialization(obj, time.perf_counter() - started)
+        return response
+
+
+class RequestMetrics:
+    """Request latency, database query and JSON serialization metrics for an app
+
+    Queries are labelled with the route that issued them, or with the
+    background thread's name (ingest-writer, retention, model-trainer).
+    """
+
+    def __init__(self, registry, app=None):
+        self.latency = registry.histogram(
+            'http_request_duration_seconds', 'Time to produce a response, by route', ('method', 'route', 'status'))
+        self.queries = registry.counter(
+            'db_queries', 'SQL statements executed, by route and statement type', ('route', 'operation'))
+        self.query_seconds = registry.histogram(
+            'db_query_duration_seconds', 'SQL statement execution time', ('route', 'operation'))
+        self.rows = registry.histogram(
+            'http_response_rows', 'Rows (list items) in JSON responses, by route', ('route',), ROW_BUCKETS)
+        self.serialize_seconds = registry.histogram(
+            'json_serialize_seconds', 'Time spent encoding JSON responses, by route', ('route',))
+        self._engines_hooked = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.json = TimedJSONProvider(app, app.json, self)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        # Every engine, including ones created after this call
+        if not self._engines_hooked:
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+            event.listen(Engine, 'handle_error', self._handle_error)
+            self._engines_hooked = True
+
+    def record_serialization(self, obj, seconds):
+        route = current_route()
+        self.serialize_seconds.observe(seconds, route=route)
+        rows = obj.get('items') if isinstance(obj, dict) else obj
+        if isinstance(rows, list):
+            self.rows.observe(len(rows), route=route)
+
+    def _before_request(self):
+        g.metrics_started = time.perf_counter()
+
+    def _after_request(self, response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            # Streamed bodies are timed to the first byte only
+            self.latency.observe(time.perf_counter() - started, method=request.method,
+                                 route=current_route(), status=str(response.status_code))
+        return response
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_query_started', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['metrics_query_started'].pop()
+        route = current_route()
+        operation = statement.lstrip()[:6].upper()
+        if operation not in SQL_OPERATIONS:
+            operation = 'OTHER'
+        self.queries.inc(route=route, operation=operation)
+        self.query_seconds.observe(time.perf_counter() - started, route=route, operation=operation)
+
+    def _handle_error(self, context):
+        # A failed statement never reaches after_cursor_execute; drop its start time
+        if context.connection is not None and context.execution_context is not None:
+            started = context.connection.info.get('metrics_query_started')
+            if started:
+                started.pop()
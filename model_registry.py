@@ -0,0 +1,189 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app import db
+from models import SensorData
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """Versioned on-disk store for trained anomaly models
+
+    Each version lives in its own directory (``v0001/``, ``v0002/``, ...)
+    holding ``models.joblib`` and ``metadata.json``. A ``LATEST`` file names
+    the current version and is replaced atomically, so a reader never sees a
+    half-written version.
+    """
+
+    def __init__(self, root, keep=5):
+        self.root = root
+        self.keep = keep
+
+    def versions(self):
+        """All saved versions, oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root) if name.startswith('v') and name[1:].isdigit())
+
+    def latest_version(self):
+        try:
+            with open(os.path.join(self.root, 'LATEST')) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def save(self, models, metadata):
+        """Persist a model set as a new version and make it the latest"""
+        os.makedirs(self.root, exist_ok=True)
+        versions = self.versions()
+        version = 'v%04d' % (int(versions[-1][1:]) + 1 if versions else 1)
+        path = os.path.join(self.root, version)
+        os.makedirs(path)
+
+        import joblib
+        joblib.dump(models, os.path.join(path, 'models.joblib'))
+        with open(os.path.join(path, 'metadata.json'), 'w') as f:
+            json.dump(dict(metadata, version=version), f, indent=2)
+        self._write_latest(version)
+
+        # Keep only the most recent versions
+        for old in self.versions()[:-self.keep]:
+            old_path = os.path.join(self.root, old)
+            for name in os.listdir(old_path):
+                os.remove(os.path.join(old_path, name))
+            os.rmdir(old_path)
+        return version
+
+    def load(self, version=None):
+        """Load a version (default: latest); returns (version, models, metadata) or None"""
+        version = version or self.latest_version()
+        if version is None:
+            return None
+        path = os.path.join(self.root, version)
+        # Imported here, with scikit-learn behind it, to keep worker boot light
+        import joblib
+        models = joblib.load(os.path.join(path, 'models.joblib'))
+        with open(os.path.join(path, 'metadata.json')) as f:
+            metadata = json.load(f)
+        return version, models, metadata
+
+    def _write_latest(self, version):
+        fd, tmp_path = tempfile.mkstemp(dir=self.root)
+        with os.fdopen(fd, 'w') as f:
+            f.write(version)
+        os.replace(tmp_path, os.path.join(self.root, 'LATEST'))
+
+
+class ModelTrainer:
+    """Loads persisted models at startup and periodically refits from history
+
+    Training runs in a background thread on a fresh model set; the detector
+    keeps serving the previous models until ``install_models`` swaps the new
+    set in, so inference never waits on a refit.
+    """
+
+    def __init__(self, detector, registry, app=None, history_hours=72, max_samples=50000,
+                 min_samples=100, interval=6 * 3600.0, n_jobs=None):
+        self.app = app
+        self.detector = detector
+        self.registry = registry
+        self.history_hours = history_hours
+        self.max_samples = max_samples
+        self.min_samples = min_samples
+        self.interval = interval
+        self.n_jobs = n_jobs
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._train_lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+
+    def start(self):
+        """Load the latest saved models, then retrain on ``interval`` in the background"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='model-trainer', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def load_latest(self):
+        """Install the registry's latest version, if any"""
+        loaded = self.registry.load()
+        if loaded is None:
+            return None
+        version, models, metadata = loaded
+        if 'thresholds' not in metadata:
+            logger.info("Anomaly models %s predate score calibration; retraining", version)
+            return None
+        self.detector.install_models(models, version)
+        logger.info("Loaded anomaly models %s (%s)", version, ', '.join(sorted(models)))
+        return version
+
+    def load_history(self):
+        """Most recent values per sensor type from SensorData"""
+        since = datetime.utcnow() - timedelta(hours=self.history_hours)
+        history = {}
+        sensor_types = db.session.execute(
+            select(SensorData.sensor_type).where(SensorData.timestamp >= since).distinct()
+        ).scalars().all()
+        for sensor_type in sensor_types:
+            history[sensor_type] = db.session.execute(
+                select(SensorData.value)
+                .where(SensorData.sensor_type == sensor_type, SensorData.timestamp >= since)
+                .order_by(SensorData.timestamp.desc())
+                .limit(self.max_samples)
+            ).scalars().all()
+        return history
+
+    def train(self):
+        """Fit, persist and install a new model set; returns the version or None"""
+        with self._train_lock:
+            with self.app.app_context():
+                history = self.load_history()
+            history = {sensor_type: values for sensor_type, values in history.items()
+                       if len(values) >= self.min_samples}
+            if not history:
+                logger.info("Skipping model training: not enough history yet")
+                return None
+
+            models = self.detector.fit_models(history, n_jobs=self.n_jobs)
+            if not models:
+                return None
+            version = self.registry.save(models, {
+                'trained_at': datetime.utcnow().isoformat(),
+                'history_hours': self.history_hours,
+                'samples': {sensor_type: len(values) for sensor_type, values in history.items()},
+                'thresholds': {sensor_type: model[2] for sensor_type, model in models.items()},
+            })
+            self.detector.install_models(models, version)
+            logger.info("Trained anomaly models %s on %d samples", version,
+                        sum(len(values) for values in history.values()))
+            return version
+
+    def _run(self):
+        try:
+            if self.load_latest() is None:
+                self.train()
+        except Exception:
+            logger.exception("Initial model load failed")
+
+        while not self._stop.wait(self.interval):
+            try:
+                self.train()
+            except Exception:
+                logger.exception("Model retraining failed")
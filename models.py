@@ -1,16 +1,39 @@
 from app import db
 from datetime import datetime
-from sqlalchemy import func
+from sqlalchemy import func, insert, inspect, literal, select, text
+
+class Sensor(db.Model):
+    # Registry of sensors and their display metadata (sensors.py caches it);
+    # readings reference it by sensor_id
+    id = db.Column(db.Integer, primary_key=True)
+    sensor_id = db.Column(db.String(50), nullable=False, unique=True)
+    sensor_type = db.Column(db.String(50), nullable=False)
+    name = db.Column(db.String(200))
+    location = db.Column(db.String(200))
+    state = db.Column(db.String(100))
+    country = db.Column(db.String(100))
+    latitude = db.Column(db.Float, nullable=False)
+    longitude = db.Column(db.Float, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
 class SensorData(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    sensor_id = db.Column(db.String(50), nullable=False)
+    # The foreign key is declared for new tables only; sensor_type and the
+    # location stay on each reading as measured, for the indexed filters
+    sensor_id = db.Column(db.String(50), db.ForeignKey('sensor.sensor_id'), nullable=False)
     sensor_type = db.Column(db.String(50), nullable=False)  # tide_gauge, weather_station, water_quality
     latitude = db.Column(db.Float, nullable=False)
     longitude = db.Column(db.Float, nullable=False)
     value = db.Column(db.Float, nullable=False)
     unit = db.Column(db.String(20), nullable=False)
     timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_sensor_data_timestamp', 'timestamp'),
+        db.Index('ix_sensor_data_type_timestamp', 'sensor_type', 'timestamp'),
+        db.Index('ix_sensor_data_sensor_timestamp', 'sensor_id', 'timestamp'),
+    )
     
 class HazardAlert(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -21,10 +44,103 @@ class HazardAlert(db.Model):
     description = db.Column(db.Text, nullable=False)
     timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
+    # Lifecycle maintained by the alert engine: repeats of the same hazard at
+    # the same place coalesce into one alert, which resolves once quiet
+    rule = db.Column(db.String(50))
+    sensor_id = db.Column(db.String(50))
+    trigger_count = db.Column(db.Integer, default=1)
+    last_triggered = db.Column(db.DateTime)
+    resolved_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_hazard_alert_active_timestamp', 'is_active', 'timestamp'),
+    )
     
 class AnomalyDetection(db.Model):
     id = db.Column(db.Integer, primary_key=True)
+    # One result per reading, written at ingest; nullable only for rows that
+    # predate the link
+    sensor_data_id = db.Column(db.Integer, db.ForeignKey('sensor_data.id', ondelete='CASCADE'))
     sensor_id = db.Column(db.String(50), nullable=False)
     anomaly_score = db.Column(db.Float, nullable=False)
     is_anomaly = db.Column(db.Boolean, nullable=False)
     timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_anomaly_detection_anomaly_timestamp', 'is_anomaly', 'timestamp'),
+        db.Index('ix_anomaly_detection_sensor_timestamp', 'sensor_id', 'timestamp'),
+        # A unique index rather than a constraint so ensure_indexes can add
+        # it to existing tables
+        db.Index('uq_anomaly_detection_sensor_data', 'sensor_data_id', unique=True),
+    )
+
+class SensorRollup(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    sensor_id = db.Column(db.String(50), nullable=False)
+    sensor_type = db.Column(db.String(50), nullable=False)
+    resolution = db.Column(db.Integer, nullable=False)  # bucket width in seconds: 60, 900, 3600
+    timestamp = db.Column(db.DateTime, nullable=False)  # bucket start
+    min_value = db.Column(db.Float, nullable=False)
+    max_value = db.Column(db.Float, nullable=False)
+    sum_value = db.Column(db.Float, nullable=False)
+    count = db.Column(db.Integer, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('sensor_id', 'resolution', 'timestamp', name='uq_sensor_rollup_bucket'),
+        db.Index('ix_sensor_rollup_type_resolution_timestamp', 'sensor_type', 'resolution', 'timestamp'),
+    )
+
+class SensorChunk(db.Model):
+    # One sensor's readings in one sealed window of the columnar chunk store
+    # (timeseries.py): rows row_offset..row_offset+count of the window's files
+    id = db.Column(db.Integer, primary_key=True)
+    window_start = db.Column(db.DateTime, nullable=False)
+    sensor_id = db.Column(db.String(50), nullable=False)
+    sensor_type = db.Column(db.String(50), nullable=False)
+    start_time = db.Column(db.DateTime, nullable=False)  # first reading
+    end_time = db.Column(db.DateTime, nullable=False)  # last reading
+    row_offset = db.Column(db.Integer, nullable=False)
+    count = db.Column(db.Integer, nullable=False)
+    min_value = db.Column(db.Float, nullable=False)
+    max_value = db.Column(db.Float, nullable=False)
+    sum_value = db.Column(db.Float, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('window_start', 'sensor_id', name='uq_sensor_chunk_window_sensor'),
+        db.Index('ix_sensor_chunk_sensor_start', 'sensor_id', 'start_time'),
+    )
+
+def ensure_indexes():
+    """Create declared indexes on tables that predate them"""
+    # create_all() skips tables that already exist, including their indexes
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+
+def ensure_columns():
+    """Add declared nullable columns missing from tables that predate them"""
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing and column.nullable:
+                    column_type = column.type.compile(dialect=db.engine.dialect)
+                    connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+
+def ensure_sensors():
+    """Register sensors that only appear in readings written before the Sensor table existed"""
+    registered = select(Sensor.sensor_id)
+    latest_ids = select(func.max(SensorData.id)).where(
+        SensorData.sensor_id.not_in(registered)
+    ).group_by(SensorData.sensor_id)
+    now = datetime.utcnow()
+    with db.engine.begin() as connection:
+        connection.execute(insert(Sensor.__table__).from_select(
+            ['sensor_id', 'sensor_type', 'latitude', 'longitude', 'created_at', 'updated_at'],
+            select(SensorData.sensor_id, SensorData.sensor_type, SensorData.latitude, SensorData.longitude,
+                   literal(now), literal(now)).where(SensorData.id.in_(latest_ids))
+        ))
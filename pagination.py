@@ -0,0 +1,124 @@
+import math
+from datetime import datetime, timezone
+
+# Query parameters that switch a list endpoint into incremental/paginated mode
+PAGINATION_PARAMS = ('limit', 'cursor', 'since_id', 'since')
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+
+
+class InvalidQuery(ValueError):
+    """A query parameter could not be parsed"""
+
+
+def is_paginated(args):
+    return any(name in args for name in PAGINATION_PARAMS)
+
+
+def parse_bbox(value):
+    """``min_lon,min_lat,max_lon,max_lat`` -> tuple of floats, or None"""
+    if not value:
+        return None
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(part) for part in value.split(','))
+    except ValueError:
+        raise InvalidQuery("bbox must be min_lon,min_lat,max_lon,max_lat")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def parse_int(args, name, default=None):
+    value = args.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise InvalidQuery(f"{name} must be an integer")
+
+
+def parse_float(args, name, default=None):
+    value = args.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        parsed = float(value)
+    except ValueError:
+        raise InvalidQuery(f"{name} must be a number")
+    if not math.isfinite(parsed):
+        raise InvalidQuery(f"{name} must be a number")
+    return parsed
+
+
+def parse_datetime(args, name):
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        # Timestamps are stored as naive UTC; accept a trailing Z too
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise InvalidQuery(f"{name} must be an ISO 8601 timestamp")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def apply_filters(query, model, args):
+    """Narrow a query by the common sensor_id / sensor_type / bbox / since filters"""
+    for name in ('sensor_id', 'sensor_type', 'severity', 'hazard_type'):
+        value = args.get(name)
+        if value and hasattr(model, name):
+            query = query.filter(getattr(model, name) == value)
+
+    bbox = parse_bbox(args.get('bbox'))
+    if bbox is not None:
+        min_lon, min_lat, max_lon, max_lat = bbox
+        query = query.filter(
+            model.latitude.between(min_lat, max_lat),
+            model.longitude.between(min_lon, max_lon)
+        )
+
+    since_id = parse_int(args, 'since_id')
+    if since_id is not None:
+        query = query.filter(model.id > since_id)
+    since = parse_datetime(args, 'since')
+    if since is not None:
+        query = query.filter(model.timestamp > since)
+    return query
+
+
+def keyset_page(query, model, args):
+    """Newest-first page by primary key; returns (rows, next_cursor)
+
+    ``cursor`` is the id of the last row of the previous page, so each page
+    is an index range scan on the primary key no matter how deep it is.
+    """
+    query, limit = keyset_query(query, model, args)
+    return split_page(query.all(), limit)
+
+
+def keyset_query(query, model, args):
+    """Apply the page's cursor, order and limit; returns (query, limit)"""
+    limit = max(1, min(parse_int(args, 'limit', DEFAULT_LIMIT), MAX_LIMIT))
+    cursor = parse_int(args, 'cursor')
+    if cursor is not None:
+        query = query.filter(model.id < cursor)
+    # One extra row tells whether there is a next page
+    return query.order_by(model.id.desc()).limit(limit + 1), limit
+
+
+def split_page(rows, limit):
+    """Rows of a keyset_query -> (rows, next_cursor)"""
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def latest_id(rows, args):
+    """``since_id`` for the next incremental refresh
+
+    Only a head page (no ``cursor``) starts at the newest row; deeper pages
+    keep the caller's ``since_id`` so following a cursor doesn't skip rows.
+    """
+    if rows and not args.get('cursor'):
+        return rows[0].id
+    return parse_int(args, 'since_id')
@@ -0,0 +1,86 @@
+"""Response bodies shared by the Flask routes and the async read API
+
+Kept free of Flask and the background services, so ``async_api`` can
+import it without building the Flask app's service graph.
+"""
+from models import SensorData
+from pagination import InvalidQuery, parse_float, parse_int
+
+# Sensor type, series label and colours for each chart
+CHART_TYPES = {
+    'tide_levels': {
+        'sensor_type': 'tide_gauge',
+        'label': 'Tide Level (m)',
+        'color': '#3498db',
+        'background': 'rgba(52, 152, 219, 0.1)'
+    },
+    'water_quality': {
+        'sensor_type': 'water_quality',
+        'label': 'Water Quality Index',
+        'color': '#2ecc71',
+        'background': 'rgba(46, 204, 113, 0.1)'
+    },
+    'weather': {
+        'sensor_type': 'weather_station',
+        'label': 'Wind Speed (km/h)',
+        'color': '#e74c3c',
+        'background': 'rgba(231, 76, 60, 0.1)'
+    }
+}
+
+# Reading fields as the API returns them; queried as plain columns so large
+# results skip ORM object construction, and timestamps are left to the JSON
+# encoder instead of being formatted row by row
+READING_FIELDS = (
+    SensorData.id, SensorData.sensor_id, SensorData.sensor_type, SensorData.latitude,
+    SensorData.longitude, SensorData.value, SensorData.unit, SensorData.timestamp
+)
+
+
+def serialize_alert(alert):
+    return {
+        'id': alert.id,
+        'hazard_type': alert.hazard_type,
+        'severity': alert.severity,
+        'latitude': alert.latitude,
+        'longitude': alert.longitude,
+        'description': alert.description,
+        'timestamp': alert.timestamp.isoformat(),
+        'sensor_id': alert.sensor_id,
+        'rule': alert.rule,
+        'trigger_count': alert.trigger_count or 1,
+        'last_triggered': (alert.last_triggered or alert.timestamp).isoformat()
+    }
+
+
+def chart_window(args):
+    """``(hours, points)`` of a chart request, clamped to what the rollups serve"""
+    hours = parse_float(args, 'hours', 24.0)
+    if hours <= 0:
+        raise InvalidQuery("hours must be positive")
+    points = parse_int(args, 'points', 20)
+    return min(hours, 24 * 30), max(2, min(points, 1000))
+
+
+def chart_payload(chart, hours, resolution, series):
+    """Chart.js body for query_series output"""
+    # Align all series on a shared label axis; sensors without a point at
+    # a given time get null so Chart.js leaves a gap
+    timestamps = sorted({t for times, _ in series.values() for t in times})
+    label_format = '%H:%M:%S' if resolution is None else '%H:%M' if hours <= 24 else '%d %b %H:%M'
+    datasets = []
+    for sensor_id, (times, values) in sorted(series.items()):
+        by_time = dict(zip(times, values))
+        datasets.append({
+            'label': f"{chart['label']} - {sensor_id}",
+            'sensor_id': sensor_id,
+            'data': [round(by_time[t], 3) if t in by_time else None for t in timestamps],
+            'borderColor': chart['color'],
+            'backgroundColor': chart['background']
+        })
+
+    return {
+        'labels': [t.strftime(label_format) for t in timestamps],
+        'resolution': resolution or 'raw',
+        'datasets': datasets
+    }
@@ -0,0 +1,98 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import Response, g, request
+
+
+class SamplingProfiler:
+    """Samples one thread's Python stack on a timer
+
+    ``folded()`` renders the samples as folded stacks (``frame;frame;frame
+    count`` per line), the input format of flamegraph.pl, speedscope and
+    most other flame graph viewers.
+    """
+
+    def __init__(self, thread_id, interval=0.002):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def folded(self):
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+
+class RequestProfiler:
+    """Opt-in profile of a single request, returned instead of its response
+
+    When enabled, a request with ``?profile=1`` or an ``X-Profile: 1``
+    header is sampled while its view runs and answered with the folded
+    stacks as text/plain. The original status is sent in
+    ``X-Profiled-Status``. Disabled by default: the profile exposes code
+    paths, and sampling slows the request down.
+    """
+
+    def __init__(self, app=None, enabled=False, interval=0.002):
+        self.enabled = enabled
+        self.interval = interval
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def _before_request(self):
+        if not self.enabled:
+            return
+        if request.args.get('profile') != '1' and request.headers.get('X-Profile') != '1':
+            return
+        profiler = SamplingProfiler(threading.get_ident(), self.interval)
+        g.request_profiler = (profiler, time.perf_counter())
+        profiler.start()
+
+    def _after_request(self, response):
+        entry = g.pop('request_profiler', None)
+        if entry is None:
+            return response
+        profiler, started = entry
+        profiler.stop()
+        return Response(profiler.folded(), mimetype='text/plain', headers={
+            'X-Profiled-Status': str(response.status_code),
+            'X-Profile-Samples': str(profiler.samples),
+            'X-Profile-Seconds': f"{time.perf_counter() - started:.6f}",
+            'Cache-Control': 'no-store',
+        })
+
+    def _teardown_request(self, exception):
+        # after_request is skipped when the view raises; stop the sampler anyway
+        entry = g.pop('request_profiler', None)
+        if entry is not None:
+            entry[0].stop()
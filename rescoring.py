@@ -0,0 +1,231 @@
+import json
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import create_engine, func, select
+
+from anomaly_detector import AnomalyDetector
+from model_registry import ModelRegistry
+from models import AnomalyDetection, SensorData
+
+logger = logging.getLogger(__name__)
+
+# Set in each worker process by _init_worker
+_engine = None
+_models = None
+
+# Bumped when the saved stream state changes meaning; older checkpoints are
+# ignored and their bucket rescored from the start (the upsert makes that safe)
+CHECKPOINT_FORMAT = 2
+
+
+def plan_partitions(connection, start, end, partitions):
+    """Split the sensors with readings in range into ``partitions`` buckets of similar size
+
+    A sensor's readings always stay in one bucket because its rolling
+    statistics depend on everything it reported before.
+    """
+    counts = connection.execute(
+        select(SensorData.sensor_id, func.count(SensorData.id)).where(
+            SensorData.timestamp >= start, SensorData.timestamp < end
+        ).group_by(SensorData.sensor_id)
+    ).all()
+    buckets = [[] for _ in range(partitions)]
+    sizes = [0] * partitions
+    # Largest first onto the lightest bucket keeps the buckets within one
+    # sensor's worth of each other
+    for sensor_id, count in sorted(counts, key=lambda item: (-item[1], item[0])):
+        lightest = sizes.index(min(sizes))
+        buckets[lightest].append(sensor_id)
+        sizes[lightest] += count
+    return [{'sensor_ids': sorted(ids), 'readings': size} for ids, size in zip(buckets, sizes) if ids]
+
+
+def _init_worker(database_url, registry_root, model_version):
+    global _engine, _models
+    # Writers from other workers hold SQLite's lock while they commit
+    connect_args = {'timeout': 60} if database_url.startswith('sqlite') else {}
+    _engine = create_engine(database_url, connect_args=connect_args)
+    loaded = ModelRegistry(registry_root).load(model_version) if model_version else None
+    _models = loaded[1] if loaded else {}
+
+
+def _upsert_statement(dialect):
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Rescoring is not supported on {dialect}")
+    stmt = insert(AnomalyDetection.__table__)
+    return stmt.on_conflict_do_update(
+        index_elements=['sensor_data_id'],
+        set_={
+            'sensor_id': stmt.excluded.sensor_id,
+            'anomaly_score': stmt.excluded.anomaly_score,
+            'is_anomaly': stmt.excluded.is_anomaly,
+            'timestamp': stmt.excluded.timestamp,
+        }
+    )
+
+
+def _load_checkpoint(path):
+    try:
+        with open(path) as f:
+            checkpoint = json.load(f)
+    except FileNotFoundError:
+        return None
+    return checkpoint if checkpoint.get('format') == CHECKPOINT_FORMAT else None
+
+
+def _save_checkpoint(path, checkpoint):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def score_partition(task):
+    """Rescore one bucket of sensors step by step, checkpointing after each step
+
+    Runs in a worker process. Returns the readings scored and flagged by this
+    call, which skips the steps an earlier run already checkpointed.
+    """
+    started = time.perf_counter()
+    end = datetime.fromisoformat(task['end'])
+    step = timedelta(hours=task['step_hours'])
+    checkpoint = _load_checkpoint(task['checkpoint']) or {
+        'format': CHECKPOINT_FORMAT, 'done_until': task['start'], 'streams': {}, 'scored': 0, 'anomalies': 0,
+    }
+
+    detector = AnomalyDetector()
+    detector.install_models(_models)
+    detector.streams.restore(checkpoint['streams'])
+
+    upsert = _upsert_statement(_engine.dialect.name)
+    sensor_ids = task['sensor_ids']
+    scored = anomalies = 0
+    window_start = datetime.fromisoformat(checkpoint['done_until'])
+    while window_start < end:
+        window_end = min(window_start + step, end)
+        with _engine.begin() as connection:
+            rows = connection.execute(
+                select(SensorData.id, SensorData.sensor_id, SensorData.sensor_type,
+                       SensorData.value, SensorData.timestamp).where(
+                    SensorData.sensor_id.in_(sensor_ids),
+                    SensorData.timestamp >= window_start,
+                    SensorData.timestamp < window_end
+                ).order_by(SensorData.timestamp, SensorData.id)
+            ).all()
+            if rows:
+                ids, row_sensor_ids, sensor_types, values, timestamps = zip(*rows)
+                result = detector.detect_stream(row_sensor_ids, values, sensor_types)
+                connection.execute(upsert, [{
+                    'sensor_data_id': reading_id,
+                    'sensor_id': sensor_id,
+                    'anomaly_score': score,
+                    'is_anomaly': is_anomaly,
+                    'timestamp': timestamp,
+                } for reading_id, sensor_id, timestamp, score, is_anomaly in zip(
+                    ids, row_sensor_ids, timestamps, result['score'].tolist(), result['is_anomaly'].tolist()
+                )])
+                flagged = int(np.count_nonzero(result['is_anomaly']))
+                scored += len(rows)
+                anomalies += flagged
+                checkpoint['scored'] += len(rows)
+                checkpoint['anomalies'] += flagged
+
+        # Written after the commit: a crash in between rescores one step,
+        # which the upsert makes harmless
+        checkpoint['done_until'] = window_end.isoformat()
+        checkpoint['streams'] = {sensor_id: list(state) for sensor_id, state in detector.streams.items()}
+        _save_checkpoint(task['checkpoint'], checkpoint)
+        window_start = window_end
+
+    return {'partition': task['partition'], 'scored': scored, 'anomalies': anomalies,
+            'seconds': time.perf_counter() - started}
+
+
+class Rescorer:
+    """Re-scores SensorData history into AnomalyDetection with a process pool
+
+    History in ``[start, end)`` is split into sensor buckets of similar size,
+    each walked forward in ``step_hours`` steps by one worker with vectorized
+    streaming detection; results replace existing ones through a bulk upsert
+    on ``sensor_data_id``. Rolling statistics start empty at ``start``, as if
+    ingest had begun then.
+
+    Workers score with the threshold rules plus ``model_version`` from the
+    registry, if given. Progress is checkpointed per bucket after every step
+    (including the rolling state) under ``checkpoint_dir``, so an interrupted
+    run resumes where it stopped when invoked again with the same range.
+    """
+
+    def __init__(self, database_url, checkpoint_dir, registry_root=None, model_version=None, workers=None,
+                 partitions=None, step_hours=24):
+        self.database_url = database_url
+        self.checkpoint_dir = checkpoint_dir
+        self.registry_root = registry_root
+        self.model_version = model_version
+        self.workers = workers or os.cpu_count() or 1
+        self.partitions = partitions or self.workers * 2
+        self.step_hours = step_hours
+
+    def run(self, start, end, restart=False):
+        """Score everything in range; returns a throughput report"""
+        job_dir = os.path.join(self.checkpoint_dir, f"{start:%Y%m%dT%H%M%S}-{end:%Y%m%dT%H%M%S}")
+        plan_path = os.path.join(job_dir, 'plan.json')
+        if restart and os.path.isdir(job_dir):
+            for name in os.listdir(job_dir):
+                os.remove(os.path.join(job_dir, name))
+        os.makedirs(job_dir, exist_ok=True)
+
+        # The bucket assignment is fixed on the first run, so checkpoints
+        # stay valid when the job is resumed after new data arrived
+        plan = _load_checkpoint(plan_path)
+        if plan is None:
+            engine = create_engine(self.database_url)
+            with engine.connect() as connection:
+                plan = {'partitions': plan_partitions(connection, start, end, self.partitions),
+                        'step_hours': self.step_hours}
+            engine.dispose()
+            _save_checkpoint(plan_path, plan)
+
+        tasks = [{
+            'partition': i,
+            'sensor_ids': partition['sensor_ids'],
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'step_hours': plan['step_hours'],
+            'checkpoint': os.path.join(job_dir, f'partition-{i:04d}.json'),
+        } for i, partition in enumerate(plan['partitions'])]
+
+        started = time.perf_counter()
+        results = []
+        with ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                 initargs=(self.database_url, self.registry_root, self.model_version)) as pool:
+            futures = [pool.submit(score_partition, task) for task in tasks]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                logger.info("Partition %d: %d readings in %.1fs", result['partition'], result['scored'],
+                            result['seconds'])
+        elapsed = time.perf_counter() - started
+
+        scored = sum(result['scored'] for result in results)
+        return {
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'workers': self.workers,
+            'partitions': len(tasks),
+            'model_version': self.model_version,
+            'scored': scored,
+            'anomalies': sum(result['anomalies'] for result in results),
+            'seconds': round(elapsed, 2),
+            'readings_per_second': round(scored / elapsed, 1) if elapsed else 0.0,
+        }
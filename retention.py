@@ -0,0 +1,92 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select
+
+from app import db
+from models import SensorData, HazardAlert, AnomalyDetection, SensorRollup
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionManager:
+    """Keeps each table's working set bounded to a configurable hot window
+
+    Rows older than the window are pruned in small id-ranged batches so a
+    single pass never holds a long write lock (important on SQLite, where a
+    large DELETE blocks the ingest writer for its whole duration).
+    """
+
+    def __init__(self, app=None, sensor_hours=48, alert_hours=24 * 7, anomaly_hours=48,
+                 rollup_hours=24 * 30, interval=600.0, chunk_size=5000):
+        self.app = app
+        self.windows = {
+            # Anomaly results reference readings, so they go first
+            AnomalyDetection: timedelta(hours=anomaly_hours),
+            SensorData: timedelta(hours=sensor_hours),
+            HazardAlert: timedelta(hours=alert_hours),
+            SensorRollup: timedelta(hours=rollup_hours),
+        }
+        # Extra conditions per table: open alerts are kept however old they are
+        self.conditions = {
+            HazardAlert: (HazardAlert.is_active == False,),
+        }
+        self.interval = interval
+        self.chunk_size = chunk_size
+
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_run = {}
+
+    def init_app(self, app):
+        self.app = app
+
+    def start(self):
+        """Start pruning in a background thread"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='retention', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def prune(self, now=None):
+        """Delete rows older than each table's hot window; returns counts per table"""
+        now = now or datetime.utcnow()
+        deleted = {}
+        for model, window in self.windows.items():
+            deleted[model.__tablename__] = self._prune_model(model, now - window)
+        self.last_run = {'at': now.isoformat(), 'deleted': deleted}
+        return deleted
+
+    def _prune_model(self, model, cutoff):
+        total = 0
+        while not self._stop.is_set():
+            batch = select(model.id).where(
+                model.timestamp < cutoff, *self.conditions.get(model, ())
+            ).limit(self.chunk_size)
+            result = db.session.execute(
+                delete(model).where(model.id.in_(batch.scalar_subquery())),
+                execution_options={'synchronize_session': False}
+            )
+            db.session.commit()
+            total += result.rowcount
+            if result.rowcount < self.chunk_size:
+                break
+        if total:
+            logger.info("Pruned %d %s rows older than %s", total, model.__tablename__, cutoff.isoformat())
+        return total
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                with self.app.app_context():
+                    self.prune()
+            except Exception:
+                logger.exception("Retention pass failed")
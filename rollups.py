@@ -0,0 +1,239 @@
+import logging
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import func, select
+
+from app import db
+from models import SensorData, SensorRollup
+
+logger = logging.getLogger(__name__)
+
+# Rollup tiers, finest first: 1 minute, 15 minutes, 1 hour
+ROLLUP_RESOLUTIONS = (60, 900, 3600)
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def bucket_start(timestamp, resolution):
+    """Start of the ``resolution``-second bucket containing ``timestamp``"""
+    seconds = int((timestamp - EPOCH).total_seconds())
+    return EPOCH + timedelta(seconds=seconds - seconds % resolution)
+
+
+def apply_rollups(rows):
+    """Fold newly ingested readings into every rollup tier"""
+    if not rows:
+        return
+    sensor_ids = np.array([row['sensor_id'] for row in rows], dtype=object)
+    unique_ids, sensor_codes = np.unique(sensor_ids, return_inverse=True)
+    sensor_types = np.empty(len(unique_ids), dtype=object)
+    sensor_types[sensor_codes] = [row['sensor_type'] for row in rows]
+    values = np.array([row['value'] for row in rows], dtype=np.float64)
+    seconds = np.array([row['timestamp'] for row in rows], dtype='datetime64[s]').astype(np.int64)
+
+    entries = []
+    for resolution in ROLLUP_RESOLUTIONS:
+        # Group by (sensor, bucket) and reduce each group's values in one pass
+        buckets = seconds - seconds % resolution
+        order = np.lexsort((buckets, sensor_codes))
+        codes, starts_at, ordered = sensor_codes[order], buckets[order], values[order]
+        boundary = np.flatnonzero(np.diff(codes) | np.diff(starts_at)) + 1
+        starts = np.concatenate(([0], boundary))
+        counts = np.diff(np.concatenate((starts, [len(order)])))
+        timestamps = starts_at[starts].astype('datetime64[s]').astype(object)
+        entries.extend({
+            'sensor_id': unique_ids[code],
+            'sensor_type': sensor_types[code],
+            'resolution': resolution,
+            'timestamp': timestamp,
+            'min_value': min_value,
+            'max_value': max_value,
+            'sum_value': sum_value,
+            'count': count,
+        } for code, timestamp, min_value, max_value, sum_value, count in zip(
+            codes[starts].tolist(), timestamps,
+            np.minimum.reduceat(ordered, starts).tolist(),
+            np.maximum.reduceat(ordered, starts).tolist(),
+            np.add.reduceat(ordered, starts).tolist(),
+            counts.tolist(),
+        ))
+
+    _upsert(entries)
+    db.session.commit()
+
+
+def _upsert(entries):
+    """Merge bucket partials into existing rollup rows in one statement"""
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        least, greatest = func.least, func.greatest
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        # SQLite's multi-argument min()/max() are scalar, like least/greatest
+        least, greatest = func.min, func.max
+    else:
+        raise NotImplementedError(f"Rollups are not supported on {dialect}")
+
+    # Core insert on the table: the ORM bulk path adds per-row bookkeeping
+    # that dominates at tens of thousands of buckets per flush
+    table = SensorRollup.__table__
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['sensor_id', 'resolution', 'timestamp'],
+        set_={
+            'min_value': least(table.c.min_value, stmt.excluded.min_value),
+            'max_value': greatest(table.c.max_value, stmt.excluded.max_value),
+            'sum_value': table.c.sum_value + stmt.excluded.sum_value,
+            'count': table.c.count + stmt.excluded.count,
+        }
+    )
+    db.session.execute(stmt, entries)
+
+
+def rebuild_rollups(since, chunk_size=50000):
+    """Recompute rollups from raw SensorData newer than ``since``
+
+    Raw readings are pruned long before their rollups, so ``since`` is
+    clamped to the first whole hour of raw data still in SensorData; older
+    rollups can't be recomputed and are left as they are.
+    """
+    oldest = db.session.scalar(select(func.min(SensorData.timestamp)))
+    if oldest is None:
+        logger.info("No raw readings to rebuild rollups from")
+        return 0
+    # Start on an hour boundary so every tier's first bucket is complete
+    hour = max(ROLLUP_RESOLUTIONS)
+    first_whole = bucket_start(oldest, hour)
+    if first_whole < oldest:
+        first_whole += timedelta(seconds=hour)
+    since = max(bucket_start(since, hour), first_whole)
+    db.session.query(SensorRollup).filter(SensorRollup.timestamp >= since).delete()
+    last_id = 0
+    total = 0
+    while True:
+        rows = db.session.execute(
+            select(SensorData.id, SensorData.sensor_id, SensorData.sensor_type, SensorData.value, SensorData.timestamp)
+            .where(SensorData.timestamp >= since, SensorData.id > last_id)
+            .order_by(SensorData.id)
+            .limit(chunk_size)
+        ).mappings().all()
+        if not rows:
+            break
+        apply_rollups(rows)
+        last_id = rows[-1]['id']
+        total += len(rows)
+    logger.info("Rebuilt rollups from %d readings since %s", total, since.isoformat())
+    return total
+
+
+def choose_resolution(seconds, points):
+    """Coarsest rollup tier that still gives at least ``points`` buckets, or None for raw"""
+    target = seconds / max(points, 1)
+    chosen = None
+    for resolution in ROLLUP_RESOLUTIONS:
+        if resolution <= target:
+            chosen = resolution
+    return chosen
+
+
+def query_series(sensor_type, start, end, points, sensor_id=None):
+    """Per-sensor ``(timestamps, values)`` series for a chart
+
+    Picks a rollup tier from the range and point budget and falls back to
+    raw readings for short ranges; either way each series is reduced to at
+    most ``points`` points with LTTB. Returns ``(resolution, series)`` where
+    resolution is the bucket width in seconds or None for raw data.
+    """
+    first = db.session.scalar(series_start_query(sensor_type, start))
+    resolution, query = series_query(sensor_type, start, end, points, first, sensor_id)
+    return resolution, reduce_series(db.session.execute(query), points)
+
+
+def series_start_query(sensor_type, start):
+    """Oldest finest-tier rollup bucket of a sensor type at or after ``start``"""
+    return select(func.min(SensorRollup.timestamp)).where(
+        SensorRollup.sensor_type == sensor_type,
+        SensorRollup.resolution == min(ROLLUP_RESOLUTIONS),
+        SensorRollup.timestamp >= bucket_start(start, min(ROLLUP_RESOLUTIONS))
+    )
+
+
+def series_query(sensor_type, start, end, points, first=None, sensor_id=None):
+    """``(resolution, query)`` selecting sensor_id, timestamp, value rows for a chart
+
+    ``first`` is the result of series_start_query. The query is plain SQL
+    so the async read API can run it too.
+    """
+    # Size the buckets to the data actually available, so a system that has
+    # only been running for an hour doesn't render a 24h range as one point
+    if first is not None:
+        start = max(start, first)
+    resolution = choose_resolution((end - start).total_seconds(), points)
+    if resolution is None:
+        query = select(SensorData.sensor_id, SensorData.timestamp, SensorData.value).where(
+            SensorData.sensor_type == sensor_type,
+            SensorData.timestamp >= start,
+            SensorData.timestamp <= end
+        ).order_by(SensorData.sensor_id, SensorData.timestamp)
+        if sensor_id:
+            query = query.where(SensorData.sensor_id == sensor_id)
+    else:
+        query = select(
+            SensorRollup.sensor_id, SensorRollup.timestamp, SensorRollup.sum_value / SensorRollup.count
+        ).where(
+            SensorRollup.sensor_type == sensor_type,
+            SensorRollup.resolution == resolution,
+            SensorRollup.timestamp >= bucket_start(start, resolution),
+            SensorRollup.timestamp <= end
+        ).order_by(SensorRollup.sensor_id, SensorRollup.timestamp)
+        if sensor_id:
+            query = query.where(SensorRollup.sensor_id == sensor_id)
+    return resolution, query
+
+
+def reduce_series(rows, points):
+    """Group series_query rows per sensor and LTTB-reduce each to ``points``"""
+    grouped = {}
+    for row_sensor_id, timestamp, value in rows:
+        series = grouped.setdefault(row_sensor_id, ([], []))
+        series[0].append(timestamp)
+        series[1].append(value)
+
+    series = {}
+    for row_sensor_id, (timestamps, values) in grouped.items():
+        keep = lttb_indices(
+            np.array([(t - EPOCH).total_seconds() for t in timestamps]), np.array(values, dtype=np.float64), points
+        )
+        series[row_sensor_id] = ([timestamps[i] for i in keep], [values[i] for i in keep])
+    return series
+
+
+def lttb_indices(x, y, threshold):
+    """Largest-Triangle-Three-Buckets downsampling; returns indices to keep"""
+    n = len(x)
+    if threshold >= n:
+        return list(range(n))
+    if threshold < 3:
+        return sorted(set(np.linspace(0, n - 1, max(threshold, 1)).astype(int).tolist()))
+
+    keep = [0]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle vertex
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        areas = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(areas))
+        keep.append(a)
+    keep.append(n - 1)
+    return keep
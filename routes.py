@@ -1,186 +1,653 @@
-from flask import render_template, jsonify, request
-from app import app, db
+from flask import Blueprint, render_template, jsonify, request, Response, stream_with_context
+from app import db
 from models import SensorData, HazardAlert, AnomalyDetection
+from payloads import CHART_TYPES, READING_FIELDS, chart_payload, chart_window, serialize_alert
 from data_simulator import DataSimulator
 from anomaly_detector import AnomalyDetector
+from ingest import IngestPipeline, SimulatorSource
+from ingest_formats import UnsupportedFormat, format_for, parse_columns, validate
+from retention import RetentionManager
+from model_registry import ModelRegistry, ModelTrainer
+from rollups import apply_rollups, lttb_indices, query_series, rebuild_rollups
+from stream import Broadcaster, StreamLimitReached
+from cache import ResponseCache, make_cache_backend
+from pagination import InvalidQuery, apply_filters, is_paginated, keyset_page, latest_id, parse_bbox, parse_datetime
+from timeseries import ChunkCompactor, ChunkedReadings, ChunkStore, SqlReadings
+from spatial import GridIndex
+from alerts import AlertEngine, default_rules
+from metrics import Registry, RequestMetrics
+from profiler import RequestProfiler
+from rescoring import Rescorer
+from sensors import SensorRegistry, latest_readings_query
+from serialization import FastJSONProvider, stream_array
 from datetime import datetime, timedelta
+from sqlalchemy import insert
+import click
+import fcntl
 import json
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Routes and CLI commands; create_app() registers this and binds the
+# background services below to the app via init_app()
+bp = Blueprint('main', __name__, cli_group=None)
 
 # Initialize data simulator and anomaly detector
 data_simulator = DataSimulator()
 anomaly_detector = AnomalyDetector()
 
-@app.route('/')
+# Background ingest: readings are produced and written independently of
+# dashboard polling, so the read endpoints below never write sensor data
+ingest_pipeline = IngestPipeline(
+    source=SimulatorSource(data_simulator, interval=float(os.environ.get("INGEST_INTERVAL", "10"))),
+    batch_size=int(os.environ.get("INGEST_BATCH_SIZE", "500")),
+    flush_interval=float(os.environ.get("INGEST_FLUSH_INTERVAL", "2")),
+)
+INGEST_MAX_BYTES = int(os.environ.get("INGEST_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Isolation forest models: loaded from the on-disk registry at startup and
+# refit from SensorData history in the background
+model_trainer = ModelTrainer(
+    anomaly_detector,
+    ModelRegistry(os.environ.get(
+        "MODEL_REGISTRY_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "models")
+    )),
+    history_hours=float(os.environ.get("MODEL_HISTORY_HOURS", "72")),
+    interval=float(os.environ.get("MODEL_RETRAIN_INTERVAL", "21600")),
+    n_jobs=int(os.environ.get("MODEL_N_JOBS", "1")),
+)
+
+# Prometheus metrics for this process (/metrics) and the opt-in per-request
+# profiler (?profile=1 or X-Profile: 1 when PROFILING_ENABLED=1)
+metrics_registry = Registry()
+request_metrics = RequestMetrics(metrics_registry)
+request_profiler = RequestProfiler(
+    enabled=os.environ.get("PROFILING_ENABLED", "0") == "1",
+    interval=float(os.environ.get("PROFILING_INTERVAL_MS", "2")) / 1000,
+)
+anomaly_scoring_seconds = metrics_registry.histogram(
+    'anomaly_scoring_seconds', 'Time to score one ingested batch for anomalies')
+anomaly_scored_readings = metrics_registry.counter(
+    'anomaly_scored_readings', 'Readings scored for anomalies')
+
+@bp.cli.command('train-models')
+def train_models_command():
+    """Fit anomaly models on SensorData history and save a new registry version"""
+    version = model_trainer.train()
+    print(f"Saved models {version}" if version else "Not enough history to train")
+
+def score_ingested_readings(rows):
+    """Score each newly written reading once and store the result
+
+    Later listeners read ``anomaly_score`` / ``is_anomaly`` off the rows.
+    """
+    with anomaly_scoring_seconds.time():
+        result = anomaly_detector.detect_stream(
+            [row['sensor_id'] for row in rows],
+            [row['value'] for row in rows],
+            [row['sensor_type'] for row in rows]
+        )
+    anomaly_scored_readings.inc(len(rows))
+    for row, score, is_anomaly in zip(rows, result['score'].tolist(), result['is_anomaly'].tolist()):
+        row['anomaly_score'] = score
+        row['is_anomaly'] = is_anomaly
+    db.session.execute(insert(AnomalyDetection.__table__), [{
+        'sensor_data_id': row['id'],
+        'sensor_id': row['sensor_id'],
+        'anomaly_score': row['anomaly_score'],
+        'is_anomaly': row['is_anomaly'],
+        'timestamp': row['timestamp'],
+    } for row in rows])
+    db.session.commit()
+
+ingest_pipeline.add_listener(score_ingested_readings)
+ingest_pipeline.add_listener(apply_rollups)
+
+# Spatial indexes for viewport, nearest-sensor and alert-correlation queries
+sensor_index = GridIndex(cell_degrees=float(os.environ.get("SPATIAL_CELL_DEGREES", "0.25")))
+alert_index = GridIndex(cell_degrees=float(os.environ.get("SPATIAL_CELL_DEGREES", "0.25")))
+
+# Sensor metadata from the Sensor table, cached in process; ingest registers
+# new sensors and keeps each sensor's latest reading in memory
+sensor_registry = SensorRegistry(
+    max_age=float(os.environ.get("SENSOR_CACHE_SECONDS", "60")),
+    stale_after=float(os.environ.get("SENSOR_STALE_SECONDS", "300")),
+)
+ingest_pipeline.add_write_hook(sensor_registry.register)
+
+def index_sensors(sensors):
+    """Add new, moved or renamed sensors to the spatial index"""
+    for sensor in sensors:
+        if sensor_index.get(sensor['sensor_id']) != sensor:
+            sensor_index.insert(sensor['sensor_id'], sensor['latitude'], sensor['longitude'], sensor)
+
+sensor_registry.add_listener(index_sensors)
+ingest_pipeline.add_listener(sensor_registry.record)
+
+def indexed_sensors():
+    """The spatial sensor index, (re)loaded from the registry when stale"""
+    sensor_registry.sensors()
+    return sensor_index
+
+# Rendered responses of the read endpoints, invalidated by the write paths
+# below; tags: readings, alerts, stats
+response_cache = ResponseCache(
+    make_cache_backend(os.environ.get("CACHE_REDIS_URL"), max_entries=int(os.environ.get("CACHE_MAX_ENTRIES", "512"))),
+    default_ttl=float(os.environ.get("CACHE_TTL", "30")),
+)
+
+# Single in-process fan-out for /api/stream: events are produced once on the
+# write path and shared by every connected dashboard. Each open stream holds
+# a gthread worker thread, so by default a quarter of the threads stay free
+# for every other request (see gunicorn.conf.py)
+STREAM_MAX_CLIENTS = int(os.environ.get(
+    "STREAM_MAX_CLIENTS", str(int(os.environ.get("GUNICORN_THREADS", "32")) * 3 // 4)
+))
+broadcaster = Broadcaster(max_subscribers=STREAM_MAX_CLIENTS)
+STREAM_MAX_SECONDS = float(os.environ.get("STREAM_MAX_SECONDS", "300"))
+
+def evaluate_alert_rules(rows):
+    """Open, escalate and resolve hazard alerts from each ingested batch"""
+    changes = alert_engine.evaluate(
+        rows, [row.get('is_anomaly', False) for row in rows]
+    )
+    if changes:
+        response_cache.invalidate('alerts', 'stats')
+        for action, alert in changes:
+            broadcaster.publish('alert', dict(alert, action=action))
+
+def publish_ingested_readings(rows):
+    """Push new readings, their anomaly flags and fresh stats to stream clients"""
+    response_cache.invalidate('readings', 'stats')
+    readings = []
+    for row in rows:
+        readings.append(dict(
+            serialize_reading_row(row),
+            anomaly_score=row.get('anomaly_score', 0.0),
+            is_anomaly=row.get('is_anomaly', False)
+        ))
+    broadcaster.publish('readings', readings)
+    broadcaster.publish('stats', compute_dashboard_stats())
+
+ingest_pipeline.add_listener(evaluate_alert_rules)
+ingest_pipeline.add_listener(publish_ingested_readings)
+
+@bp.cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    """Recompute chart rollups from the raw readings still in SensorData"""
+    total = rebuild_rollups(datetime.utcnow() - timedelta(days=30))
+    print(f"Rolled up {total} readings")
+
+# Prune rows outside the hot window so queries stay bounded as the system runs
+retention_manager = RetentionManager(
+    sensor_hours=float(os.environ.get("RETENTION_SENSOR_HOURS", "48")),
+    alert_hours=float(os.environ.get("RETENTION_ALERT_HOURS", "168")),
+    anomaly_hours=float(os.environ.get("RETENTION_ANOMALY_HOURS", "48")),
+    rollup_hours=float(os.environ.get("RETENTION_ROLLUP_HOURS", "720")),
+)
+
+# Reading history for the per-sensor history routes: with the chunk store
+# on, sealed windows are compacted out of SensorData into memory-mapped
+# column files and history outlives the table's retention window
+CHUNK_STORE_ENABLED = os.environ.get("CHUNK_STORE_ENABLED", "0") == "1"
+chunk_store = ChunkStore(
+    os.environ.get("CHUNK_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "chunks")),
+    window_seconds=int(os.environ.get("CHUNK_WINDOW_SECONDS", "3600")),
+)
+chunk_compactor = ChunkCompactor(
+    chunk_store,
+    seal_after=float(os.environ.get("CHUNK_SEAL_AFTER_SECONDS", "3600")),
+    interval=float(os.environ.get("CHUNK_COMPACT_INTERVAL", "300")),
+)
+reading_history = ChunkedReadings(chunk_store) if CHUNK_STORE_ENABLED else SqlReadings()
+
+@bp.cli.command('compact-chunks')
+def compact_chunks_command():
+    """Seal every due SensorData window into the chunk store"""
+    chunk_compactor.max_windows = 10 ** 6
+    result = chunk_compactor.compact()
+    print(f"Sealed {result['readings']} readings into {result['windows']} windows")
+
+RESCORE_CHECKPOINT_DIR = os.environ.get(
+    "RESCORE_CHECKPOINT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "rescore")
+)
+
+@bp.cli.command('rescore')
+@click.option('--start', type=click.DateTime(), required=True, help='Start of the range (UTC)')
+@click.option('--end', type=click.DateTime(), required=True, help='End of the range (UTC, exclusive)')
+@click.option('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+@click.option('--partitions', type=int, default=None, help='Sensor buckets (default: 2 per worker)')
+@click.option('--step-hours', type=float, default=24.0, help='Hours scored per checkpoint')
+@click.option('--model-version', default=None, help='Registry version to score with (default: latest)')
+@click.option('--restart', is_flag=True, help='Discard checkpoints from an earlier run of this range')
+def rescore_command(start, end, workers, partitions, step_hours, model_version, restart):
+    """Re-score SensorData history into AnomalyDetection in parallel; resumes an interrupted run"""
+    rescorer = Rescorer(
+        db.engine.url.render_as_string(hide_password=False),
+        RESCORE_CHECKPOINT_DIR,
+        registry_root=model_trainer.registry.root,
+        model_version=model_version or model_trainer.registry.latest_version(),
+        workers=workers,
+        partitions=partitions,
+        step_hours=step_hours,
+    )
+    result = rescorer.run(start, end, restart=restart)
+    print(f"Scored {result['scored']} readings ({result['anomalies']} anomalies) in {result['seconds']}s: "
+          f"{result['readings_per_second']} readings/s with {result['workers']} workers")
+
+def collect_service_metrics():
+    """Ingest and response cache counters, read from their own stats at scrape time"""
+    ingest = ingest_pipeline.stats()
+    yield 'ingest_readings_received_total', 'counter', 'Readings accepted into the ingest queue', ingest['received']
+    yield 'ingest_readings_dropped_total', 'counter', 'Readings dropped because the ingest queue was full', ingest['dropped']
+    yield 'ingest_readings_written_total', 'counter', 'Readings written to the database', ingest['written']
+    yield 'ingest_flushes_total', 'counter', 'Successful ingest flushes', ingest['flushes']
+    yield 'ingest_failed_flushes_total', 'counter', 'Failed ingest flushes', ingest['failed_flushes']
+    yield 'ingest_flush_seconds_total', 'counter', 'Time spent in successful ingest flushes', ingest['total_flush_ms'] / 1000
+    yield 'ingest_queue_depth', 'gauge', 'Readings waiting in the ingest queue', ingest['queue_depth']
+    cache = response_cache.stats()
+    for name in ('hits', 'misses', 'not_modified', 'invalidations'):
+        yield f'response_cache_{name}_total', 'counter', f'Response cache {name.replace("_", " ")}', cache[name]
+    yield 'response_cache_bytes_saved_total', 'counter', 'Response bytes saved by 304 Not Modified answers', cache['bytes_saved']
+    yield 'response_cache_entries', 'gauge', 'Responses held in the cache', cache['entries']
+    yield 'active_alerts', 'gauge', 'Open hazard alerts', count_active_alerts()
+    yield 'stream_clients', 'gauge', 'Open /api/stream connections', broadcaster.subscribers
+
+metrics_registry.add_collector(collect_service_metrics)
+
+def init_app(app):
+    """Register the routes and bind the background services to ``app``"""
+    app.register_blueprint(bp)
+    app.json = FastJSONProvider(app)
+    request_metrics.init_app(app)
+    request_profiler.init_app(app)
+    for service in (ingest_pipeline, model_trainer, retention_manager, chunk_compactor):
+        service.init_app(app)
+
+# Held open for the life of the process that owns the background services
+_services_lock = None
+
+def start_services(app):
+    """Start ingest, retention and model training in this process
+
+    Readings, open alerts and the stream history live in the process that
+    runs these, so only one process per instance directory may start them;
+    the rest return False and serve database-backed reads.
+    """
+    global _services_lock
+    os.makedirs(app.instance_path, exist_ok=True)
+    lock = open(os.path.join(app.instance_path, 'services.lock'), 'w')
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock.close()
+        logger.info("Background services already running in another process")
+        return False
+    _services_lock = lock
+
+    with app.app_context():
+        alert_engine.load()
+        sensor_registry.register([{
+            'sensor_id': sensor_id,
+            'sensor_type': sensor_info['type'],
+            'name': sensor_info['name'],
+            'location': sensor_info['location'],
+            'state': sensor_info['state'],
+            'country': sensor_info['country'],
+            'latitude': sensor_info['lat'],
+            'longitude': sensor_info['lon'],
+        } for sensor_id, sensor_info in data_simulator.sensors.items()])
+        db.session.commit()
+        sensor_registry.warm(datetime.utcnow() - timedelta(hours=1))
+    if os.environ.get("INGEST_ENABLED", "1") == "1":
+        ingest_pipeline.start()
+    if os.environ.get("RETENTION_ENABLED", "1") == "1":
+        retention_manager.start()
+    if CHUNK_STORE_ENABLED:
+        chunk_compactor.start()
+    if os.environ.get("MODEL_TRAINING_ENABLED", "1") == "1":
+        model_trainer.start()
+    return True
+
+@bp.route('/')
 def dashboard():
     """Main dashboard route"""
     return render_template('dashboard.html')
 
-@app.route('/api/sensor-data')
+def serialize_reading_row(row):
+    return {
+        'id': row['id'],
+        'sensor_id': row['sensor_id'],
+        'sensor_type': row['sensor_type'],
+        'latitude': row['latitude'],
+        'longitude': row['longitude'],
+        'value': row['value'],
+        'unit': row['unit'],
+        'timestamp': row['timestamp'].isoformat()
+    }
+
+# Alerts come from rules over the incoming readings; the engine keeps the
+# open alerts in memory (and in alert_index) and resolves them once quiet
+alert_engine = AlertEngine(
+    default_rules(),
+    alert_index,
+    serialize=serialize_alert,
+    coalesce_km=float(os.environ.get("ALERT_COALESCE_KM", "5")),
+    resolve_after=float(os.environ.get("ALERT_RESOLVE_SECONDS", "600")),
+)
+
+STREAM_CHUNK_ROWS = int(os.environ.get("STREAM_CHUNK_ROWS", "1000"))
+
+def serialize_reading(row):
+    return row._asdict()
+
+def rows_response(query):
+    """Respond with the rows of a column query
+
+    ``layout=rows`` (default) is a list of objects; ``layout=columns`` is one
+    array per field, ``{"timestamp": [...], "value": [...], ...}``.
+    ``stream=1`` sends the rows in chunks as they are read instead of
+    building the whole body first.
+    """
+    layout = request.args.get('layout', 'rows')
+    if layout not in ('rows', 'columns'):
+        raise InvalidQuery("layout must be rows or columns")
+    fields = [column['name'] for column in query.column_descriptions]
+
+    if request.args.get('stream') == '1':
+        if layout != 'rows':
+            raise InvalidQuery("stream=1 supports layout=rows only")
+        result = db.session.execute(query.statement.execution_options(yield_per=STREAM_CHUNK_ROWS))
+        chunks = ([dict(zip(fields, row)) for row in partition] for partition in result.partitions())
+        return Response(stream_with_context(stream_array(chunks)), mimetype='application/json')
+
+    rows = query.all()
+    if layout == 'columns':
+        columns = list(zip(*rows)) or [()] * len(fields)
+        return jsonify(dict(zip(fields, columns)))
+    return jsonify([dict(zip(fields, row)) for row in rows])
+
+def paged_response(rows, next_cursor, serialize):
+    """Envelope for incremental/paginated list responses"""
+    return jsonify({
+        'items': [serialize(row) for row in rows],
+        'next_cursor': next_cursor,
+        # Cursor for the next incremental refresh (?since_id=)
+        'latest_id': latest_id(rows, request.args)
+    })
+
+@bp.app_errorhandler(InvalidQuery)
+def handle_invalid_query(error):
+    return jsonify({'error': str(error)}), 400
+
+@bp.route('/api/sensor-data')
+@response_cache.cached('readings')
 def get_sensor_data():
-    """Get current sensor data for the dashboard"""
-    # Generate and store new sensor data
-    new_data = data_simulator.generate_sensor_readings()
-    
-    for reading in new_data:
-        sensor_data = SensorData()
-        sensor_data.sensor_id = reading['sensor_id']
-        sensor_data.sensor_type = reading['sensor_type']
-        sensor_data.latitude = reading['latitude']
-        sensor_data.longitude = reading['longitude']
-        sensor_data.value = reading['value']
-        sensor_data.unit = reading['unit']
-        db.session.add(sensor_data)
-    
-    db.session.commit()
-    
+    """Get current sensor data for the dashboard
+
+    Filters: sensor_id, sensor_type, bbox=min_lon,min_lat,max_lon,max_lat.
+    With limit/cursor/since_id/since the response is one newest-first page
+    ``{items, next_cursor, latest_id}`` instead of the whole last hour;
+    otherwise ``layout`` and ``stream`` apply as described in rows_response.
+    """
     # Get recent data (last hour)
-    recent_data = SensorData.query.filter(
+    query = apply_filters(db.session.query(*READING_FIELDS).filter(
         SensorData.timestamp >= datetime.utcnow() - timedelta(hours=1)
-    ).order_by(SensorData.timestamp.desc()).all()
-    
-    return jsonify([{
-        'id': data.id,
-        'sensor_id': data.sensor_id,
-        'sensor_type': data.sensor_type,
-        'latitude': data.latitude,
-        'longitude': data.longitude,
-        'value': data.value,
-        'unit': data.unit,
-        'timestamp': data.timestamp.isoformat()
-    } for data in recent_data])
-
-@app.route('/api/hazard-alerts')
-def get_hazard_alerts():
-    """Get active hazard alerts"""
-    # Generate new alerts based on sensor data
-    alerts = data_simulator.generate_hazard_alerts()
+    ), SensorData, request.args)
     
-    for alert in alerts:
-        hazard_alert = HazardAlert()
-        hazard_alert.hazard_type = alert['hazard_type']
-        hazard_alert.severity = alert['severity']
-        hazard_alert.latitude = alert['latitude']
-        hazard_alert.longitude = alert['longitude']
-        hazard_alert.description = alert['description']
-        db.session.add(hazard_alert)
+    if is_paginated(request.args):
+        return paged_response(*keyset_page(query, SensorData, request.args), serialize_reading)
     
-    db.session.commit()
+    return rows_response(query.order_by(SensorData.timestamp.desc()))
+
+@bp.route('/api/ingest', methods=['POST'])
+def ingest_readings():
+    """Store a batch of readings sent as JSON Lines, CSV, msgpack or Arrow IPC
+
+    The format comes from the Content-Type (or ``?format=``). Rows are
+    validated together, invalid ones are counted per reason and skipped, and
+    the rest are written in one bulk insert before the response is sent.
+    """
+    if request.content_length and request.content_length > INGEST_MAX_BYTES:
+        return jsonify({'error': f'Batch exceeds {INGEST_MAX_BYTES} bytes'}), 413
+    try:
+        payload_format = format_for(request.content_type, request.args.get('format'))
+        columns = parse_columns(request.get_data(cache=False), payload_format)
+        rows, rejected = validate(columns)
+    except UnsupportedFormat as e:
+        return jsonify({'error': str(e)}), 415
+    except ValueError as e:
+        return jsonify({'error': f'Malformed {request.content_type} payload: {e}'}), 400
+
+    if rows and not ingest_pipeline.write(rows):
+        return jsonify({'error': 'Failed to store readings'}), 503
+    return jsonify({
+        'format': payload_format,
+        'received': len(rows) + sum(rejected.values()),
+        'accepted': len(rows),
+        'rejected': sum(rejected.values()),
+        'rejections': rejected,
+    })
+
+@bp.route('/api/ingest-stats')
+def get_ingest_stats():
+    """Get ingest pipeline queue depth and flush metrics"""
+    return jsonify(ingest_pipeline.stats())
+
+@bp.route('/api/sensors')
+def get_sensors():
+    """Sensors inside ``bbox`` (the map viewport) with their latest reading"""
+    bbox = parse_bbox(request.args.get('bbox'))
+    if bbox is None:
+        sensors = indexed_sensors().items()
+    else:
+        min_lon, min_lat, max_lon, max_lat = bbox
+        sensors = indexed_sensors().bbox(min_lat, min_lon, max_lat, max_lon)
     
-    # Get active alerts
-    active_alerts = HazardAlert.query.filter(
-        HazardAlert.is_active == True,
-        HazardAlert.timestamp >= datetime.utcnow() - timedelta(hours=24)
-    ).order_by(HazardAlert.timestamp.desc()).all()
+    latest = latest_readings([sensor_id for sensor_id, _ in sensors])
+    return jsonify([dict(sensor, latest=latest.get(sensor_id), health=sensor_registry.health(latest.get(sensor_id)))
+                    for sensor_id, sensor in sensors])
+
+@bp.route('/api/sensors/<sensor_id>')
+def get_sensor(sensor_id):
+    """One sensor's metadata, latest reading and health"""
+    sensor = sensor_registry.get(sensor_id)
+    if sensor is None:
+        return jsonify({'error': 'Unknown sensor'}), 404
+    latest = latest_readings([sensor_id]).get(sensor_id)
+    return jsonify(dict(sensor, latest=latest, health=sensor_registry.health(latest)))
+
+@bp.route('/api/sensors/nearest')
+def get_nearest_sensors():
+    """The ``k`` sensors nearest to ``lat``/``lon``"""
+    lat = request.args.get('lat', type=float)
+    lon = request.args.get('lon', type=float)
+    if lat is None or lon is None:
+        raise InvalidQuery("lat and lon are required")
+    k = max(1, min(request.args.get('k', 1, type=int), 100))
+    return jsonify([dict(sensor, distance_km=round(distance, 3))
+                    for _, sensor, distance in indexed_sensors().nearest(lat, lon, k)])
+
+@bp.route('/api/sensors/<sensor_id>/alerts')
+def get_alerts_near_sensor(sensor_id):
+    """Active alerts within ``radius_km`` of a sensor, nearest first"""
+    location = indexed_sensors().location(sensor_id)
+    if location is None:
+        return jsonify({'error': 'Unknown sensor'}), 404
+    radius_km = max(0.0, min(request.args.get('radius_km', 10.0, type=float), 500.0))
+    return jsonify([dict(alert, distance_km=round(distance, 3))
+                    for _, alert, distance in open_alert_index().within_radius(location[0], location[1], radius_km)])
+
+def open_alert_index():
+    """Open alerts by location: the alert engine's index where it runs, else loaded from the table"""
+    if alert_engine.tracking:
+        return alert_index
+    index = GridIndex(cell_degrees=alert_index.cell_degrees)
+    for alert in HazardAlert.query.filter(HazardAlert.is_active == True):
+        index.insert(alert.id, alert.latitude, alert.longitude, serialize_alert(alert))
+    return index
+
+def count_active_alerts():
+    if alert_engine.tracking:
+        return len(alert_engine)
+    return HazardAlert.query.filter(HazardAlert.is_active == True).count()
+
+def history_range():
+    """``start`` / ``end`` query parameters, defaulting to the last 24 hours"""
+    end = parse_datetime(request.args, 'end') or datetime.utcnow()
+    start = parse_datetime(request.args, 'start') or end - timedelta(hours=24)
+    if start > end:
+        raise InvalidQuery("start must be before end")
+    return start, end
+
+@bp.route('/api/sensors/<sensor_id>/history')
+@response_cache.cached('readings')
+def get_sensor_history(sensor_id):
+    """One sensor's readings between ``start`` and ``end`` as columns
+
+    ``points`` downsamples the series with LTTB.
+    """
+    start, end = history_range()
+    timestamps, values = reading_history.series(sensor_id, start, end)
+    points = request.args.get('points', type=int)
+    if points and points < len(values):
+        keep = lttb_indices(timestamps.astype(np.int64) / 1e6, np.asarray(values), points)
+        timestamps, values = timestamps[keep], values[keep]
+    return jsonify({'sensor_id': sensor_id, 'timestamp': timestamps, 'value': values})
+
+@bp.route('/api/sensors/<sensor_id>/summary')
+@response_cache.cached('readings')
+def get_sensor_summary(sensor_id):
+    """Count, min, max and mean of one sensor's readings between ``start`` and ``end``"""
+    start, end = history_range()
+    return jsonify(dict(reading_history.summary(sensor_id, start, end), sensor_id=sensor_id,
+                        start=start, end=end))
+
+def latest_readings(sensor_ids):
+    """Most recent reading in the last hour for each of ``sensor_ids``, with its anomaly flag
+
+    Served from the sensor registry in the process that runs ingest; other
+    processes query the table.
+    """
+    if not sensor_ids:
+        return {}
+    since = datetime.utcnow() - timedelta(hours=1)
+    if sensor_registry.tracking:
+        return sensor_registry.latest(sensor_ids, since)
+    rows = db.session.execute(latest_readings_query(since, sensor_ids)).all()
+    return {row.sensor_id: dict(serialize_reading(row), is_anomaly=bool(row.is_anomaly)) for row in rows}
+
+@bp.route('/api/cache-stats')
+def get_cache_stats():
+    """Get response cache hit/miss ratio and bytes saved by 304 responses"""
+    return jsonify(response_cache.stats())
+
+@bp.route('/metrics')
+def get_metrics():
+    """Prometheus scrape endpoint for this process"""
+    return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
+
+@bp.route('/api/stream')
+def stream_events():
+    """Server-sent events: new readings, alert changes and stats as deltas"""
+    # EventSource resends the last id it saw in Last-Event-ID on reconnect
+    cursor = request.headers.get('Last-Event-ID') or request.args.get('cursor')
+    try:
+        events = broadcaster.subscribe(cursor, max_seconds=STREAM_MAX_SECONDS)
+    except StreamLimitReached:
+        # EventSource gives up on a 503; the dashboard falls back to polling
+        return jsonify({'error': 'Too many open streams'}), 503, {'Retry-After': '60'}
+    return Response(
+        events,
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@bp.route('/api/hazard-alerts')
+@response_cache.cached('alerts')
+def get_hazard_alerts():
+    """Get active hazard alerts
+
+    Filters: sensor_id, severity, hazard_type, bbox; paging as for
+    /api/sensor-data.
+    """
+    query = apply_filters(HazardAlert.query.filter(HazardAlert.is_active == True), HazardAlert, request.args)
+    if is_paginated(request.args):
+        return paged_response(*keyset_page(query, HazardAlert, request.args), serialize_alert)
     
-    return jsonify([{
-        'id': alert.id,
-        'hazard_type': alert.hazard_type,
-        'severity': alert.severity,
-        'latitude': alert.latitude,
-        'longitude': alert.longitude,
-        'description': alert.description,
-        'timestamp': alert.timestamp.isoformat()
-    } for alert in active_alerts])
-
-@app.route('/api/anomaly-detection')
+    if alert_engine.tracking:
+        # The open set is held in memory by the alert engine; no table scan
+        return jsonify(alert_engine.active_alerts(
+            bbox=parse_bbox(request.args.get('bbox')),
+            severity=request.args.get('severity') or None,
+            hazard_type=request.args.get('hazard_type') or None,
+            sensor_id=request.args.get('sensor_id') or None
+        ))
+    return jsonify([serialize_alert(alert)
+                    for alert in query.order_by(HazardAlert.timestamp.desc(), HazardAlert.id.desc())])
+
+@bp.route('/api/anomaly-detection')
+@response_cache.cached('readings')
 def get_anomaly_detection():
-    """Get anomaly detection results"""
-    # Get recent sensor data for anomaly detection
-    recent_sensors = SensorData.query.filter(
+    """Get anomaly results for the last hour's readings
+
+    Results are written once per reading at ingest; this only reads them.
+    Filters: sensor_id, sensor_type, bbox; ``layout`` and ``stream`` as
+    described in rows_response.
+    """
+    query = apply_filters(db.session.query(
+        SensorData.sensor_id,
+        SensorData.sensor_type,
+        SensorData.value,
+        SensorData.timestamp,
+        AnomalyDetection.anomaly_score,
+        AnomalyDetection.is_anomaly
+    ).join(
+        AnomalyDetection, AnomalyDetection.sensor_data_id == SensorData.id
+    ).filter(
         SensorData.timestamp >= datetime.utcnow() - timedelta(hours=1)
-    ).all()
-    
-    anomalies = []
-    for sensor in recent_sensors:
-        anomaly_result = anomaly_detector.detect_anomaly(sensor.value, sensor.sensor_type)
-        
-        anomaly_detection = AnomalyDetection()
-        anomaly_detection.sensor_id = sensor.sensor_id
-        anomaly_detection.anomaly_score = float(anomaly_result['score'])
-        anomaly_detection.is_anomaly = anomaly_result['is_anomaly']
-        db.session.add(anomaly_detection)
-        anomalies.append({
-            'sensor_id': sensor.sensor_id,
-            'sensor_type': sensor.sensor_type,
-            'value': sensor.value,
-            'anomaly_score': anomaly_result['score'],
-            'is_anomaly': anomaly_result['is_anomaly'],
-            'timestamp': sensor.timestamp.isoformat()
-        })
+    ), SensorData, request.args)
     
-    db.session.commit()
-    return jsonify(anomalies)
+    return rows_response(query.order_by(SensorData.timestamp.desc()))
 
-@app.route('/api/dashboard-stats')
-def get_dashboard_stats():
-    """Get dashboard statistics"""
-    total_sensors = len(data_simulator.sensors)
-    active_alerts = HazardAlert.query.filter(
-        HazardAlert.is_active == True,
-        HazardAlert.timestamp >= datetime.utcnow() - timedelta(hours=24)
-    ).count()
+def compute_dashboard_stats():
+    total_sensors = len(sensor_registry)
+    active_alerts = count_active_alerts()
     
     recent_anomalies = AnomalyDetection.query.filter(
         AnomalyDetection.is_anomaly == True,
         AnomalyDetection.timestamp >= datetime.utcnow() - timedelta(hours=1)
     ).count()
     
-    return jsonify({
+    return {
         'total_sensors': total_sensors,
         'active_alerts': active_alerts,
         'recent_anomalies': recent_anomalies,
         'system_status': 'operational'
-    })
+    }
 
-@app.route('/api/chart-data/<chart_type>')
+@bp.route('/api/dashboard-stats')
+@response_cache.cached('stats')
+def get_dashboard_stats():
+    """Get dashboard statistics"""
+    return jsonify(compute_dashboard_stats())
+
+@bp.route('/api/chart-data/<chart_type>')
+@response_cache.cached('readings')
 def get_chart_data(chart_type):
-    """Get data for different chart types"""
-    if chart_type == 'tide_levels':
-        data = SensorData.query.filter(
-            SensorData.sensor_type == 'tide_gauge',
-            SensorData.timestamp >= datetime.utcnow() - timedelta(hours=24)
-        ).order_by(SensorData.timestamp).all()
-        
-        return jsonify({
-            'labels': [d.timestamp.strftime('%H:%M') for d in data[-20:]],
-            'datasets': [{
-                'label': 'Tide Level (m)',
-                'data': [d.value for d in data[-20:]],
-                'borderColor': '#3498db',
-                'backgroundColor': 'rgba(52, 152, 219, 0.1)'
-            }]
-        })
-    
-    elif chart_type == 'water_quality':
-        data = SensorData.query.filter(
-            SensorData.sensor_type == 'water_quality',
-            SensorData.timestamp >= datetime.utcnow() - timedelta(hours=24)
-        ).order_by(SensorData.timestamp).all()
-        
-        return jsonify({
-            'labels': [d.timestamp.strftime('%H:%M') for d in data[-20:]],
-            'datasets': [{
-                'label': 'Water Quality Index',
-                'data': [d.value for d in data[-20:]],
-                'borderColor': '#2ecc71',
-                'backgroundColor': 'rgba(46, 204, 113, 0.1)'
-            }]
-        })
-    
-    elif chart_type == 'weather':
-        data = SensorData.query.filter(
-            SensorData.sensor_type == 'weather_station',
-            SensorData.timestamp >= datetime.utcnow() - timedelta(hours=24)
-        ).order_by(SensorData.timestamp).all()
-        
-        return jsonify({
-            'labels': [d.timestamp.strftime('%H:%M') for d in data[-20:]],
-            'datasets': [{
-                'label': 'Wind Speed (km/h)',
-                'data': [d.value for d in data[-20:]],
-                'borderColor': '#e74c3c',
-                'backgroundColor': 'rgba(231, 76, 60, 0.1)'
-            }]
-        })
+    """Get data for different chart types, one series per sensor"""
+    chart = CHART_TYPES.get(chart_type)
+    if chart is None:
+        return jsonify({'error': 'Invalid chart type'})
     
-    return jsonify({'error': 'Invalid chart type'})
+    hours, points = chart_window(request.args)
+    end = datetime.utcnow()
+    resolution, series = query_series(
+        chart['sensor_type'], end - timedelta(hours=hours), end, points,
+        sensor_id=request.args.get('sensor_id')
+    )
+    return jsonify(chart_payload(chart, hours, resolution, series))
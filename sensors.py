@@ -0,0 +1,182 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app import db
+from models import AnomalyDetection, Sensor, SensorData
+
+logger = logging.getLogger(__name__)
+
+# Sensor columns cached per sensor; readings may carry any of them
+METADATA_FIELDS = ('sensor_type', 'name', 'location', 'state', 'country', 'latitude', 'longitude')
+# Fields of the latest reading kept per sensor
+STATUS_FIELDS = ('id', 'sensor_id', 'sensor_type', 'latitude', 'longitude', 'value', 'unit', 'timestamp')
+
+
+def latest_readings_query(since, sensor_ids=None):
+    """Newest reading (by timestamp) of each sensor at or after ``since``, with its anomaly flag
+
+    Readings can be written out of time order (backfills, HTTP batches), so
+    the highest id is not necessarily the latest reading.
+    """
+    ranked = select(SensorData.id, func.row_number().over(
+        partition_by=SensorData.sensor_id, order_by=(SensorData.timestamp.desc(), SensorData.id.desc())
+    ).label('rank')).where(SensorData.timestamp >= since)
+    if sensor_ids is not None:
+        ranked = ranked.where(SensorData.sensor_id.in_(sensor_ids))
+    ranked = ranked.subquery()
+    return select(*(getattr(SensorData, field) for field in STATUS_FIELDS), AnomalyDetection.is_anomaly).join(
+        ranked, ranked.c.id == SensorData.id
+    ).outerjoin(
+        AnomalyDetection, AnomalyDetection.sensor_data_id == SensorData.id
+    ).where(ranked.c.rank == 1)
+
+
+class SensorRegistry:
+    """Sensor metadata cached in process, plus each sensor's latest reading
+
+    Metadata is loaded from the Sensor table on first use and served from
+    memory; it is reloaded once older than ``max_age`` seconds (to pick up
+    sensors registered by another process) or after ``invalidate``. Ingest
+    registers new or moved sensors through ``register`` inside its flush
+    transaction, so a reading never references a missing sensor, and
+    ``record`` updates the cache and the latest reading per sensor once the
+    flush has committed. Listeners get the metadata of sensors whenever
+    they are loaded or change.
+
+    Latest readings are only complete in the process that runs ingest,
+    which calls ``warm`` at startup and sets ``tracking``.
+    """
+
+    def __init__(self, max_age=60.0, stale_after=300.0):
+        self.max_age = max_age
+        self.stale_after = timedelta(seconds=stale_after)
+        self.listeners = []
+        self.tracking = False
+        # Replaced, never mutated, so readers can use a reference unlocked
+        self._sensors = {}
+        self._loaded_at = None
+        self._latest = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.sensors())
+
+    def add_listener(self, callback):
+        """Register ``callback(sensors)``, called with metadata dicts on load and change"""
+        self.listeners.append(callback)
+
+    def sensors(self):
+        """Metadata of every registered sensor, by sensor_id"""
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.max_age:
+            self.load()
+        return self._sensors
+
+    def get(self, sensor_id):
+        return self.sensors().get(sensor_id)
+
+    def load(self):
+        rows = db.session.execute(select(Sensor.sensor_id, *(getattr(Sensor, field) for field in METADATA_FIELDS))).all()
+        sensors = {row.sensor_id: row._asdict() for row in rows}
+        with self._lock:
+            self._sensors = sensors
+            self._loaded_at = time.monotonic()
+        self._notify(sensors.values())
+
+    def invalidate(self):
+        """Reload metadata from the table on next use"""
+        self._loaded_at = None
+
+    def register(self, readings):
+        """Write sensors that are new or whose metadata changed; returns their metadata
+
+        Ingest write hook: runs in the caller's transaction and leaves the
+        cache alone until ``record`` sees the commit. Fields missing from a
+        reading keep their registered value.
+        """
+        changed = self._changes(readings)
+        if not changed:
+            return []
+        dialect = db.engine.dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            raise NotImplementedError(f"Sensor registration is not supported on {dialect}")
+
+        stmt = insert(Sensor.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['sensor_id'],
+            set_=dict({field: stmt.excluded[field] for field in METADATA_FIELDS}, updated_at=stmt.excluded.updated_at)
+        )
+        now = datetime.utcnow()
+        db.session.execute(stmt, [dict(metadata, created_at=now, updated_at=now) for metadata in changed.values()])
+        return list(changed.values())
+
+    def record(self, rows):
+        """Ingest listener: cache sensors registered by the flush and note each latest reading"""
+        changed = self._changes(rows)
+        with self._lock:
+            if changed:
+                self._sensors = dict(self._sensors, **changed)
+            for row in rows:
+                # Same rule as latest_readings_query: newest timestamp, then newest id
+                latest = self._latest.get(row['sensor_id'])
+                if latest is None or (row['timestamp'], row['id']) > (latest['timestamp'], latest['id']):
+                    self._latest[row['sensor_id']] = dict(
+                        {field: row[field] for field in STATUS_FIELDS}, is_anomaly=row.get('is_anomaly', False)
+                    )
+        if changed:
+            self._notify(changed.values())
+
+    def warm(self, since):
+        """Load metadata and the latest reading per sensor since ``since``, then track ingest"""
+        self.load()
+        rows = db.session.execute(latest_readings_query(since)).all()
+        with self._lock:
+            for row in rows:
+                self._latest[row.sensor_id] = dict(row._asdict(), is_anomaly=bool(row.is_anomaly))
+            self.tracking = True
+        logger.info("Sensor registry warmed: %d sensors, %d reporting", len(self._sensors), len(rows))
+
+    def latest(self, sensor_ids, since):
+        """Latest reading of each of ``sensor_ids`` at or after ``since``"""
+        latest = self._latest
+        readings = {}
+        for sensor_id in sensor_ids:
+            reading = latest.get(sensor_id)
+            if reading is not None and reading['timestamp'] >= since:
+                readings[sensor_id] = reading
+        return readings
+
+    def health(self, reading, now=None):
+        """``ok``, ``anomalous``, ``stale`` or ``unknown`` from a sensor's latest reading"""
+        if reading is None:
+            return 'unknown'
+        if (now or datetime.utcnow()) - reading['timestamp'] > self.stale_after:
+            return 'stale'
+        return 'anomalous' if reading.get('is_anomaly') else 'ok'
+
+    def _changes(self, readings):
+        known = self.sensors()
+        changed = {}
+        for reading in readings:
+            sensor_id = reading['sensor_id']
+            current = changed.get(sensor_id) or known.get(sensor_id)
+            metadata = {'sensor_id': sensor_id}
+            for field in METADATA_FIELDS:
+                metadata[field] = reading.get(field, current[field] if current else None)
+            if current != metadata:
+                changed[sensor_id] = metadata
+        return changed
+
+    def _notify(self, sensors):
+        for callback in self.listeners:
+            try:
+                callback(list(sensors))
+            except Exception:
+                logger.exception("Sensor registry listener %r failed", callback)
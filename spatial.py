@@ -0,0 +1,156 @@
+import math
+import threading
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+
+
+class GridIndex:
+    """In-process uniform grid over lat/lon for bbox, radius and nearest queries
+
+    Points are bucketed into ``cell_degrees`` square cells, so a query only
+    visits the cells overlapping its area instead of every point. Each entry
+    carries an arbitrary payload dict; re-inserting a key moves it.
+    """
+
+    def __init__(self, cell_degrees=0.25):
+        self.cell_degrees = cell_degrees
+        self._cells = {}
+        self._points = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._points)
+
+    def _cell(self, lat, lon):
+        return (math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees))
+
+    def insert(self, key, lat, lon, payload=None):
+        with self._lock:
+            self.remove(key)
+            cell = self._cell(lat, lon)
+            self._points[key] = (lat, lon, payload, cell)
+            self._cells.setdefault(cell, set()).add(key)
+
+    def remove(self, key):
+        with self._lock:
+            point = self._points.pop(key, None)
+            if point is None:
+                return False
+            members = self._cells.get(point[3])
+            members.discard(key)
+            if not members:
+                del self._cells[point[3]]
+            return True
+
+    def remove_where(self, predicate):
+        """Drop every entry whose payload matches ``predicate``; returns the count"""
+        with self._lock:
+            stale = [key for key, point in self._points.items() if predicate(point[2])]
+            for key in stale:
+                self.remove(key)
+            return len(stale)
+
+    def get(self, key):
+        point = self._points.get(key)
+        return point[2] if point is not None else None
+
+    def items(self):
+        """``(key, payload)`` for every indexed point"""
+        with self._lock:
+            return [(key, point[2]) for key, point in self._points.items()]
+
+    def location(self, key):
+        point = self._points.get(key)
+        return (point[0], point[1]) if point is not None else None
+
+    def _keys_in_cells(self, min_row, max_row, min_col, max_col):
+        # Visit whichever is smaller: the covered cells or the occupied ones
+        if (max_row - min_row + 1) * (max_col - min_col + 1) > len(self._cells):
+            for (row, col), members in self._cells.items():
+                if min_row <= row <= max_row and min_col <= col <= max_col:
+                    yield from members
+        else:
+            for row in range(min_row, max_row + 1):
+                for col in range(min_col, max_col + 1):
+                    yield from self._cells.get((row, col), ())
+
+    def bbox(self, min_lat, min_lon, max_lat, max_lon):
+        """``(key, payload)`` for every point inside the box"""
+        with self._lock:
+            min_row, min_col = self._cell(min_lat, min_lon)
+            max_row, max_col = self._cell(max_lat, max_lon)
+            results = []
+            for key in self._keys_in_cells(min_row, max_row, min_col, max_col):
+                lat, lon, payload, _ = self._points[key]
+                if min_lat <= lat <= max_lat and min_lon <= lon <= max_lon:
+                    results.append((key, payload))
+            return results
+
+    def within_radius(self, lat, lon, radius_km):
+        """``(key, payload, distance_km)`` within ``radius_km``, nearest first"""
+        dlat = radius_km / KM_PER_DEGREE
+        dlon = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+        results = []
+        with self._lock:
+            for key, payload in self.bbox(lat - dlat, lon - dlon, lat + dlat, lon + dlon):
+                point = self._points[key]
+                distance = haversine_km(lat, lon, point[0], point[1])
+                if distance <= radius_km:
+                    results.append((key, payload, distance))
+        results.sort(key=lambda result: result[2])
+        return results
+
+    def nearest(self, lat, lon, k=1):
+        """The ``k`` nearest points as ``(key, payload, distance_km)``
+
+        Searches rings of cells outward from the query cell and stops once
+        the k-th best distance is closer than anything an unvisited ring
+        could contain.
+        """
+        with self._lock:
+            if not self._points:
+                return []
+            row, col = self._cell(lat, lon)
+            occupied_rows = [cell[0] for cell in self._cells]
+            occupied_cols = [cell[1] for cell in self._cells]
+            max_ring = max(abs(row - min(occupied_rows)), abs(row - max(occupied_rows)),
+                           abs(col - min(occupied_cols)), abs(col - max(occupied_cols)))
+
+            best = []
+            for ring in range(max_ring + 1):
+                for cell in _ring_cells(row, col, ring):
+                    for key in self._cells.get(cell, ()):
+                        point = self._points[key]
+                        best.append((key, point[2], haversine_km(lat, lon, point[0], point[1])))
+                best.sort(key=lambda result: result[2])
+                del best[k:]
+                # Anything outside the visited rings is at least this far away;
+                # east-west cells shrink toward the pole, so use the far edge
+                far_lat = min(abs(lat) + (ring + 1) * self.cell_degrees, 89.9)
+                covered_km = ring * self.cell_degrees * KM_PER_DEGREE * math.cos(math.radians(far_lat))
+                if len(best) >= k and best[-1][2] <= covered_km:
+                    break
+            return best
+
+
+def _ring_cells(row, col, ring):
+    """Cells on the border of the square ``ring`` cells out from (row, col)"""
+    if ring == 0:
+        yield (row, col)
+        return
+    for offset in range(-ring, ring + 1):
+        yield (row - ring, col + offset)
+        yield (row + ring, col + offset)
+    for offset in range(-ring + 1, ring):
+        yield (row + offset, col - ring)
+        yield (row + offset, col + ring)
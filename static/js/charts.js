@@ -203,9 +203,14 @@ class DashboardCharts {
     }
 
     startDataUpdates() {
-        // Update charts every 30 seconds
+        // Refresh only the charts whose sensor types received readings on the
+        // dashboard stream, at most every 30 seconds
+        this.pendingSensorTypes = new Set();
+        document.addEventListener('sensor-readings', (event) => {
+            event.detail.forEach(reading => this.pendingSensorTypes.add(reading.sensor_type));
+        });
         setInterval(() => {
-            this.updateAllCharts();
+            this.updatePendingCharts();
         }, 30000);
 
         // Initial data load
@@ -229,6 +234,23 @@ class DashboardCharts {
         }
     }
 
+    async updatePendingCharts() {
+        if (this.pendingSensorTypes.size === 0) return;
+
+        const pending = this.pendingSensorTypes;
+        this.pendingSensorTypes = new Set();
+        const updates = [this.updateOverviewChart()];
+        if (pending.has('tide_gauge')) updates.push(this.updateTideChart());
+        if (pending.has('water_quality')) updates.push(this.updateWaterQualityChart());
+        if (pending.has('weather_station')) updates.push(this.updateWeatherChart());
+
+        try {
+            await Promise.all(updates);
+        } catch (error) {
+            console.error('Error updating charts:', error);
+        }
+    }
+
     async updateOverviewChart() {
         if (!this.charts.overview) return;
 
@@ -477,9 +499,7 @@ class DashboardCharts {
             const data = await response.json();
             
             if (this.charts.tide && data.labels && data.datasets) {
-                this.charts.tide.data.labels = data.labels;
-                this.charts.tide.data.datasets[0].data = data.datasets[0].data;
-                this.charts.tide.update('none');
+                this.applySeries(this.charts.tide, data);
             }
         } catch (error) {
             console.error('Error updating tide chart:', error);
@@ -492,19 +512,13 @@ class DashboardCharts {
             const data = await response.json();
             
             if (this.charts.waterQuality && data.labels && data.datasets) {
-                this.charts.waterQuality.data.labels = data.labels;
-                this.charts.waterQuality.data.datasets[0].data = data.datasets[0].data;
-                
                 // Color code based on quality levels
-                const coloredData = data.datasets[0].data.map(value => {
+                this.applySeries(this.charts.waterQuality, data, value => {
                     if (value < 30) return this.chartColors.danger;
                     if (value < 50) return this.chartColors.warning;
                     if (value < 70) return this.chartColors.info;
                     return this.chartColors.success;
                 });
-                
-                this.charts.waterQuality.data.datasets[0].pointBackgroundColor = coloredData;
-                this.charts.waterQuality.update('none');
             }
         } catch (error) {
             console.error('Error updating water quality chart:', error);
@@ -517,25 +531,45 @@ class DashboardCharts {
             const data = await response.json();
             
             if (this.charts.weather && data.labels && data.datasets) {
-                this.charts.weather.data.labels = data.labels;
-                this.charts.weather.data.datasets[0].data = data.datasets[0].data;
-                
                 // Color code based on wind speed levels
-                const coloredData = data.datasets[0].data.map(value => {
+                this.applySeries(this.charts.weather, data, value => {
                     if (value > 50) return this.chartColors.danger;
                     if (value > 30) return this.chartColors.warning;
                     if (value > 15) return this.chartColors.info;
                     return this.chartColors.success;
                 });
-                
-                this.charts.weather.data.datasets[0].pointBackgroundColor = coloredData;
-                this.charts.weather.update('none');
             }
         } catch (error) {
             console.error('Error updating weather chart:', error);
         }
     }
 
+    // Replace a chart's series with the per-sensor datasets from /api/chart-data,
+    // styling each one like the chart's first dataset
+    applySeries(chart, data, pointColor = null) {
+        if (!this.seriesTemplates) this.seriesTemplates = new Map();
+        if (!this.seriesTemplates.has(chart)) {
+            this.seriesTemplates.set(chart, { ...chart.data.datasets[0], data: [] });
+        }
+        const template = this.seriesTemplates.get(chart);
+        const series = data.datasets.length ? data.datasets : [{ label: template.label, data: [] }];
+
+        chart.data.labels = data.labels;
+        chart.data.datasets = series.map((dataset, index) => ({
+            ...template,
+            label: dataset.label,
+            data: dataset.data,
+            spanGaps: true,
+            fill: index === 0 ? template.fill : false,
+            borderColor: index === 0 ? template.borderColor : this.hexToRgba(template.borderColor, Math.max(0.35, 1 - index * 0.2)),
+            pointBackgroundColor: pointColor
+                ? dataset.data.map(value => value === null ? template.borderColor : pointColor(value))
+                : template.pointBackgroundColor
+        }));
+        chart.options.plugins.legend.display = chart.data.datasets.length > 1;
+        chart.update('none');
+    }
+
     hexToRgba(hex, alpha) {
         const r = parseInt(hex.slice(1, 3), 16);
         const g = parseInt(hex.slice(3, 5), 16);
@@ -2,8 +2,12 @@
 
 class CoastalDashboard {
     constructor() {
-        this.updateInterval = 30000; // 30 seconds
+        this.updateInterval = 30000; // 30 seconds, polling fallback only
         this.lastUpdate = null;
+        this.stream = null;
+        this.pollTimer = null;
+        this.sensorData = [];
+        this.alerts = [];
         this.isOnline = true;
         this.currentTab = 'dashboard';
         this.filters = {
@@ -29,7 +33,9 @@ class CoastalDashboard {
     setupEventListeners() {
         // Handle page visibility changes
         document.addEventListener('visibilitychange', () => {
-            if (!document.hidden) {
+            // A live stream keeps the data current while the tab is hidden
+            const streaming = this.stream && this.stream.readyState !== EventSource.CLOSED;
+            if (!document.hidden && !streaming) {
                 this.loadDashboardData();
             }
         });
@@ -115,12 +121,12 @@ class CoastalDashboard {
     }
 
     startDataUpdates() {
-        // Update data every 30 seconds
-        setInterval(() => {
-            if (this.isOnline && !document.hidden) {
-                this.loadDashboardData();
-            }
-        }, this.updateInterval);
+        if (window.EventSource) {
+            // Live deltas from the server; the initial load fills the history
+            this.connectStream();
+        } else {
+            this.startPolling();
+        }
 
         // Update time display every second
         setInterval(() => {
@@ -128,6 +134,97 @@ class CoastalDashboard {
         }, 1000);
     }
 
+    startPolling() {
+        // Update data every 30 seconds, fetching only readings we haven't seen
+        if (this.pollTimer) return;
+        this.pollTimer = setInterval(() => {
+            if (this.isOnline && !document.hidden) {
+                this.refreshDashboardData();
+            }
+        }, this.updateInterval);
+    }
+
+    stopPolling() {
+        clearInterval(this.pollTimer);
+        this.pollTimer = null;
+    }
+
+    connectStream() {
+        // EventSource reconnects by itself and resumes from the last event id
+        this.stream = new EventSource('/api/stream');
+
+        this.stream.addEventListener('open', () => {
+            this.stopPolling();
+        });
+        // A refused stream (every slot taken) is not retried by EventSource:
+        // poll meanwhile and try streaming again later
+        this.stream.addEventListener('error', () => {
+            if (this.stream.readyState === EventSource.CLOSED) {
+                this.startPolling();
+                setTimeout(() => this.connectStream(), 4 * this.updateInterval);
+            }
+        });
+
+        this.stream.addEventListener('readings', (event) => {
+            this.handleNewReadings(JSON.parse(event.data));
+        });
+        this.stream.addEventListener('alert', (event) => {
+            this.handleAlertChange(JSON.parse(event.data));
+        });
+        this.stream.addEventListener('stats', (event) => {
+            this.updateDashboardStats(JSON.parse(event.data));
+        });
+        // The server could not resume from our last event: reload everything
+        this.stream.addEventListener('reset', () => {
+            this.loadDashboardData();
+        });
+    }
+
+    handleNewReadings(readings) {
+        const known = new Set(this.sensorData.map(reading => reading.id));
+        const fresh = readings.filter(reading => !known.has(reading.id));
+        if (fresh.length === 0) return;
+
+        // Keep the same one-hour, newest-first window as /api/sensor-data
+        const cutoff = Date.now() - 60 * 60 * 1000;
+        this.sensorData = fresh.reverse().concat(this.sensorData)
+            .filter(reading => new Date(reading.timestamp + 'Z').getTime() >= cutoff);
+
+        this.updateSensorTable(this.sensorData);
+        if (window.hazardMap) {
+            window.hazardMap.updateSensorData(this.sensorData);
+        }
+        this.processAnomalies(fresh);
+        this.lastUpdate = new Date();
+
+        // Let the charts know which sensor types have new data
+        document.dispatchEvent(new CustomEvent('sensor-readings', { detail: fresh }));
+    }
+
+    handleAlertChange(change) {
+        const { action, ...alert } = change;
+        const wasNew = !this.alerts.some(existing => existing.id === alert.id);
+
+        this.alerts = this.alerts.filter(existing => existing.id !== alert.id);
+        if (action !== 'resolved') {
+            this.alerts.unshift(alert);
+        }
+
+        this.updateAlertsPanel(this.alerts);
+        this.updateDetailedAlerts(this.alerts);
+        if (window.hazardMap) {
+            window.hazardMap.updateHazardAlerts(this.alerts);
+        }
+        if (wasNew && action === 'opened' && alert.severity === 'critical') {
+            this.showNotification(
+                `CRITICAL: ${alert.hazard_type.replace('_', ' ')} detected`,
+                'danger',
+                5000
+            );
+        }
+        this.lastUpdate = new Date();
+    }
+
     async loadDashboardData() {
         try {
             await Promise.all([
@@ -145,25 +242,67 @@ class CoastalDashboard {
         }
     }
 
+    async refreshDashboardData() {
+        try {
+            await Promise.all([
+                this.loadDashboardStats(),
+                this.loadNewSensorData(),
+                this.loadHazardAlerts()
+            ]);
+            this.lastUpdate = new Date();
+        } catch (error) {
+            console.error('Error refreshing dashboard data:', error);
+        }
+    }
+
+    async loadNewSensorData() {
+        const latestId = this.sensorData.length ? this.sensorData[0].id : null;
+        if (latestId === null) {
+            return this.loadSensorData();
+        }
+
+        try {
+            // Follow the cursor so a burst bigger than one page leaves no
+            // gap; pages are newest first, handleNewReadings expects arrival order
+            const readings = [];
+            let cursor = null;
+            do {
+                const query = cursor === null ? '' : `&cursor=${cursor}`;
+                const response = await fetch(`/api/sensor-data?since_id=${latestId}&limit=5000${query}`);
+                const page = await response.json();
+                readings.push(...page.items);
+                cursor = page.next_cursor;
+            } while (cursor !== null);
+            this.handleNewReadings(readings.reverse());
+        } catch (error) {
+            console.error('Error loading new sensor data:', error);
+        }
+    }
+
     async loadDashboardStats() {
         try {
             const response = await fetch('/api/dashboard-stats');
             const stats = await response.json();
             
-            document.getElementById('total-sensors').textContent = stats.total_sensors;
-            document.getElementById('active-alerts').textContent = stats.active_alerts;
-            document.getElementById('recent-anomalies').textContent = stats.recent_anomalies;
-            document.getElementById('system-status').textContent = stats.system_status.toUpperCase();
+            this.updateDashboardStats(stats);
         } catch (error) {
             console.error('Error loading dashboard stats:', error);
         }
     }
 
+    updateDashboardStats(stats) {
+        document.getElementById('total-sensors').textContent = stats.total_sensors;
+        document.getElementById('active-alerts').textContent = stats.active_alerts;
+        document.getElementById('recent-anomalies').textContent = stats.recent_anomalies;
+        document.getElementById('system-status').textContent = stats.system_status.toUpperCase();
+    }
+
     async loadSensorData() {
         try {
             const response = await fetch('/api/sensor-data');
             const sensorData = await response.json();
             
+            this.sensorData = sensorData;
             this.updateSensorTable(sensorData);
             
             // Update map with sensor locations
@@ -180,6 +319,7 @@ class CoastalDashboard {
             const response = await fetch('/api/hazard-alerts');
             const alerts = await response.json();
             
+            this.alerts = alerts;
             this.updateAlertsPanel(alerts);
             this.updateDetailedAlerts(alerts);
             
@@ -18,6 +18,31 @@ class HazardMap {
     init() {
         this.initializeMap();
         this.setupMapLayers();
+
+        // Only fetch what is visible: reload whenever the viewport changes
+        this.map.on('moveend', () => this.loadViewport());
+        this.loadViewport();
+    }
+
+    async loadViewport() {
+        // Leaflet's bbox string is min_lon,min_lat,max_lon,max_lat
+        const bbox = this.map.getBounds().toBBoxString();
+
+        try {
+            const [sensors, alerts] = await Promise.all([
+                fetch(`/api/sensors?bbox=${bbox}`).then(r => r.json()),
+                fetch(`/api/hazard-alerts?bbox=${bbox}`).then(r => r.json())
+            ]);
+
+            this.updateSensorData(sensors.filter(sensor => sensor.latest).map(sensor => sensor.latest));
+            this.updateHazardAlerts(alerts);
+        } catch (error) {
+            console.error('Error loading map viewport:', error);
+        }
+    }
+
+    inViewport(item) {
+        return this.map.getBounds().contains([item.latitude, item.longitude]);
     }
 
     initializeMap() {
@@ -82,14 +107,26 @@ class HazardMap {
     }
 
     updateSensorData(sensorData) {
-        // Store all sensor data for filtering
-        this.allSensorData = sensorData;
+        // Keep the newest reading per visible sensor; readings arrive newest first
+        const latest = new Map();
+        sensorData.forEach(sensor => {
+            if (!latest.has(sensor.sensor_id) && this.inViewport(sensor)) {
+                latest.set(sensor.sensor_id, sensor);
+            }
+        });
+        // Sensors not in this update keep their last known reading
+        this.allSensorData.forEach(sensor => {
+            if (!latest.has(sensor.sensor_id) && this.inViewport(sensor)) {
+                latest.set(sensor.sensor_id, sensor);
+            }
+        });
+        this.allSensorData = Array.from(latest.values());
         
         // Clear existing sensor markers
         this.sensorLayer.clearLayers();
         this.sensorMarkers.clear();
 
-        sensorData.forEach(sensor => {
+        this.allSensorData.forEach(sensor => {
             const marker = this.createSensorMarker(sensor);
             this.sensorMarkers.set(sensor.sensor_id, marker);
             this.sensorLayer.addLayer(marker);
@@ -174,11 +211,11 @@ class HazardMap {
     }
 
     updateHazardAlerts(alerts) {
-        // Store all hazard data for filtering
-        this.allHazardData = alerts;
+        // Store visible hazard data for filtering
+        this.allHazardData = alerts.filter(alert => this.inViewport(alert));
         
         // Apply current filters
-        const filteredAlerts = this.filterAlerts(alerts);
+        const filteredAlerts = this.filterAlerts(this.allHazardData);
         
         // Clear existing hazard markers
         this.hazardLayer.clearLayers();
@@ -0,0 +1,143 @@
+import json
+import threading
+import time
+import uuid
+from collections import deque
+
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT_INTERVAL = 15.0
+
+
+class StreamLimitReached(Exception):
+    """Every stream slot is taken"""
+
+
+class Broadcaster:
+    """In-process fan-out of dashboard events to server-sent-event clients
+
+    Writers publish each event once; it is serialized once and appended to a
+    bounded history. Every connected client waits on the same condition and
+    reads from that history, so the number of clients does not change the
+    cost of producing an event and no client ever queries the database.
+
+    Event ids are ``<epoch>-<sequence>``. A reconnecting client sends its last
+    id back; if it is from this process and still in the history, the missed
+    events are replayed, otherwise the client is told to reload.
+
+    Each connected client holds a server thread, so at most
+    ``max_subscribers`` streams are open at once (None for no limit).
+    """
+
+    def __init__(self, history=10000, max_subscribers=None):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.max_subscribers = max_subscribers
+        self._sequence = 0
+        self._events = deque(maxlen=history)
+        self._condition = threading.Condition()
+        self.subscribers = 0
+
+    def publish(self, event_type, payload):
+        """Queue an event for every current and resuming client"""
+        data = json.dumps(payload, default=str, separators=(',', ':'))
+        with self._condition:
+            self._sequence += 1
+            self._events.append((self._sequence, event_type, data))
+            self._condition.notify_all()
+
+    def cursor(self):
+        return f"{self.epoch}-{self._sequence}"
+
+    def _parse_cursor(self, cursor):
+        """Sequence number to resume after, or None if the cursor can't be resumed"""
+        if not cursor:
+            return self._sequence
+        epoch, _, sequence = cursor.partition('-')
+        if epoch != self.epoch or not sequence.isdigit():
+            return None
+        sequence = int(sequence)
+        oldest = self._events[0][0] if self._events else self._sequence + 1
+        if sequence > self._sequence or sequence < oldest - 1:
+            return None
+        return sequence
+
+    def _events_after(self, sequence):
+        """Events newer than ``sequence``, or None if some were already evicted"""
+        if not self._events or self._events[-1][0] <= sequence:
+            return []
+        # Sequences are contiguous, so the offset into the deque is direct
+        start = sequence - self._events[0][0] + 1
+        if start < 0:
+            return None
+        return [self._events[i] for i in range(start, len(self._events))]
+
+    def subscribe(self, cursor=None, max_seconds=300.0):
+        """Take a stream slot; returns an iterable of SSE-formatted chunks from ``cursor`` onwards
+
+        Raises StreamLimitReached when ``max_subscribers`` streams are open.
+        The slot is freed when the server closes the iterable. The stream
+        ends after ``max_seconds``; EventSource reconnects on its own with
+        the last id, so this just bounds how long a worker thread is held by
+        one connection.
+        """
+        with self._condition:
+            if self.max_subscribers is not None and self.subscribers >= self.max_subscribers:
+                raise StreamLimitReached(f"{self.subscribers} streams open")
+            sequence = self._parse_cursor(cursor)
+            reset = sequence is None
+            if reset:
+                sequence = self._sequence
+            self.subscribers += 1
+        return Subscription(self, self._stream(sequence, reset, max_seconds))
+
+    def _release(self):
+        with self._condition:
+            self.subscribers -= 1
+
+    def _stream(self, sequence, reset, max_seconds):
+        # Never yield while holding the condition: a slow client would stall
+        # every publisher and subscriber behind it
+        deadline = time.monotonic() + max_seconds
+        yield "retry: 3000\n\n"
+        if reset:
+            yield self._format(sequence, 'reset', '{}')
+        while time.monotonic() < deadline:
+            with self._condition:
+                events = self._events_after(sequence)
+                if events == []:
+                    self._condition.wait(HEARTBEAT_INTERVAL)
+                    events = self._events_after(sequence)
+                if events is None:
+                    # Client fell further behind than the history holds
+                    sequence = self._sequence
+            if events is None:
+                yield self._format(sequence, 'reset', '{}')
+            elif not events:
+                yield ": keep-alive\n\n"
+            else:
+                for event_sequence, event_type, data in events:
+                    yield self._format(event_sequence, event_type, data)
+                sequence = events[-1][0]
+
+    def _format(self, sequence, event_type, data):
+        return f"id: {self.epoch}-{sequence}\nevent: {event_type}\ndata: {data}\n\n"
+
+
+class Subscription:
+    """One client's stream; closing it (the WSGI server does) frees its slot"""
+
+    def __init__(self, broadcaster, chunks):
+        self._broadcaster = broadcaster
+        self._chunks = chunks
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._chunks)
+
+    def close(self):
+        self._chunks.close()
+        if not self._closed:
+            self._closed = True
+            self._broadcaster._release()
@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """App on a scratch SQLite database, inside an app context"""
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv('DB_AUTO_CREATE', '1')
+    app = create_app('development')
+    app.config['TESTING'] = True
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    """Test client with the routes' process-wide caches emptied"""
+    import routes
+    routes.response_cache.invalidate('readings', 'alerts', 'stats')
+    routes.sensor_registry.invalidate()
+    return app.test_client()
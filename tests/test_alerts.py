@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+
+from app import db
+from models import HazardAlert
+
+
+def open_alert(**fields):
+    alert = HazardAlert(**dict({
+        'hazard_type': 'storm', 'severity': 'high', 'latitude': 25.0, 'longitude': -80.0,
+        'description': 'Wind', 'rule': 'wind_threshold', 'sensor_id': 'WS001', 'trigger_count': 1,
+        'timestamp': datetime.utcnow(), 'is_active': True,
+    }, **fields))
+    db.session.add(alert)
+    db.session.commit()
+    return alert
+
+
+def wind_reading(value, timestamp=None):
+    return {'id': 1, 'sensor_id': 'WS001', 'sensor_type': 'weather_station', 'latitude': 25.0,
+            'longitude': -80.0, 'value': value, 'unit': 'km/h', 'timestamp': timestamp or datetime.utcnow()}
+
+
+def test_unloaded_engine_does_not_evaluate(app):
+    import routes
+    open_alert()
+    assert not routes.alert_engine.tracking
+
+    assert routes.alert_engine.evaluate([wind_reading(90.0)], [False]) == []
+    assert HazardAlert.query.count() == 1
+
+
+def test_alert_reads_fall_back_to_the_table(client):
+    open_alert(timestamp=datetime.utcnow() - timedelta(minutes=5))
+    newer = open_alert(hazard_type='pollution', severity='medium', latitude=30.0)
+    open_alert(is_active=False)
+
+    alerts = client.get('/api/hazard-alerts').get_json()
+    assert [alert['hazard_type'] for alert in alerts] == ['pollution', 'storm']
+    assert alerts[0]['id'] == newer.id
+    assert [alert['hazard_type'] for alert in client.get('/api/hazard-alerts?severity=high').get_json()] == ['storm']
+    assert client.get('/api/dashboard-stats').get_json()['active_alerts'] == 2
+
+
+def test_open_alerts_in_memory_match_the_table(client, monkeypatch):
+    import routes
+    from alerts import AlertEngine, default_rules
+    from payloads import serialize_alert
+    from spatial import GridIndex
+    now = datetime.utcnow().replace(microsecond=0)
+    open_alert(sensor_id='W1', timestamp=now)
+    open_alert(sensor_id='W2', timestamp=now)
+    open_alert(sensor_id='W1', hazard_type='pollution', timestamp=now)
+    open_alert(sensor_id='W1', timestamp=now - timedelta(minutes=5))
+    table = {query: client.get(f'/api/hazard-alerts{query}').get_json() for query in ('', '?sensor_id=W1')}
+
+    engine = AlertEngine(default_rules(), GridIndex(), serialize=serialize_alert)
+    engine.load()
+    monkeypatch.setattr(routes, 'alert_engine', engine)
+    routes.response_cache.invalidate('alerts')
+
+    for query, expected in table.items():
+        assert client.get(f'/api/hazard-alerts{query}').get_json() == expected
+    assert [alert['sensor_id'] for alert in table['?sensor_id=W1']] == ['W1'] * 3
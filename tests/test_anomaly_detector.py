@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from anomaly_detector import MIN_STREAM_SAMPLES, STREAM_ALPHA, AnomalyDetector, SensorStreams
+from data_simulator import SENSOR_TYPES, DataSimulator
+
+
+def naive_ewm(states, sensor_ids, values):
+    """Reference: score then fold in one reading at a time"""
+    zscores = []
+    for sensor_id, value in zip(sensor_ids, values):
+        count, mean, var = states.get(sensor_id, (0, value, 0.0))
+        std = var ** 0.5
+        diff = value - mean
+        zscores.append(diff / std if count >= MIN_STREAM_SAMPLES and std > 0 else 0.0)
+        mean += STREAM_ALPHA * diff
+        var = (1 - STREAM_ALPHA) * (var + STREAM_ALPHA * diff * diff)
+        states[sensor_id] = (count + 1, mean, var)
+    return np.array(zscores)
+
+
+@pytest.mark.parametrize('sizes', [(1, 25, 80, 3, 200), (5000, 7, 3000)])
+def test_stream_update_matches_per_reading_loop(sizes):
+    rng = np.random.default_rng(7)
+    sensors = ['a', 'b', 'c', 'd']
+    streams = SensorStreams()
+    expected = {}
+
+    # Interleaved batches, with a sensor missing from some; the long ones
+    # span many blocks of the batched recurrence
+    for size in sizes:
+        sensor_ids = rng.choice(sensors[:3] if size in (80, 7) else sensors, size=size)
+        values = rng.normal(10.0, 2.0, size) + (sensor_ids == 'b') * 100.0 + np.linspace(0, 5, size)
+
+        zscores = streams.update(streams.codes(sensor_ids), values)
+
+        np.testing.assert_allclose(zscores, naive_ewm(expected, sensor_ids.tolist(), values), rtol=1e-7, atol=1e-7)
+
+    state = dict(streams.items())
+    assert set(state) == set(expected)
+    for sensor_id, (count, mean, var) in expected.items():
+        assert state[sensor_id][0] == count
+        assert state[sensor_id][1:] == pytest.approx((mean, var))
+
+
+def test_stream_state_round_trips():
+    streams = SensorStreams()
+    streams.update(streams.codes(['a', 'b', 'a']), np.array([1.0, 2.0, 3.0]))
+    restored = SensorStreams()
+
+    restored.restore(dict(streams.items()))
+
+    assert dict(restored.items()) == dict(streams.items())
+    assert streams.update(streams.codes([]), np.array([])).size == 0
+
+
+def test_baseline_follows_a_level_shift():
+    detector = AnomalyDetector()
+    rng = np.random.default_rng(0)
+    values = np.concatenate((rng.normal(1.0, 0.05, 200), rng.normal(2.0, 0.05, 400)))
+
+    zscores = detector.detect_stream(['tg-1'] * len(values), values, ['tide_gauge'] * len(values))['zscore']
+
+    assert abs(zscores[200]) > 10
+    # A cumulative mean would still sit between the two levels here
+    assert np.abs(zscores[-100:]).max() < 4
+
+
+def test_detect_stream_flags_outlier_after_warmup():
+    detector = AnomalyDetector()
+    values = [1.0 + 0.01 * (i % 5) for i in range(MIN_STREAM_SAMPLES)] + [2.0]
+
+    result = detector.detect_stream(['tg-1'] * len(values), values, ['tide_gauge'] * len(values))
+
+    assert not result['is_anomaly'][:-1].any()
+    assert result['is_anomaly'][-1]
+
+
+def simulated(simulator, fleet, start, hours):
+    batches = [batch for _, batch in simulator.replay(fleet, start, start + timedelta(hours=hours), 600)]
+    return (np.concatenate([batch['value'] for batch in batches]),
+            np.concatenate([batch['sensor_type'] for batch in batches]))
+
+
+def test_models_fitted_on_simulator_history_rarely_flag_normal_readings():
+    simulator = DataSimulator(seed=1)
+    fleet = simulator.generate_fleet(300, ['nsw'])
+    start = datetime(2024, 1, 1)
+    values, sensor_types = simulated(simulator, fleet, start, 24)
+    detector = AnomalyDetector()
+    detector.install_models(detector.fit_models({t: values[sensor_types == t] for t in SENSOR_TYPES.tolist()}))
+
+    fresh_values, fresh_types = simulated(simulator, fleet, start + timedelta(days=1), 24)
+    flagged = detector.detect_batch(fresh_values, fresh_types)['is_anomaly']
+
+    assert set(detector.models) == set(SENSOR_TYPES.tolist())
+    for sensor_type in SENSOR_TYPES.tolist():
+        assert flagged[fresh_types == sensor_type].mean() < 0.01, sensor_type
+
+
+def test_uncalibrated_model_sets_are_not_installed():
+    detector = AnomalyDetector()
+
+    detector.install_models({'tide_gauge': ('scaler', 'model')}, 'v0001')
+
+    assert detector.models == {}
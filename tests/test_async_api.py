@@ -0,0 +1,77 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip('aiosqlite')
+pytest.importorskip('greenlet')
+
+from app import db
+from async_api import AsyncReadAPI
+from models import HazardAlert
+
+
+def get(api, path, query=''):
+    """Drive one GET through the ASGI app; returns (status, parsed body)"""
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    async def run():
+        scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': query.encode()}
+        await api(scope, receive, send)
+        await api.engine.dispose()
+
+    asyncio.run(run())
+    return messages[0]['status'], json.loads(messages[1]['body'])
+
+
+@pytest.fixture
+def api(app):
+    from sqlalchemy.ext.asyncio import create_async_engine
+    return AsyncReadAPI(create_async_engine(f"sqlite+aiosqlite:///{db.engine.url.database}"), cache_ttl=0)
+
+
+def seed():
+    import routes
+    now = datetime.utcnow()
+    assert routes.ingest_pipeline.write([
+        {'sensor_id': f'TG{i % 3}', 'sensor_type': 'tide_gauge', 'latitude': 25.0 + i % 3, 'longitude': -80.0,
+         'value': 1.0 + 0.1 * i, 'unit': 'm', 'timestamp': now - timedelta(minutes=40 - i)}
+        for i in range(30)
+    ])
+    db.session.add_all([
+        HazardAlert(hazard_type='storm', severity='high', latitude=25.0, longitude=-80.0, description='Wind',
+                    rule='wind_threshold', sensor_id='WS001', trigger_count=2, timestamp=now, is_active=True),
+        HazardAlert(hazard_type='pollution', severity='medium', latitude=26.0, longitude=-80.0,
+                    description='Turbidity', timestamp=now - timedelta(minutes=5), is_active=True),
+    ])
+    db.session.commit()
+
+
+@pytest.mark.parametrize('path, query, items', [
+    ('/api/chart-data/tide_levels', 'hours=1&points=50', 'datasets'),
+    ('/api/hazard-alerts', '', None),
+    ('/api/hazard-alerts', 'limit=1', 'items'),
+])
+def test_async_bodies_match_flask(client, api, path, query, items):
+    seed()
+
+    expected = client.get(f'{path}?{query}')
+    status, body = get(api, path, query)
+
+    assert status == expected.status_code == 200
+    assert body == expected.get_json()
+    assert body[items] if items else body
+
+
+def test_async_rejects_bad_chart_window(app, api):
+    status, body = get(api, '/api/chart-data/tide_levels', 'hours=0')
+
+    assert status == 400
+    assert 'error' in body
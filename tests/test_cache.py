@@ -0,0 +1,18 @@
+import re
+
+
+def metric(body, name):
+    return float(re.search(rf'^{name} (\S+)$', body, re.M).group(1))
+
+
+def test_metrics_export_bytes_saved_and_entries(client):
+    before = client.get('/metrics').get_data(as_text=True)
+    first = client.get('/api/sensor-data')
+
+    revalidated = client.get('/api/sensor-data', headers={'If-None-Match': first.headers['ETag']})
+    after = client.get('/metrics').get_data(as_text=True)
+
+    assert revalidated.status_code == 304
+    saved = metric(after, 'response_cache_bytes_saved_total') - metric(before, 'response_cache_bytes_saved_total')
+    assert saved == len(first.get_data())
+    assert metric(after, 'response_cache_entries') >= 1
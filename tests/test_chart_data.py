@@ -0,0 +1,16 @@
+import pytest
+
+
+@pytest.mark.parametrize('query', ['hours=abc', 'hours=0', 'hours=-2', 'hours=nan', 'points=many'])
+def test_bad_chart_parameters_are_rejected(client, query):
+    response = client.get(f'/api/chart-data/tide_levels?{query}')
+
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_chart_data_without_readings(client):
+    response = client.get('/api/chart-data/tide_levels?hours=2&points=50')
+
+    assert response.status_code == 200
+    assert response.get_json() == {'labels': [], 'resolution': 60, 'datasets': []}
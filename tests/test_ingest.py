@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+from ingest import IngestPipeline
+
+
+def reading(sensor_id, value, timestamp):
+    return {'sensor_id': sensor_id, 'sensor_type': 'tide_gauge', 'latitude': 25.0, 'longitude': -80.0,
+            'value': value, 'unit': 'm', 'timestamp': timestamp}
+
+
+def test_batches_reach_listeners_in_time_order(app):
+    seen = []
+    pipeline = IngestPipeline(app)
+    pipeline.add_listener(seen.extend)
+    start = datetime(2024, 1, 1)
+    rows = [reading('T2', 1.0, start + timedelta(minutes=2)), reading('T1', 2.0, start + timedelta(minutes=1)),
+            reading('T1', 3.0, start), reading('T2', 4.0, start)]
+
+    assert pipeline.write(rows)
+
+    assert [row['timestamp'] for row in seen] == sorted(row['timestamp'] for row in rows)
+    assert [row['id'] for row in seen] == sorted(row['id'] for row in seen)
+    assert [row['value'] for row in seen if row['sensor_id'] == 'T1'] == [3.0, 2.0]
+
+
+def test_msgpack_batches_are_accepted(client):
+    import msgpack
+    body = msgpack.packb({
+        'sensor_id': ['T1', 'T2'], 'sensor_type': ['tide_gauge', 'tide_gauge'], 'latitude': [25.0, 25.1],
+        'longitude': [-80.0, -80.1], 'value': [1.2, 1.3], 'unit': ['m', 'm'],
+    })
+
+    response = client.post('/api/ingest', data=body, content_type='application/msgpack')
+
+    assert response.status_code == 200
+    assert response.get_json()['accepted'] == 2
+
+
+def test_msgpack_columns_must_be_arrays(client):
+    import msgpack
+    body = msgpack.packb({'sensor_id': 'x', 'value': 1})
+
+    response = client.post('/api/ingest', data=body, content_type='application/msgpack')
+
+    assert response.status_code == 400
+    assert 'column arrays' in response.get_json()['error']
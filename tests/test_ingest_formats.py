@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from ingest_formats import MAX_CLOCK_SKEW, validate
+
+NOW = datetime(2024, 6, 1, 12, 0)
+
+
+def columns(*rows):
+    names = ('sensor_id', 'sensor_type', 'latitude', 'longitude', 'value', 'unit', 'timestamp')
+    return {name: [row[i] for row in rows] for i, name in enumerate(names)}
+
+
+GOOD = ('T1', 'tide_gauge', -33.8, 151.2, 1.2, 'm', NOW.isoformat())
+
+
+@pytest.mark.parametrize('reason, row', [
+    ('missing_sensor_id', ('', *GOOD[1:])),
+    ('missing_sensor_id', (None, *GOOD[1:])),
+    ('missing_sensor_id', ('x' * 51, *GOOD[1:])),
+    ('invalid_sensor_type', ('T1', 'radar', *GOOD[2:])),
+    ('invalid_location', ('T1', 'tide_gauge', 91.0, 151.2, *GOOD[4:])),
+    ('invalid_location', ('T1', 'tide_gauge', -33.8, -180.5, *GOOD[4:])),
+    ('invalid_location', ('T1', 'tide_gauge', 'north', 151.2, *GOOD[4:])),
+    ('invalid_value', (*GOOD[:4], float('nan'), *GOOD[5:])),
+    ('invalid_value', (*GOOD[:4], 'high', *GOOD[5:])),
+    ('invalid_value', (*GOOD[:4], None, *GOOD[5:])),
+    ('missing_unit', (*GOOD[:5], '', GOOD[6])),
+    ('invalid_timestamp', (*GOOD[:6], 'yesterday')),
+    ('invalid_timestamp', (*GOOD[:6], (NOW + MAX_CLOCK_SKEW + timedelta(seconds=1)).isoformat())),
+])
+def test_each_rejection_reason(reason, row):
+    rows, rejected = validate(columns(GOOD, row), now=NOW)
+
+    assert rejected == {reason: 1}
+    assert [r['sensor_id'] for r in rows] == ['T1']
+
+
+def test_row_is_counted_once_under_its_first_failure():
+    rows, rejected = validate(columns(('', 'radar', 91.0, 151.2, 'high', '', 'yesterday')), now=NOW)
+
+    assert rows == []
+    assert rejected == {'missing_sensor_id': 1}
+
+
+def test_accepted_rows_are_normalised():
+    aware = datetime(2024, 6, 1, 22, 0, tzinfo=timezone(timedelta(hours=10)))
+
+    rows, rejected = validate(columns(('T1', 'tide_gauge', '-33.8', '151.2', '1.5', 'm', aware.isoformat()),
+                                      ('T2', 'tide_gauge', -33.8, 151.2, 2.0, 'm', None)), now=NOW)
+
+    assert rejected == {}
+    assert rows[0]['latitude'] == -33.8 and rows[0]['value'] == 1.5
+    assert rows[0]['timestamp'] == NOW
+    assert rows[1]['timestamp'] == NOW
+
+
+def test_ragged_columns_are_an_error():
+    ragged = columns(GOOD, GOOD)
+    ragged['unit'].pop()
+
+    with pytest.raises(ValueError):
+        validate(ragged, now=NOW)
@@ -0,0 +1,54 @@
+import threading
+
+import pytest
+from flask import Flask
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app import db
+from metrics import Registry
+from profiler import RequestProfiler
+
+
+def test_counter_metadata_uses_the_sample_name():
+    registry = Registry()
+    registry.counter('db_queries', 'SQL statements', ('route',)).inc(route='/x')
+
+    lines = registry.render().splitlines()
+
+    assert lines == ['# HELP db_queries_total SQL statements', '# TYPE db_queries_total counter',
+                     'db_queries_total{route="/x"} 1']
+
+
+def test_app_counters_are_typed_under_their_total_name(client):
+    body = client.get('/metrics').get_data(as_text=True)
+
+    for name in ('db_queries_total', 'anomaly_scored_readings_total'):
+        assert f'# TYPE {name} counter' in body
+    assert '# TYPE db_queries counter' not in body
+
+
+def test_failed_statement_leaves_no_start_time(app):
+    with db.engine.connect() as connection:
+        with pytest.raises(OperationalError):
+            connection.execute(text('SELECT * FROM no_such_table'))
+        connection.execute(text('SELECT 1'))
+
+        assert connection.info.get('metrics_query_started') == []
+
+
+def test_profiler_stops_when_its_after_request_is_skipped():
+    app = Flask(__name__)
+    RequestProfiler(app, enabled=True)
+
+    @app.route('/ok')
+    def ok():
+        return 'ok'
+
+    # Runs before the profiler's after_request, which then never runs
+    @app.after_request
+    def broken(response):
+        raise RuntimeError('broken')
+
+    assert app.test_client().get('/ok?profile=1').status_code == 500
+    assert not any(thread.name == 'profiler' for thread in threading.enumerate())
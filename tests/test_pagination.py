@@ -0,0 +1,71 @@
+from collections import namedtuple
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert, select
+
+from app import db
+from models import SensorData
+from pagination import MAX_LIMIT, InvalidQuery, keyset_query, latest_id, split_page
+
+Row = namedtuple('Row', 'id')
+
+
+def seed(n):
+    db.session.execute(insert(SensorData.__table__), [
+        {'sensor_id': 'T1', 'sensor_type': 'tide_gauge', 'latitude': 0.0, 'longitude': 0.0,
+         'value': float(i), 'unit': 'm', 'timestamp': datetime(2024, 1, 1)} for i in range(n)
+    ])
+    db.session.commit()
+
+
+def page(args):
+    query, limit = keyset_query(select(SensorData.id), SensorData, args)
+    rows, next_cursor = split_page(db.session.execute(query).all(), limit)
+    return [row.id for row in rows], next_cursor
+
+
+def test_pages_walk_newest_first_until_the_cursor_runs_out(app):
+    seed(5)
+
+    assert page({'limit': '2'}) == ([5, 4], 4)
+    assert page({'limit': '2', 'cursor': '4'}) == ([3, 2], 2)
+    assert page({'limit': '2', 'cursor': '2'}) == ([1], None)
+    assert page({'limit': '2', 'cursor': '1'}) == ([], None)
+
+
+def test_last_full_page_has_no_next_cursor(app):
+    seed(4)
+
+    assert page({'limit': '2', 'cursor': '3'}) == ([2, 1], None)
+    assert page({'limit': '4'}) == ([4, 3, 2, 1], None)
+
+
+def test_limit_is_clamped():
+    assert keyset_query(select(SensorData.id), SensorData, {'limit': '0'})[1] == 1
+    assert keyset_query(select(SensorData.id), SensorData, {'limit': '-5'})[1] == 1
+    assert keyset_query(select(SensorData.id), SensorData, {'limit': str(MAX_LIMIT * 10)})[1] == MAX_LIMIT
+
+
+@pytest.mark.parametrize('args', [{'cursor': 'abc'}, {'limit': 'ten'}, {'cursor': '1.5'}])
+def test_malformed_cursor_or_limit_is_rejected(args):
+    with pytest.raises(InvalidQuery):
+        keyset_query(select(SensorData.id), SensorData, args)
+
+
+def test_split_page_edges():
+    rows = [Row(i) for i in (9, 8, 7)]
+
+    assert split_page([], 2) == ([], None)
+    assert split_page(rows[:2], 2) == (rows[:2], None)
+    assert split_page(rows, 2) == (rows[:2], 8)
+    assert split_page(rows, 1) == (rows[:1], 9)
+
+
+def test_only_the_head_page_advances_latest_id():
+    rows = [Row(9), Row(8)]
+
+    assert latest_id(rows, {'since_id': '3'}) == 9
+    assert latest_id(rows, {'since_id': '3', 'cursor': '10'}) == 3
+    assert latest_id([], {'since_id': '3'}) == 3
+    assert latest_id([], {}) is None
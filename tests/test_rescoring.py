@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta
+
+from app import db
+from models import AnomalyDetection, SensorData
+from rescoring import Rescorer
+
+
+def test_polling_and_rescoring_keep_one_result_per_reading(client, app, tmp_path):
+    import routes
+    now = datetime.utcnow().replace(microsecond=0)
+    rows = [{'sensor_id': f'T{i % 4}', 'sensor_type': 'tide_gauge', 'latitude': 25.0, 'longitude': -80.0,
+             'value': 1.0 + i % 7 * 0.1, 'unit': 'm', 'timestamp': now - timedelta(minutes=40 - i)}
+            for i in range(40)]
+    assert routes.ingest_pipeline.write(rows)
+
+    for _ in range(3):
+        response = client.get('/api/anomaly-detection')
+        assert response.status_code == 200
+        assert len(response.get_json()) == len(rows)
+
+    report = Rescorer(app.config['SQLALCHEMY_DATABASE_URI'], str(tmp_path / 'checkpoints'), workers=1).run(
+        now - timedelta(hours=1), now + timedelta(minutes=1), restart=True)
+    assert report['scored'] == len(rows)
+
+    db.session.expire_all()
+    reading_ids = {row.id for row in SensorData.query.all()}
+    result_ids = [row.sensor_data_id for row in AnomalyDetection.query.all()]
+    assert len(reading_ids) == len(rows)
+    assert sorted(result_ids) == sorted(reading_ids)
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import insert, select
+
+from app import db
+from models import SensorData, SensorRollup
+from rollups import apply_rollups, lttb_indices, rebuild_rollups
+
+
+def reading(sensor_id, value, timestamp):
+    return {'sensor_id': sensor_id, 'sensor_type': 'tide_gauge', 'latitude': 0.0, 'longitude': 0.0,
+            'value': value, 'unit': 'm', 'timestamp': timestamp}
+
+
+def rollups(resolution):
+    return db.session.execute(
+        select(SensorRollup.sensor_id, SensorRollup.timestamp, SensorRollup.min_value, SensorRollup.max_value,
+               SensorRollup.sum_value, SensorRollup.count)
+        .where(SensorRollup.resolution == resolution)
+        .order_by(SensorRollup.sensor_id, SensorRollup.timestamp)
+    ).all()
+
+
+def test_apply_rollups_merges_into_existing_buckets(app):
+    at = datetime(2024, 1, 1, 10, 0, 5)
+    apply_rollups([reading('T1', 2.0, at), reading('T1', 4.0, at + timedelta(seconds=10)),
+                   reading('T2', 1.0, at)])
+    apply_rollups([reading('T1', 1.0, at + timedelta(seconds=20)), reading('T1', 9.0, at + timedelta(minutes=5))])
+
+    assert rollups(60) == [
+        ('T1', datetime(2024, 1, 1, 10, 0), 1.0, 4.0, 7.0, 3),
+        ('T1', datetime(2024, 1, 1, 10, 5), 9.0, 9.0, 9.0, 1),
+        ('T2', datetime(2024, 1, 1, 10, 0), 1.0, 1.0, 1.0, 1),
+    ]
+    assert rollups(3600) == [
+        ('T1', datetime(2024, 1, 1, 10, 0), 1.0, 9.0, 16.0, 4),
+        ('T2', datetime(2024, 1, 1, 10, 0), 1.0, 1.0, 1.0, 1),
+    ]
+
+
+def test_rebuild_keeps_rollups_older_than_raw_data(app):
+    now = datetime.utcnow().replace(minute=30, second=0, microsecond=0)
+    # Rollups from ten days ago whose raw readings have been pruned
+    old = now - timedelta(days=10)
+    apply_rollups([reading('T1', 3.0, old), reading('T1', 5.0, old + timedelta(minutes=1))])
+    # Raw readings still in SensorData, starting mid-hour two hours ago
+    raw = [reading('T1', float(i), now - timedelta(hours=2) + timedelta(minutes=10 * i)) for i in range(12)]
+    db.session.execute(insert(SensorData.__table__), raw)
+    db.session.commit()
+    apply_rollups(raw)
+    before = {resolution: rollups(resolution) for resolution in (60, 900, 3600)}
+
+    assert rebuild_rollups(now - timedelta(days=30)) == 9
+    db.session.expire_all()
+
+    # Untouched: the pruned history and the partly pruned first hour
+    for resolution in (60, 900, 3600):
+        assert rollups(resolution) == before[resolution]
+
+
+def test_rebuild_without_raw_data_keeps_everything(app):
+    apply_rollups([reading('T1', 3.0, datetime(2024, 1, 1))])
+
+    assert rebuild_rollups(datetime(2023, 1, 1)) == 0
+    assert len(rollups(3600)) == 1
+
+
+@pytest.mark.parametrize('threshold, expected', [(0, [0]), (1, [0]), (2, [0, 9]), (10, list(range(10))),
+                                                 (25, list(range(10)))])
+def test_lttb_small_and_oversized_thresholds(threshold, expected):
+    x = np.arange(10, dtype=np.float64)
+
+    assert lttb_indices(x, np.sin(x), threshold) == expected
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.zeros(1000)
+    y[123] = 50.0
+    y[800] = -50.0
+
+    keep = lttb_indices(x, y, 20)
+
+    assert len(keep) == 20
+    assert keep[0] == 0 and keep[-1] == 999
+    assert keep == sorted(set(keep))
+    assert {123, 800} <= set(keep)
+
+
+def test_lttb_empty_series():
+    assert lttb_indices(np.array([]), np.array([]), 5) == []
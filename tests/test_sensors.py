@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app import db
+from models import Sensor, SensorData
+from sensors import SensorRegistry
+
+
+def seed_out_of_order():
+    """T1's newest reading was written first, as a backfill would"""
+    now = datetime.utcnow()
+    db.session.add(Sensor(sensor_id='T1', sensor_type='tide_gauge', latitude=25.0, longitude=-80.0))
+    rows = [{'sensor_id': 'T1', 'sensor_type': 'tide_gauge', 'latitude': 25.0, 'longitude': -80.0,
+             'value': value, 'unit': 'm', 'timestamp': now - timedelta(minutes=minutes)}
+            for value, minutes in ((1.0, 1), (2.0, 50), (3.0, 30))]
+    db.session.execute(insert(SensorData.__table__), rows)
+    db.session.commit()
+    return now
+
+
+def test_latest_reading_is_the_newest_by_timestamp(client):
+    seed_out_of_order()
+
+    assert client.get('/api/sensors/T1').get_json()['latest']['value'] == 1.0
+
+
+def test_warm_and_record_keep_the_newest_by_timestamp(app):
+    now = seed_out_of_order()
+    registry = SensorRegistry()
+    registry.warm(now - timedelta(hours=1))
+    assert registry.latest(['T1'], now - timedelta(hours=1))['T1']['value'] == 1.0
+
+    # An older reading arriving later doesn't replace it
+    registry.record([{'id': 99, 'sensor_id': 'T1', 'sensor_type': 'tide_gauge', 'latitude': 25.0,
+                      'longitude': -80.0, 'value': 4.0, 'unit': 'm', 'timestamp': now - timedelta(minutes=5)}])
+    assert registry.latest(['T1'], now - timedelta(hours=1))['T1']['value'] == 1.0
@@ -0,0 +1,28 @@
+import json
+from datetime import datetime
+
+import numpy as np
+
+import serialization
+from serialization import dumps, stream_array
+
+
+def test_orjson_is_installed():
+    assert serialization.orjson is not None
+
+
+def test_orjson_and_standard_library_write_the_same_json(monkeypatch):
+    rows = [{'id': 1, 'timestamp': datetime(2024, 1, 1, 12, 30, 5, 250000), 'value': np.float64(1.5),
+             'values': np.array([1, 2]), 'name': 'Baía'}]
+    fast = dumps(rows)
+    monkeypatch.setattr(serialization, 'orjson', None)
+
+    assert dumps(rows) == fast
+    assert json.loads(fast)[0]['timestamp'] == '2024-01-01T12:30:05.250000'
+
+
+def test_stream_array_is_one_json_array():
+    body = b''.join(stream_array([[{'id': 1}], [], [{'id': 2}, {'id': 3}]]))
+
+    assert json.loads(body) == [{'id': 1}, {'id': 2}, {'id': 3}]
+    assert b''.join(stream_array([])) == b'[]'
@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+from spatial import GridIndex
+
+
+def brute_force(points, min_lat, min_lon, max_lat, max_lon):
+    return {key for key, (lat, lon) in points.items() if min_lat <= lat <= max_lat and min_lon <= lon <= max_lon}
+
+
+@pytest.mark.parametrize('cell_degrees', [0.1, 0.25, 5.0])
+def test_bbox_matches_brute_force(cell_degrees):
+    rng = random.Random(3)
+    index = GridIndex(cell_degrees)
+    points = {}
+    for key in range(500):
+        points[key] = (rng.uniform(-40, -30), rng.uniform(140, 155))
+        index.insert(key, *points[key], payload={'key': key})
+
+    # Small boxes visit covered cells, huge ones the occupied cells instead
+    for box in [(-35, 150, -34, 151), (-40, 140, -30, 155), (-90, -180, 90, 180), (-33.3, 151.1, -33.3, 151.1)]:
+        found = index.bbox(*box)
+        assert {key for key, _ in found} == brute_force(points, *box)
+        assert all(payload == {'key': key} for key, payload in found)
+
+
+def test_bbox_edges_are_inclusive_across_negative_cells():
+    index = GridIndex(0.25)
+    index.insert('edge', -0.25, -0.25)
+    index.insert('corner', 0.0, 0.0)
+    index.insert('outside', -0.2500001, 0.0)
+
+    assert sorted(key for key, _ in index.bbox(-0.25, -0.25, 0.0, 0.0)) == ['corner', 'edge']
+
+
+def test_bbox_sees_moved_and_removed_points():
+    index = GridIndex(0.25)
+    index.insert('a', 10.0, 10.0)
+    index.insert('b', 10.1, 10.1)
+
+    index.insert('a', 20.0, 20.0)
+    index.remove('b')
+
+    assert index.bbox(9, 9, 11, 11) == []
+    assert index.bbox(19, 19, 21, 21) == [('a', None)]
+    assert len(index) == 1
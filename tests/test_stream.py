@@ -0,0 +1,88 @@
+import pytest
+
+from stream import Broadcaster, StreamLimitReached
+
+
+def test_streams_past_the_limit_are_refused_until_one_closes():
+    broadcaster = Broadcaster(max_subscribers=1)
+    first = broadcaster.subscribe()
+
+    with pytest.raises(StreamLimitReached):
+        broadcaster.subscribe()
+
+    # Closing frees the slot even for a stream that never sent anything
+    first.close()
+    first.close()
+    second = broadcaster.subscribe()
+    assert next(second) == "retry: 3000\n\n"
+    second.close()
+    assert broadcaster.subscribers == 0
+
+
+def test_stream_endpoint_answers_503_when_full(client, monkeypatch):
+    import routes
+    monkeypatch.setattr(routes.broadcaster, 'max_subscribers', 0)
+
+    response = client.get('/api/stream')
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '60'
+
+
+def event_of(chunk):
+    """``(id, event type)`` of one SSE chunk"""
+    id_line, event_line = chunk.splitlines()[:2]
+    return id_line[len('id: '):], event_line[len('event: '):]
+
+
+def first_events(subscription, n):
+    """The first ``n`` events of a new stream, after its retry hint"""
+    assert next(subscription) == "retry: 3000\n\n"
+    return [event_of(next(subscription)) for _ in range(n)]
+
+
+def test_cursor_replays_the_events_missed():
+    broadcaster = Broadcaster()
+    for i in range(3):
+        broadcaster.publish('reading', {'i': i})
+    stream = broadcaster.subscribe(f"{broadcaster.epoch}-1")
+
+    assert first_events(stream, 2) == [(f"{broadcaster.epoch}-2", 'reading'), (f"{broadcaster.epoch}-3", 'reading')]
+    assert broadcaster.cursor() == f"{broadcaster.epoch}-3"
+    stream.close()
+
+
+def test_without_cursor_only_new_events_arrive():
+    broadcaster = Broadcaster()
+    broadcaster.publish('reading', {})
+    stream = broadcaster.subscribe()
+    assert first_events(stream, 0) == []
+
+    broadcaster.publish('alert', {})
+
+    assert event_of(next(stream)) == (f"{broadcaster.epoch}-2", 'alert')
+    stream.close()
+
+
+@pytest.mark.parametrize('cursor', ['other-1', '{epoch}-99', '{epoch}-x', '{epoch}-1'])
+def test_unresumable_cursor_resets_then_follows_new_events(cursor):
+    # A history of 2 holds sequences 4-5, so resuming after 1 would skip events
+    broadcaster = Broadcaster(history=2)
+    for i in range(5):
+        broadcaster.publish('reading', {'i': i})
+    stream = broadcaster.subscribe(cursor.format(epoch=broadcaster.epoch))
+
+    assert first_events(stream, 1) == [(f"{broadcaster.epoch}-5", 'reset')]
+    broadcaster.publish('alert', {})
+    assert event_of(next(stream)) == (f"{broadcaster.epoch}-6", 'alert')
+    stream.close()
+
+
+def test_cursor_at_the_edge_of_history_still_resumes():
+    broadcaster = Broadcaster(history=2)
+    for i in range(5):
+        broadcaster.publish('reading', {'i': i})
+    stream = broadcaster.subscribe(f"{broadcaster.epoch}-3")
+
+    assert first_events(stream, 2) == [(f"{broadcaster.epoch}-4", 'reading'), (f"{broadcaster.epoch}-5", 'reading')]
+    stream.close()
@@ -0,0 +1,315 @@
+import logging
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import delete, func, insert, select
+
+from app import db
+from models import SensorChunk, SensorData
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def _empty_series():
+    return np.empty(0, dtype='datetime64[us]'), np.empty(0, dtype=np.float64)
+
+
+def _summarize(values):
+    if not len(values):
+        return None
+    return {'count': int(len(values)), 'min': float(values.min()), 'max': float(values.max()),
+            'sum': float(values.sum())}
+
+
+def _combine(parts):
+    """Merge partial ``{count, min, max, sum}`` summaries into count/min/max/mean"""
+    parts = [part for part in parts if part and part['count']]
+    if not parts:
+        return {'count': 0, 'min': None, 'max': None, 'mean': None}
+    count = sum(part['count'] for part in parts)
+    return {
+        'count': count,
+        'min': min(part['min'] for part in parts),
+        'max': max(part['max'] for part in parts),
+        'mean': sum(part['sum'] for part in parts) / count,
+    }
+
+
+class SqlReadings:
+    """Reading history straight from the SensorData table
+
+    The repository interface the history routes use: ``series`` returns
+    ``(timestamps, values)`` NumPy arrays for one sensor, oldest first, and
+    ``summary`` returns count/min/max/mean over a range.
+    """
+
+    def series(self, sensor_id, start, end):
+        rows = db.session.execute(
+            select(SensorData.timestamp, SensorData.value).where(
+                SensorData.sensor_id == sensor_id,
+                SensorData.timestamp >= start,
+                SensorData.timestamp <= end
+            ).order_by(SensorData.timestamp)
+        ).all()
+        if not rows:
+            return _empty_series()
+        timestamps, values = zip(*rows)
+        return np.array(timestamps, dtype='datetime64[us]'), np.array(values, dtype=np.float64)
+
+    def summary(self, sensor_id, start, end):
+        return _combine([self._sql_summary(sensor_id, start, end)])
+
+    def _sql_summary(self, sensor_id, start, end):
+        count, minimum, maximum, total = db.session.execute(
+            select(func.count(SensorData.id), func.min(SensorData.value),
+                   func.max(SensorData.value), func.sum(SensorData.value)).where(
+                SensorData.sensor_id == sensor_id,
+                SensorData.timestamp >= start,
+                SensorData.timestamp <= end
+            )
+        ).one()
+        return {'count': count, 'min': minimum, 'max': maximum, 'sum': total}
+
+
+class ChunkStore:
+    """Sealed windows of readings as memory-mapped NumPy column files
+
+    Each window is a directory holding ``timestamp.npy`` (datetime64[us])
+    and ``value.npy`` (float64), sorted by sensor then time. SensorChunk
+    rows index each sensor's slice of a window with its min/max/sum, so a
+    range query maps only the windows it touches and slices them without
+    copying, and aggregates over whole chunks never open the files.
+    """
+
+    def __init__(self, root, window_seconds=3600, cache_windows=64):
+        self.root = root
+        self.window = timedelta(seconds=window_seconds)
+        self.cache_windows = cache_windows
+        self._maps = OrderedDict()
+        self._lock = threading.Lock()
+
+    def window_of(self, timestamp):
+        """Start of the window containing ``timestamp``"""
+        seconds = (timestamp - EPOCH).total_seconds()
+        return EPOCH + timedelta(seconds=seconds - seconds % self.window.total_seconds())
+
+    def path(self, window_start):
+        return os.path.join(self.root, window_start.strftime('%Y%m%dT%H%M%S'))
+
+    def sealed_until(self):
+        """End of the last sealed window; readings before it are served from chunks"""
+        last = db.session.scalar(select(func.max(SensorChunk.window_start)))
+        return last + self.window if last is not None else None
+
+    def chunks(self, sensor_id, start, end):
+        return db.session.execute(
+            select(SensorChunk).where(
+                SensorChunk.sensor_id == sensor_id,
+                SensorChunk.end_time >= start,
+                SensorChunk.start_time <= end
+            ).order_by(SensorChunk.start_time)
+        ).scalars().all()
+
+    def read(self, chunk):
+        """``(timestamps, values)`` of one chunk: read-only views into the mapped files"""
+        timestamps, values = self._open(chunk.window_start)
+        stop = chunk.row_offset + chunk.count
+        return timestamps[chunk.row_offset:stop], values[chunk.row_offset:stop]
+
+    def write_window(self, window_start, sensor_ids, sensor_types, timestamps, values):
+        """Write one window's files; returns the SensorChunk rows to index them
+
+        The files are written to a temporary directory and renamed into
+        place, so a reader never sees a partial window. A window left behind
+        by a pass that failed before indexing it is replaced.
+        """
+        order = np.lexsort((timestamps, sensor_ids))
+        sensor_ids, sensor_types = sensor_ids[order], sensor_types[order]
+        timestamps, values = timestamps[order], values[order]
+
+        final = self.path(window_start)
+        staging = final + '.tmp'
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        np.save(os.path.join(staging, 'timestamp.npy'), timestamps)
+        np.save(os.path.join(staging, 'value.npy'), values)
+        with self._lock:
+            self._maps.pop(window_start, None)
+        shutil.rmtree(final, ignore_errors=True)
+        os.replace(staging, final)
+
+        _, starts, counts = np.unique(sensor_ids, return_index=True, return_counts=True)
+        stops = starts + counts - 1
+        minimums = np.minimum.reduceat(values, starts)
+        maximums = np.maximum.reduceat(values, starts)
+        sums = np.add.reduceat(values, starts)
+        return [{
+            'window_start': window_start,
+            'sensor_id': sensor_ids[start],
+            'sensor_type': sensor_types[start],
+            'start_time': timestamps[start].item(),
+            'end_time': timestamps[stop].item(),
+            'row_offset': start,
+            'count': count,
+            'min_value': minimum,
+            'max_value': maximum,
+            'sum_value': total,
+        } for start, stop, count, minimum, maximum, total in zip(
+            starts.tolist(), stops.tolist(), counts.tolist(), minimums.tolist(), maximums.tolist(), sums.tolist()
+        )]
+
+    def _open(self, window_start):
+        with self._lock:
+            arrays = self._maps.get(window_start)
+            if arrays is not None:
+                self._maps.move_to_end(window_start)
+                return arrays
+        path = self.path(window_start)
+        arrays = (np.load(os.path.join(path, 'timestamp.npy'), mmap_mode='r'),
+                  np.load(os.path.join(path, 'value.npy'), mmap_mode='r'))
+        with self._lock:
+            self._maps[window_start] = arrays
+            while len(self._maps) > self.cache_windows:
+                self._maps.popitem(last=False)
+        return arrays
+
+
+class ChunkedReadings(SqlReadings):
+    """Reading history from the chunk store, with the unsealed tail from SensorData
+
+    Readings before ``store.sealed_until()`` come from chunks and the rest
+    from the table, so history outlives the table's retention window.
+    Readings that arrive for an already sealed window are only in the table
+    and are not returned; the compactor's ``seal_after`` lag covers late data.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def series(self, sensor_id, start, end):
+        sealed = self.store.sealed_until()
+        parts = []
+        if sealed is not None and start < sealed:
+            lower, upper = np.datetime64(start, 'us'), np.datetime64(end, 'us')
+            for chunk in self.store.chunks(sensor_id, start, end):
+                timestamps, values = self.store.read(chunk)
+                lo = np.searchsorted(timestamps, lower, 'left')
+                hi = np.searchsorted(timestamps, upper, 'right')
+                parts.append((timestamps[lo:hi], values[lo:hi]))
+        if sealed is None or end >= sealed:
+            parts.append(super().series(sensor_id, max(start, sealed) if sealed else start, end))
+        if len(parts) == 1:
+            return parts[0]
+        if not parts:
+            return _empty_series()
+        return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+    def summary(self, sensor_id, start, end):
+        sealed = self.store.sealed_until()
+        parts = []
+        if sealed is not None and start < sealed:
+            for chunk in self.store.chunks(sensor_id, start, end):
+                if chunk.start_time >= start and chunk.end_time <= end:
+                    parts.append({'count': chunk.count, 'min': chunk.min_value,
+                                  'max': chunk.max_value, 'sum': chunk.sum_value})
+                    continue
+                timestamps, values = self.store.read(chunk)
+                lo = np.searchsorted(timestamps, np.datetime64(start, 'us'), 'left')
+                hi = np.searchsorted(timestamps, np.datetime64(end, 'us'), 'right')
+                parts.append(_summarize(values[lo:hi]))
+        if sealed is None or end >= sealed:
+            parts.append(self._sql_summary(sensor_id, max(start, sealed) if sealed else start, end))
+        return _combine(parts)
+
+
+class ChunkCompactor:
+    """Background stage that seals SensorData windows into the chunk store
+
+    A window is sealed once its end is ``seal_after`` seconds in the past.
+    Windows are sealed oldest first and at most ``max_windows`` per pass, so
+    catching up on a large backlog never holds the writer for long. Rows stay
+    in SensorData until retention prunes them.
+    """
+
+    def __init__(self, store, app=None, seal_after=3600.0, interval=300.0, max_windows=24):
+        self.store = store
+        self.app = app
+        self.seal_after = timedelta(seconds=seal_after)
+        self.interval = interval
+        self.max_windows = max_windows
+
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_run = {}
+
+    def init_app(self, app):
+        self.app = app
+
+    def start(self):
+        """Start compacting in a background thread"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='chunk-compactor', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def compact(self, now=None):
+        """Seal every complete window that is due; returns windows and readings sealed"""
+        now = now or datetime.utcnow()
+        cutoff = now - self.seal_after
+        windows = readings = 0
+        while windows < self.max_windows and not self._stop.is_set():
+            sealed = self.store.sealed_until()
+            first = db.session.scalar(
+                select(func.min(SensorData.timestamp)).where(SensorData.timestamp >= sealed)
+                if sealed is not None else select(func.min(SensorData.timestamp))
+            )
+            if first is None:
+                break
+            window_start = self.store.window_of(first)
+            if window_start + self.store.window > cutoff:
+                break
+            readings += self._seal(window_start)
+            windows += 1
+        self.last_run = {'at': now.isoformat(), 'windows': windows, 'readings': readings}
+        if windows:
+            logger.info("Sealed %d readings into %d chunk windows", readings, windows)
+        return self.last_run
+
+    def _seal(self, window_start):
+        rows = db.session.execute(
+            select(SensorData.sensor_id, SensorData.sensor_type, SensorData.timestamp, SensorData.value).where(
+                SensorData.timestamp >= window_start,
+                SensorData.timestamp < window_start + self.store.window
+            )
+        ).all()
+        sensor_ids, sensor_types, timestamps, values = zip(*rows)
+        chunks = self.store.write_window(
+            window_start, np.array(sensor_ids), np.array(sensor_types),
+            np.array(timestamps, dtype='datetime64[us]'), np.array(values, dtype=np.float64)
+        )
+        # Replace any index rows of an earlier attempt at this window
+        db.session.execute(delete(SensorChunk).where(SensorChunk.window_start == window_start))
+        db.session.execute(insert(SensorChunk.__table__), chunks)
+        db.session.commit()
+        return len(rows)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                with self.app.app_context():
+                    self.compact()
+            except Exception:
+                logger.exception("Chunk compaction failed")